@@ -0,0 +1,389 @@
+"""
+Mundos en archivos
+------------------
+Carga mundos definidos en archivos JSON o TOML en lugar de en las celdas del
+notebook. El archivo tiene las mismas secciones que el notebook (rooms,
+furniture, doors, keys, treasures, las relaciones, la configuración y los
+logros), pero los objetos se citan por nombre:
+
+    {"format": 1, "start": "game room", "target": "outside",
+     "config": {...}, "achievements": {...},
+     "rooms": {"game_room": {"name": "game room", "description": "..."}},
+     "keys": {"key_a": {"name": "key for door a", "target": "door a", ...}},
+     "relations": {"game room": ["couch", "piano", "door a"], ...}}
+
+Antes de compilar se comprueba el esquema de cada objeto y que todas las
+referencias cruzadas existan y tengan el tipo correcto; los errores se
+devuelven todos juntos en un WorldFileError.
+
+El mundo compilado se guarda en una caché cuyo nombre es el hash del
+contenido del archivo, así que editar el archivo la invalida sola. Los
+textos largos (descripciones, pistas, historias) van al final de la caché y
+no se leen hasta que el juego los muestra: arrancar un mundo grande es leer
+el índice de la caché, no parsear ni validar el archivo. El índice es JSON
+(solo datos): una caché manipulada puede estar mal, pero no ejecuta nada.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from mundo import World, compile_world, freeze
+
+FORMAT = 1
+# Cambia si cambia la estructura de la caché: las cachés anteriores se ignoran
+CACHE_VERSION = 2
+_MAGIC = b"ERMC"
+_HEADER = struct.Struct("<4sIQ")  # magia, versión, bytes del índice
+
+# Campos de texto que se cargan al usarlos
+LAZY_FIELDS = ("description", "interaction", "mechanism", "hint", "story", "power")
+
+# sección -> (tipo, campos obligatorios, campos opcionales)
+SCHEMA = {
+    "rooms": ("room", {"name": str, "description": str}, {"position": list}),
+    "furniture": ("furniture", {"name": str, "description": str}, {"interaction": str}),
+    "doors": ("door", {"name": str, "description": str, "mechanism": str}, {}),
+    "keys": ("key", {"name": str, "target": str, "hint": str, "story": str}, {}),
+    "treasures": ("treasure", {"name": str, "description": str, "power": str, "value": int}, {}),
+}
+
+# Qué puede contener cada tipo en las relaciones
+CONTAINS = {
+    "room": ("furniture", "door"),
+    "furniture": ("key", "treasure"),
+    "door": ("room",),
+}
+
+
+class WorldFileError(Exception):
+    """El archivo del mundo no cumple el esquema o tiene referencias rotas"""
+
+    def __init__(self, path: str, errors: List[str]):
+        super().__init__(f"{path}:\n  " + "\n  ".join(errors))
+        self.path = path
+        self.errors = errors
+
+
+@dataclass(frozen=True)
+class WorldFile:
+    """Mundo cargado de un archivo, con su configuración y sus logros"""
+    world: World
+    start: str
+    target: str
+    config: Mapping
+    achievements: Mapping
+    digest: str  # hash del contenido del archivo
+
+    def initial_state(self) -> Dict[str, Any]:
+        """Estado inicial como INIT_GAME_STATE del notebook, listo para start_game"""
+        config = dict(self.config)
+        objects = self.world.objects
+        ids = self.world.ids
+        state = {
+            "current_room": objects[ids[self.start]],
+            "target_room": objects[ids[self.target]],
+            "keys_collected": [],
+            "treasure_collected": [],
+            "hints_remaining": config.pop("hint_limit", 3),
+            "achievements": {key: dict(value, unlocked=False) for key, value in self.achievements.items()},
+            "examined_objects": set(),
+        }
+        # score_multiplier ({dificultad: factor}) y los umbrales de los logros los lee estado.Rules
+        state.update(config)
+        return state
+
+
+class LazyObject(Mapping):
+    """Objeto del mundo cuyos textos largos se leen de la caché la primera vez que se piden"""
+    __slots__ = ("_fields", "_lazy", "_texts")
+
+    def __init__(self, fields: Dict[str, Any], lazy: Dict[str, Tuple[int, int]], texts: "_TextBlob"):
+        self._fields = fields
+        self._lazy = lazy  # campo -> (posición, bytes) dentro de los textos
+        self._texts = texts
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._fields[key]
+        except KeyError:
+            if key not in self._lazy:
+                raise
+        value = self._fields[key] = self._texts.read(*self._lazy[key])
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._fields
+        yield from (key for key in self._lazy if key not in self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields.keys() | self._lazy.keys())
+
+    def __repr__(self) -> str:
+        return f"LazyObject({self._fields!r}, lazy={sorted(self._lazy)})"
+
+
+class _TextBlob:
+    """Textos del final de la caché. Cada texto se lee una vez (LazyObject lo guarda),
+    así que el archivo se abre en cada lectura y no queda nada abierto"""
+
+    def __init__(self, path: str, start: int):
+        self.path = path
+        self.start = start
+
+    def read(self, offset: int, size: int) -> str:
+        with open(self.path, "rb") as f:
+            f.seek(self.start + offset)
+            return f.read(size).decode("utf-8")
+
+
+def load_world(path: str, cache_dir: Optional[str] = None) -> WorldFile:
+    """Cargar un mundo de un archivo .json o .toml, usando la caché compilada si existe.
+
+    La caché va en cache_dir (por defecto, la carpeta .cache junto al archivo).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), ".cache")
+    cache_path = os.path.join(cache_dir, f"{digest}.world")
+
+    cached = _read_cache(cache_path, digest)
+    if cached is not None:
+        return cached
+    document = _parse(path, data)
+    validate(path, document)
+    relations = _relations(document)
+    world = compile_world(relations, document.get("achievements"))
+    _write_cache(cache_path, digest, world, document)
+    # Se devuelve lo que se acaba de escribir: el mismo mundo que darán las cargas siguientes
+    return _read_cache(cache_path, digest) or WorldFile(
+        world, document["start"], document["target"], freeze(document.get("config", {})),
+        freeze(document.get("achievements", {})), digest)
+
+
+def _parse(path: str, data: bytes) -> Dict[str, Any]:
+    try:
+        if path.endswith(".toml"):
+            # tomllib solo se importa si hay que leer un TOML: los JSON y la caché arrancan antes
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                raise WorldFileError(path, ["Los mundos en TOML necesitan Python 3.11 o posterior"]) from None
+            return tomllib.loads(data.decode("utf-8"))
+        return json.loads(data)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise WorldFileError(path, [f"No se puede leer el archivo: {error}"]) from None
+
+
+def validate(path: str, document: Dict[str, Any]) -> None:
+    """Comprobar el esquema y las referencias cruzadas; lanza WorldFileError con todos los errores"""
+    if not isinstance(document, dict):
+        raise WorldFileError(path, [f"el archivo debe ser un objeto {{sección: ...}}, no {type(document).__name__}"])
+    errors: List[str] = []
+    if document.get("format", FORMAT) != FORMAT:
+        errors.append(f"format: se esperaba {FORMAT}, no {document.get('format')!r}")
+
+    kinds: Dict[str, str] = {}  # nombre -> tipo
+    for section, (kind, required, optional) in SCHEMA.items():
+        entries = document.get(section, {})
+        if not isinstance(entries, dict):
+            errors.append(f"{section}: debe ser un objeto {{id: definición}}")
+            continue
+        for key, obj in entries.items():
+            where = f"{section}.{key}"
+            if not isinstance(obj, dict):
+                errors.append(f"{where}: debe ser un objeto")
+                continue
+            if obj.get("type", kind) != kind:
+                errors.append(f"{where}: el tipo debe ser '{kind}'")
+            for field, expected in required.items():
+                if field not in obj:
+                    errors.append(f"{where}: falta '{field}'")
+                elif not isinstance(obj[field], expected) or isinstance(obj[field], bool):
+                    errors.append(f"{where}.{field}: debe ser {expected.__name__}")
+            for field in obj.keys() - required.keys() - {"type"}:
+                if field not in optional:
+                    errors.append(f"{where}: campo desconocido '{field}'")
+                elif not isinstance(obj[field], optional[field]):
+                    errors.append(f"{where}.{field}: debe ser {optional[field].__name__}")
+            name = obj.get("name")
+            if isinstance(name, str):
+                if name in kinds:
+                    errors.append(f"{where}: el nombre '{name}' está repetido")
+                kinds[name] = kind
+
+    keys = document.get("keys", {})
+    for key, obj in (keys.items() if isinstance(keys, dict) else ()):
+        target = obj.get("target") if isinstance(obj, dict) else None
+        if isinstance(target, str) and kinds.get(target) != "door":
+            errors.append(f"keys.{key}.target: '{target}' no es una puerta")
+
+    relations = document.get("relations", {})
+    if not isinstance(relations, dict):
+        errors.append("relations: debe ser un objeto {nombre: [nombres]}")
+        relations = {}
+    placed: Dict[str, str] = {}
+    for owner, items in relations.items():
+        owner_kind = kinds.get(owner)
+        if owner_kind not in CONTAINS:
+            errors.append(f"relations.{owner}: no es una habitación, un mueble ni una puerta")
+            continue
+        if not isinstance(items, list):
+            errors.append(f"relations.{owner}: debe ser una lista de nombres")
+            continue
+        for item in items:
+            item_kind = kinds.get(item) if isinstance(item, str) else None
+            if item_kind is None:
+                errors.append(f"relations.{owner}: '{item}' no existe")
+            elif item_kind not in CONTAINS[owner_kind]:
+                errors.append(f"relations.{owner}: un {owner_kind} no puede contener '{item}' ({item_kind})")
+            elif owner_kind == "furniture":
+                if item in placed:
+                    errors.append(f"relations.{owner}: '{item}' ya está en '{placed[item]}'")
+                placed[item] = owner
+        if owner_kind == "door" and not 1 <= len(items) <= 2:
+            errors.append(f"relations.{owner}: una puerta une una o dos habitaciones")
+    for name, kind in kinds.items():
+        if kind in ("key", "treasure") and name not in placed:
+            errors.append(f"'{name}' no está en ningún mueble")
+
+    for field in ("start", "target"):
+        value = document.get(field)
+        if not isinstance(value, str) or kinds.get(value) != "room":
+            errors.append(f"{field}: '{document.get(field)}' no es una habitación")
+    achievements = document.get("achievements", {})
+    if not isinstance(achievements, dict):
+        errors.append("achievements: debe ser un objeto {id: definición}")
+    else:
+        for key, achievement in achievements.items():
+            if not isinstance(achievement, dict) or not {"name", "description"} <= achievement.keys():
+                errors.append(f"achievements.{key}: necesita 'name' y 'description'")
+    if not isinstance(document.get("config", {}), dict):
+        errors.append("config: debe ser un objeto")
+    if errors:
+        raise WorldFileError(path, errors)
+
+
+def _relations(document: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """object_relations con diccionarios como los del notebook"""
+    objects: Dict[str, Dict[str, Any]] = {}
+    for section, (kind, _, _) in SCHEMA.items():
+        for obj in document.get(section, {}).values():
+            objects[obj["name"]] = dict(obj, type=kind)
+    for obj in objects.values():
+        if obj["type"] == "key":
+            obj["target"] = objects[obj["target"]]
+    return {owner: [objects[name] for name in items] for owner, items in document.get("relations", {}).items()}
+
+
+def _plain(value: Any) -> Any:
+    """Copiar las vistas de solo lectura del mundo a diccionarios que se puedan serializar"""
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_plain(item) for item in value)
+    return value
+
+
+def _frozen(value: Any) -> Any:
+    if isinstance(value, dict):
+        return freeze({key: _frozen(item) for key, item in value.items()})
+    return value
+
+
+def _by_id(item: Callable[[Any], Any] = lambda value: value) -> Callable[[Dict[str, Any]], Dict[int, Any]]:
+    """JSON guarda las claves enteras como texto: deshacerlo"""
+    return lambda mapping: {int(key): item(value) for key, value in mapping.items()}
+
+
+# Campo del World -> cómo recuperarlo del JSON del índice (tuplas y claves enteras)
+_WORLD_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "names": tuple,
+    "types": tuple,
+    "ids": dict,
+    "room_items": _by_id(),
+    "contents": _by_id(tuple),
+    "door_rooms": _by_id(tuple),
+    "door_next": _by_id(_by_id()),
+    "key_door": _by_id(),
+    "door_key": _by_id(),
+    "achievements": dict,
+    "achievement_bits": dict,
+}
+
+
+def _write_cache(cache_path: str, digest: str, world: World, document: Dict[str, Any]) -> None:
+    texts = bytearray()
+    objects = []
+    for obj in world.objects:
+        plain = {}
+        lazy = {}
+        for key, value in obj.items():
+            if key in LAZY_FIELDS and isinstance(value, str):
+                encoded = value.encode("utf-8")
+                lazy[key] = (len(texts), len(encoded))
+                texts += encoded
+            elif key == "target":
+                plain[key] = value["name"]  # la puerta se enlaza al leer la caché
+            else:
+                plain[key] = value
+        objects.append((plain, lazy))
+    index = {
+        "digest": digest,
+        "objects": objects,
+        "world": {f.name: _plain(getattr(world, f.name)) for f in fields(World) if f.name != "objects"},
+        "start": document["start"],
+        "target": document["target"],
+        "config": document.get("config", {}),
+        "achievements": document.get("achievements", {}),
+    }
+    try:
+        payload = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError):
+        return  # p. ej. fechas de TOML en la configuración: ese mundo se compila en cada carga
+    directory = os.path.dirname(cache_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        import tempfile  # solo al escribir la caché
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, CACHE_VERSION, len(payload)))
+                f.write(payload)
+                f.write(texts)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        pass  # sin caché se sigue pudiendo jugar; solo se compila en cada carga
+
+
+def _read_cache(cache_path: str, digest: str) -> Optional[WorldFile]:
+    try:
+        with open(cache_path, "rb") as f:
+            magic, version, size = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != CACHE_VERSION:
+                return None
+            index = json.loads(f.read(size))
+        if index["digest"] != digest:
+            return None
+        world_fields = {key: _frozen(decode(index["world"][key])) for key, decode in _WORLD_FIELDS.items()}
+    except (OSError, struct.error, ValueError, TypeError, KeyError, AttributeError):
+        return None  # caché de otra versión o dañada: se vuelve a compilar
+
+    texts = _TextBlob(cache_path, _HEADER.size + size)
+    objects = [LazyObject(plain, lazy, texts) for plain, lazy in index["objects"]]
+    ids = index["world"]["ids"]
+    for plain, _ in index["objects"]:
+        if "target" in plain:
+            plain["target"] = objects[ids[plain["target"]]]
+    world = World(objects=tuple(objects), **world_fields)
+    return WorldFile(world, index["start"], index["target"], freeze(index["config"]),
+                     _frozen(index["achievements"]), digest)
@@ -0,0 +1,169 @@
+"""
+Clasificación
+-------------
+Clasificación local en SQLite de las partidas terminadas: puntuación, tiempo,
+tesoros, logros, dificultad y mundo (la huella de guardado.world_fingerprint).
+
+Las partidas se insertan por lotes: add() las acumula en memoria y flush()
+las escribe todas en una sola transacción. Además de la tabla de partidas se
+lleva un recuento de partidas por (mundo, dificultad, puntuación), así que
+el puesto y el percentil de una puntuación se calculan sumando como mucho
+una fila por puntuación distinta, no recorriendo millones de partidas. Los
+mejores k salen del índice (mundo, dificultad, puntuación) sin ordenar nada.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import astuple, dataclass
+from typing import List, Optional
+
+from estado import GameState
+from guardado import world_fingerprint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    world INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    treasures INTEGER NOT NULL,
+    achievements INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_top ON runs (world, difficulty, score DESC, elapsed);
+CREATE INDEX IF NOT EXISTS runs_player ON runs (player, world, difficulty, score DESC);
+CREATE TABLE IF NOT EXISTS score_counts (
+    world INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    PRIMARY KEY (world, difficulty, score)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = "player, world, difficulty, score, elapsed, treasures, achievements, finished_at"
+
+
+@dataclass(frozen=True)
+class Run:
+    """Una partida terminada"""
+    player: str
+    world: int
+    difficulty: str
+    score: int
+    elapsed: float  # segundos
+    treasures: int
+    achievements: int
+    finished_at: float
+
+    @classmethod
+    def from_state(cls, state: GameState, score: int, player: str) -> "Run":
+        return cls(player, world_fingerprint(state.world), state.difficulty, score,
+                   state.now - state.start_time, state.treasure_count, state.achievement_count,
+                   time.time())
+
+
+@dataclass(frozen=True)
+class Standing:
+    """Puesto de una puntuación entre las partidas del mismo mundo y dificultad"""
+    rank: int  # 1 = la mejor
+    total: int
+    percentile: float  # porcentaje de partidas con menos puntos
+
+    def __str__(self) -> str:
+        return f"puesto {self.rank} de {self.total} (mejor que el {self.percentile:.0f}%)"
+
+
+class Leaderboard:
+    """Clasificación guardada en un archivo SQLite"""
+
+    def __init__(self, path: str = "clasificacion.db", batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[Run] = []
+        # El servidor y los hilos de fondo pueden añadir partidas a la vez
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def add(self, run: Run) -> None:
+        """Añadir una partida; se escribe con las demás al llenarse el lote"""
+        with self._lock:
+            self._pending.append(run)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self) -> int:
+        """Escribir las partidas pendientes; devuelve cuántas"""
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        counts = Counter((run.world, run.difficulty, run.score) for run in pending)
+        with self._db:
+            self._db.executemany(f"INSERT INTO runs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [astuple(run) for run in pending])
+            self._db.executemany(
+                "INSERT INTO score_counts (world, difficulty, score, runs) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (world, difficulty, score) DO UPDATE SET runs = runs + excluded.runs",
+                [key + (count,) for key, count in counts.items()])
+        return len(pending)
+
+    def top(self, world: int, difficulty: str, k: int = 10) -> List[Run]:
+        """Las k mejores partidas; a igual puntuación, la más rápida primero"""
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM runs WHERE world = ? AND difficulty = ? "
+                "ORDER BY score DESC, elapsed LIMIT ?", (world, difficulty, k)).fetchall()
+        return [Run(*row) for row in rows]
+
+    def standing(self, world: int, difficulty: str, score: int) -> Standing:
+        """Puesto y percentil de una puntuación (cuentan también las partidas pendientes)"""
+        with self._lock:
+            total, better, worse = self._db.execute(
+                "SELECT COALESCE(SUM(runs), 0), "
+                "COALESCE(SUM(CASE WHEN score > ? THEN runs END), 0), "
+                "COALESCE(SUM(CASE WHEN score < ? THEN runs END), 0) "
+                "FROM score_counts WHERE world = ? AND difficulty = ?",
+                (score, score, world, difficulty)).fetchone()
+            for run in self._pending:
+                if run.world == world and run.difficulty == difficulty:
+                    total += 1
+                    better += run.score > score
+                    worse += run.score < score
+        return Standing(better + 1, total, 100 * worse / total if total else 0.0)
+
+    def best(self, player: str, world: int, difficulty: str) -> Optional[int]:
+        """Mejor puntuación de un jugador, o None si no tiene partidas"""
+        with self._lock:
+            self._flush()
+            row = self._db.execute(
+                "SELECT MAX(score) FROM runs WHERE player = ? AND world = ? AND difficulty = ?",
+                (player, world, difficulty)).fetchone()
+        return row[0]
+
+    def player_standing(self, player: str, world: int, difficulty: str) -> Optional[Standing]:
+        """Puesto de la mejor partida de un jugador"""
+        score = self.best(player, world, difficulty)
+        return None if score is None else self.standing(world, difficulty, score)
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def __enter__(self) -> "Leaderboard":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
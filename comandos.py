@@ -0,0 +1,214 @@
+"""
+Comandos y nombres de objetos
+-----------------------------
+Tabla de comandos registrados, un trie de prefijos para abreviaturas
+('ex pia' -> 'examine piano') y un índice de distancia de edición acotada
+para sugerir "¿Quisiste decir...?" cuando hay una errata.
+
+Los índices de nombres de objetos se construyen una vez por habitación, la
+primera vez que se busca en ella, y los resultados son conjuntos de bits sobre
+los objetos de esa habitación: siguen siendo enteros pequeños aunque el mundo
+tenga cientos de miles de objetos.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+from estado import iter_bits
+from mundo import World
+
+Handler = Callable[[Any, str], Optional[str]]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distancia de Levenshtein entre a y b, o limit + 1 si la supera"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        # Ninguna casilla de la fila puede bajar ya del límite
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def _deletes(word: str, depth: int) -> Iterator[str]:
+    """Variantes de word con hasta depth letras borradas (incluida la propia palabra)"""
+    seen = {word}
+    frontier = [word]
+    yield word
+    for _ in range(depth):
+        following = []
+        for variant in frontier:
+            for i in range(len(variant)):
+                shorter = variant[:i] + variant[i + 1:]
+                if shorter not in seen:
+                    seen.add(shorter)
+                    following.append(shorter)
+                    yield shorter
+        frontier = following
+
+
+class PrefixTrie:
+    """Trie de palabras; cada nodo guarda el conjunto de bits de todo lo que cuelga de él"""
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root: List[Any] = [{}, 0]  # [hijos, bits]
+
+    def insert(self, word: str, bits: int) -> None:
+        node = self.root
+        for char in word:
+            node = node[0].setdefault(char, [{}, 0])
+            node[1] |= bits
+
+    def lookup(self, prefix: str) -> int:
+        """Bits de las palabras que empiezan por prefix, en O(len(prefix))"""
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return 0
+        return node[1]
+
+
+class FuzzyIndex:
+    """Índice de borrados simétricos para buscar palabras a distancia de edición acotada"""
+    __slots__ = ("max_distance", "words", "variants")
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.words: Dict[str, int] = {}  # palabra -> bits
+        self.variants: Dict[str, List[str]] = {}  # palabra con letras borradas -> palabras
+
+    def add(self, word: str, bits: int) -> None:
+        if word not in self.words:
+            for variant in _deletes(word, self.max_distance):
+                self.variants.setdefault(variant, []).append(word)
+        self.words[word] = self.words.get(word, 0) | bits
+
+    def similar(self, term: str) -> List[Tuple[int, str]]:
+        """Palabras parecidas a term como (distancia, palabra), de la más cercana a la más lejana"""
+        # Las palabras cortas solo admiten una errata; si no, casi todo se parecería
+        limit = 1 if len(term) <= 4 else self.max_distance
+        found = {}
+        for variant in _deletes(term, limit):
+            for word in self.variants.get(variant, ()):
+                if word not in found:
+                    found[word] = edit_distance(term, word, limit)
+        return sorted((distance, word) for word, distance in found.items() if distance <= limit)
+
+
+class NameIndex:
+    """Nombres de una o varias palabras buscables por prefijos de palabra y por erratas"""
+    __slots__ = ("names", "exact", "trie", "fuzzy")
+
+    def __init__(self, names: Sequence[str]):
+        self.names = tuple(names)  # bit -> nombre
+        self.exact: Dict[str, int] = {}
+        self.trie = PrefixTrie()
+        self.fuzzy = FuzzyIndex()
+        for bit, name in enumerate(self.names):
+            self.exact[name] = bit
+            for word in name.split():
+                self.trie.insert(word, 1 << bit)
+                self.fuzzy.add(word, 1 << bit)
+
+    def match(self, query: str, scope: int = -1) -> int:
+        """Bits de los nombres en los que cada palabra de query abrevia alguna palabra"""
+        bits = scope
+        for term in query.split():
+            bits &= self.trie.lookup(term)
+            if not bits:
+                break
+        return bits
+
+    def suggest(self, query: str, scope: int = -1) -> int:
+        """Como match(), pero cambiando las palabras sin coincidencias por las más parecidas"""
+        bits = scope
+        for term in query.split():
+            found = self.trie.lookup(term) & scope
+            if not found:
+                for _, word in self.fuzzy.similar(term):
+                    found |= self.fuzzy.words[word]
+            bits &= found
+            if not bits:
+                break
+        return bits
+
+    def resolve(self, query: str, scope: int = -1) -> Tuple[List[int], List[int]]:
+        """Devolver (coincidencias, sugerencias) como listas de bits dentro de scope"""
+        query = " ".join(query.split())
+        bit = self.exact.get(query)
+        if bit is not None and scope >> bit & 1:
+            return [bit], []
+        bits = self.match(query, scope)
+        if bits:
+            # Entre varias coincidencias, mejor las que contienen completas las palabras escritas
+            for term in query.split():
+                whole = bits & self.fuzzy.words.get(term, 0)
+                if whole:
+                    bits = whole
+            return list(iter_bits(bits)), []
+        return [], list(iter_bits(self.suggest(query, scope)))
+
+
+# Índice de nombres de cada habitación de cada mundo compilado, construido la primera vez que se pide
+_room_indexes: "WeakKeyDictionary[World, Dict[int, NameIndex]]" = WeakKeyDictionary()
+
+
+def room_index(world: World, room_id: int) -> NameIndex:
+    """Índice de los nombres de los objetos de una habitación (bit = posición en room_items)"""
+    indexes = _room_indexes.setdefault(world, {})
+    index = indexes.get(room_id)
+    if index is None:
+        index = indexes[room_id] = NameIndex(list(world.room_items.get(room_id, ())))
+    return index
+
+
+@dataclass(frozen=True)
+class Command:
+    """Comando registrado. takes indica qué argumento espera: None, 'room' o 'inventory'"""
+    name: str
+    handler: Handler
+    takes: Optional[str] = None
+    required: bool = False  # sin argumento el comando no es válido
+
+
+class CommandTable:
+    """Tabla de comandos con abreviaturas por prefijo y sugerencias por errata"""
+
+    def __init__(self):
+        self.commands: List[Command] = []
+        self._index: Optional[NameIndex] = None
+
+    def register(self, name: str, takes: Optional[str] = None,
+                 required: bool = False) -> Callable[[Handler], Handler]:
+        """Decorador que registra un manejador handler(sesión, argumento) -> estado o None"""
+        def decorator(handler: Handler) -> Handler:
+            self.commands.append(Command(name, handler, takes, required))
+            self._index = None
+            return handler
+        return decorator
+
+    @property
+    def index(self) -> NameIndex:
+        if self._index is None:
+            self._index = NameIndex([command.name for command in self.commands])
+        return self._index
+
+    def resolve(self, word: str, has_argument: bool) -> Tuple[List[Command], List[Command]]:
+        """Devolver (candidatos, sugerencias) para la palabra del comando"""
+        matches, suggestions = self.index.resolve(word)
+        candidates = [self.commands[bit] for bit in matches]
+        if len(candidates) > 1:
+            # 'ex pia' es examine y 'ex' a secas es explore: desempata si hay argumento
+            fitting = [c for c in candidates if c.required == has_argument]
+            candidates = fitting or candidates
+        return candidates, [self.commands[bit] for bit in suggestions]
@@ -0,0 +1,216 @@
+"""
+Cuaderno
+--------
+Interfaz del juego para Jupyter que no bloquea el kernel.
+
+La partida es una máquina de estados del motor (start_session) y cada línea
+llega por un callback del widget de texto, que llama a feed_line() y vuelve;
+entre comando y comando el kernel queda libre para otras celdas. La pantalla
+son varias zonas con su propio display_id (mapa, habitación, estado,
+inventario, tiempo y lo que ha pasado en los últimos turnos): después de cada
+turno se recalculan y solo se reenvían al navegador las que cambiaron, en
+lugar de borrar la salida con clear_output() y volver a dibujarlo todo.
+
+El tiempo límite y el reloj los lleva el bucle de eventos del kernel
+(call_later), así que la partida termina a su hora aunque nadie escriba.
+
+    from cuaderno import play_in_notebook
+    game = play_in_notebook(INIT_GAME_STATE, object_relations)
+
+Necesita ipywidgets (pip install ipywidgets).
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+
+import ipywidgets as widgets
+from IPython.display import DisplayHandle, display
+
+import funcionesfinal_v2 as game_engine
+from mundo import World
+from pantalla import Renderer, strip_ansi
+from temporizador import format_remaining
+
+
+class NotebookIO(game_engine.GameIO):
+    """Canal del turno: guarda lo que escribe el motor para la zona de los últimos turnos.
+
+    No dibuja el mapa ni el estado dentro del turno (renders = False): esas zonas
+    las redibuja la interfaz después, solo si han cambiado.
+    """
+    renders = False
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        self.lines.append(text + end)
+
+    def read(self, prompt: str) -> str:
+        raise RuntimeError("En el cuaderno las líneas llegan por NotebookGame.send()")
+
+    def clear(self) -> None:
+        # Limpiar la pantalla de la terminal no significa nada en una celda
+        pass
+
+    def bell(self, pauses) -> None:
+        pass
+
+    def flush(self) -> str:
+        text = "".join(self.lines)
+        self.lines.clear()
+        return text
+
+
+class _PanelIO(game_engine.GameIO):
+    """Canal para componer una zona: los frames y el texto se guardan con colores ANSI"""
+    renders = True
+    renderer = Renderer()
+
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        self.parts.append(text + end)
+
+
+class NotebookGame:
+    """Partida en un cuaderno: zonas con display_id, una caja de texto y los temporizadores.
+
+    game_state y object_relations son los de start_game (autoguardado, diario y
+    clasificación incluidos). history es cuántos turnos se ven en la zona de abajo.
+    """
+
+    def __init__(self, game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+                 history: int = 3):
+        self.config = game_state
+        self.state, self.world, self.autosave, self.journal = game_engine.new_game(game_state, object_relations)
+        self.io = NotebookIO()
+        self.turns: Deque[str] = deque(maxlen=history)
+        self.handles: Dict[str, DisplayHandle] = {}
+        self.shown: Dict[str, str] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.finished = False
+        with game_engine.use_io(self.io):
+            game_engine.print_intro()
+            self.run = game_engine.start_session(self.state, self.world, self.autosave, self.journal)
+        self.turns.append(self.io.flush())
+
+        self.prompt = widgets.Label()
+        self.input = widgets.Text(placeholder="examine piano, explore, hint, help...", continuous_update=False)
+        self.input.observe(self._on_submit, names="value")
+        self.button = widgets.Button(description="Enviar")
+        self.button.on_click(lambda _: self._on_submit({"new": self.input.value}))
+        self.controls = widgets.VBox([self.prompt, widgets.HBox([self.input, self.button])])
+
+    def show(self) -> "NotebookGame":
+        """Mostrar las zonas y la caja de texto en la celda actual y poner en marcha el reloj"""
+        for region, text in self._regions().items():
+            self.handles[region] = display({"text/plain": text}, raw=True, display_id=True)
+            self.shown[region] = text
+        display(self.controls)
+        self._update_prompt()
+        self._schedule()
+        return self
+
+    def send(self, line: Optional[str]) -> None:
+        """Jugar una línea (None: se agotó el tiempo) y actualizar las zonas que cambiaron"""
+        if self.run.done:
+            return
+        with game_engine.use_io(self.io):
+            if line is not None:
+                self.io.write(f"{strip_ansi(self.run.prompt)}{line}")
+            game_engine.feed_line(self.run, line)
+            if self.run.done:
+                self._finish()
+        self.turns.append(self.io.flush())
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reenviar al navegador solo las zonas cuyo texto ha cambiado"""
+        for region, text in self._regions().items():
+            if self.shown.get(region) != text:
+                self.shown[region] = text
+                handle = self.handles.get(region)
+                if handle is not None:
+                    handle.update({"text/plain": text}, raw=True)
+        self._update_prompt()
+
+    def _regions(self) -> Dict[str, str]:
+        state, world = self.state, self.world
+        return {
+            "map": _compose(game_engine.print_map, state, world),
+            "room": _compose(game_engine.explore_room, world, state.room).lstrip("\n"),
+            "status": _compose(game_engine.print_status, state),
+            "inventory": _compose(game_engine.print_inventory, state),
+            "clock": self._clock_text(),
+            "log": "".join(self.turns),
+        }
+
+    def _clock_text(self) -> str:
+        if self.run.done:
+            return f"Partida terminada: {self.run.state}"
+        remaining = self.state.start_time + self.state.time_limit - time.time()
+        return f"{game_engine.GameColors.PROGRESS}⏳ Tiempo restante: {format_remaining(remaining)}{game_engine.GameColors.RESET}"
+
+    def _update_prompt(self) -> None:
+        if self.run.done:
+            self.prompt.value = "Partida terminada"
+            self.input.disabled = self.button.disabled = True
+        else:
+            self.prompt.value = strip_ansi(self.run.prompt).strip()
+
+    def _on_submit(self, change: Dict[str, Any]) -> None:
+        line = change["new"]
+        if not line:
+            return  # vaciar la caja también avisa
+        self.input.value = ""
+        self.send(line)
+
+    def _schedule(self) -> None:
+        """Refrescar el reloj en el siguiente cambio de segundo con el bucle de eventos del kernel"""
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            return  # sin bucle de eventos el tiempo límite se comprueba al escribir
+        self._timer = loop.call_later(1 - time.time() % 1 or 1, self._tick)
+
+    def _tick(self) -> None:
+        self._timer = None
+        if self.run.done:
+            return
+        if time.time() - self.state.start_time > self.state.time_limit:
+            self.send(None)
+            return
+        self.refresh()
+        self._schedule()
+
+    def _finish(self) -> None:
+        """Último autoguardado, cerrar el diario y apuntar la partida en la clasificación"""
+        if self.finished:
+            return
+        self.finished = True
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.autosave is not None:
+            self.autosave.request(self.state)
+            self.autosave.close(timeout=5)
+        if self.journal is not None:
+            self.journal.close()
+        game_engine.record_outcome(self.state, self.run.state, self.config)
+
+
+def _compose(render, *args: Any) -> str:
+    """Texto con colores ANSI de una función del motor que escribe o dibuja una zona"""
+    io = _PanelIO()
+    with game_engine.use_io(io):
+        render(*args)
+    return "".join(io.parts)
+
+
+def play_in_notebook(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+                     history: int = 3) -> NotebookGame:
+    """Empezar una partida en la celda actual sin bloquear el kernel"""
+    return NotebookGame(game_state, object_relations, history).show()
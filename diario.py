@@ -0,0 +1,112 @@
+"""
+Diario de partidas
+------------------
+Cada partida puede llevar un diario de solo añadir con todo lo que hace falta
+para repetirla exactamente: la semilla de sus números aleatorios, el estado
+inicial, cada línea de entrada con la hora a la que llegó (el reloj del
+turno) y el resultado de cada 'load'. repeticion.py lo vuelve a ejecutar.
+
+Formato del archivo (líneas JSON): la cabecera y después, en orden,
+{"t": hora, "line": texto}, {"t": hora, "timeout": 1} y {"load": progreso}
+o {"load_error": mensaje}.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from estado import GameState
+from guardado import capture, decode_progress, encode_progress, world_fingerprint
+
+# Una entrada: (hora del turno, línea o None si se agotó el tiempo)
+Entry = Tuple[float, Optional[str]]
+# Resultado de un 'load': progreso cargado o mensaje de error
+LoadResult = Tuple[Optional[Dict[str, Any]], Optional[str]]
+
+
+def new_seed() -> int:
+    """Semilla de 32 bits para una partida nueva (sin importar random al arrancar)"""
+    return int.from_bytes(os.urandom(4), "big")
+
+
+class Journal:
+    """Diario de una partida; con path, cada entrada se añade también al archivo"""
+
+    def __init__(self, header: Dict[str, Any], path: Optional[str] = None):
+        self.header = header
+        self.entries: List[Entry] = []
+        self.loads: List[LoadResult] = []
+        self.path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, "x", encoding="utf-8")
+            self._append(header)
+
+    @classmethod
+    def begin(cls, state: GameState, seed: Optional[int] = None, path: Optional[str] = None) -> "Journal":
+        """Empezar el diario de una partida que aún no ha recibido ninguna entrada"""
+        header = {
+            "world": world_fingerprint(state.world),
+            "seed": new_seed() if seed is None else seed,
+            "now": state.now,
+            "target_room": state.target_room,
+            "time_limit": state.time_limit,
+            "difficulty": state.difficulty,
+            "rules": state.rules._asdict(),
+            "state": capture(state),
+        }
+        return cls(header, path)
+
+    @classmethod
+    def create(cls, state: GameState, directory: str = "diarios") -> "Journal":
+        """Empezar el diario de una partida en un archivo nuevo dentro de directory"""
+        os.makedirs(directory, exist_ok=True)
+        seed = new_seed()
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{seed:08x}.jsonl")
+        return cls.begin(state, seed, path)
+
+    @property
+    def seed(self) -> int:
+        return self.header["seed"]
+
+    def record(self, now: float, line: Optional[str]) -> None:
+        self.entries.append((now, line))
+        self._append({"t": now, "line": line} if line is not None else {"t": now, "timeout": 1})
+
+    def record_load(self, progress: Optional[Dict[str, Any]], error: Optional[str] = None) -> None:
+        self.loads.append((progress, error))
+        self._append({"load": progress} if error is None else {"load_error": error})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._file is not None:
+            for field in ("state", "load"):
+                if record.get(field) is not None:
+                    record = dict(record, **{field: encode_progress(record[field])})
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load(cls, path: str) -> "Journal":
+        """Leer un diario; una última línea cortada a medias se ignora"""
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        header = json.loads(lines[0])
+        journal = cls(dict(header, state=decode_progress(header["state"])))
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if "load" in record:
+                journal.loads.append((decode_progress(record["load"]), None))
+            elif "load_error" in record:
+                journal.loads.append((None, record["load_error"]))
+            else:
+                journal.entries.append((record["t"], None if "timeout" in record else record["line"]))
+        return journal
@@ -0,0 +1,255 @@
+"""
+Entorno por lotes
+-----------------
+Entorno para entrenar y evaluar agentes automáticos: N partidas
+independientes del mismo mundo compilado avanzan a la vez con un solo
+step(actions). Todo el estado vive en arrays de NumPy (habitación, llaves,
+tesoros, lo que queda en cada mueble, pistas y tiempo), así que un paso de
+decenas de miles de partidas son unas pocas operaciones sobre arrays.
+
+Acciones: la acción a examina el objeto a de la habitación actual, en el
+orden de world.room_items (muebles y puertas); a == hint_action gasta una
+pista. Examinar una puerta con su llave cruza a la habitación siguiente (en
+el motor serían 'examine puerta' y 'si'). Cada paso consume
+seconds_per_step segundos del tiempo límite.
+
+Las recompensas salen de las reglas de calculate_score: la recompensa de un
+paso es lo que cambia la puntuación (puntos por tiempo restante, valor de los
+tesoros, 1000 por logro, por el multiplicador de la dificultad), así que la
+suma de una partida es su puntuación final menos la inicial. Los logros son
+los tres del motor, con los umbrales y el multiplicador de GameState.rules.
+
+Necesita NumPy (pip install numpy); el resto del juego no lo usa.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from estado import GameState
+from mundo import World
+
+# Tipo de cada hueco de la tabla de habitaciones
+_EMPTY = 0
+_FURNITURE = 1
+_DOOR = 2
+
+Observation = Dict[str, np.ndarray]
+
+
+class BatchEnv:
+    """N partidas del mismo mundo en paralelo sobre arrays de NumPy.
+
+    initial es el estado inicial como INIT_GAME_STATE (habitación, pistas,
+    tiempo límite, dificultad y lo ya recogido). Con autoreset, las partidas
+    que terminan empiezan de nuevo en el paso siguiente.
+    """
+
+    def __init__(self, world: World, initial: Dict[str, Any], seconds_per_step: float = 10.0,
+                 autoreset: bool = False):
+        self.world = world
+        self.seconds_per_step = seconds_per_step
+        self.autoreset = autoreset
+        start = GameState.from_dict(world, initial)
+        self.start_room = start.room
+        self.target_room = start.target_room
+        self.hint_limit = start.hints_remaining
+        self.time_limit = start.time_limit
+        self.rules = start.rules
+        self._compile(start)
+        self.n = 0
+
+    def _compile(self, start: GameState) -> None:
+        """Tablas del mundo: índices locales de llaves, tesoros y muebles, y huecos de cada habitación"""
+        world = self.world
+        types = world.types
+        rooms = sorted(world.room_items)
+        self.room_index = {room_id: i for i, room_id in enumerate(rooms)}
+        self.room_ids = np.array(rooms, dtype=np.int64)
+        keys = [i for i in range(len(types)) if types[i] == "key"]
+        treasures = [i for i in range(len(types)) if types[i] == "treasure"]
+        key_index = {obj_id: i for i, obj_id in enumerate(keys)}
+        treasure_index = {obj_id: i for i, obj_id in enumerate(treasures)}
+        self.key_ids = np.array(keys, dtype=np.int64)
+        self.treasure_ids = np.array(treasures, dtype=np.int64)
+
+        # Contenido de cada mueble sin lo ya recogido al empezar: lo siguiente que sale es el último
+        furniture = [obj_id for items in (world.room_items[room] for room in rooms)
+                     for obj_id in items.values() if types[obj_id] != "door"]
+        furniture_index = {obj_id: i for i, obj_id in enumerate(furniture)}
+        stacks = [[obj_id for obj_id in world.contents.get(f, ()) if not start.removed >> obj_id & 1]
+                  for f in furniture]
+        depth = max((len(stack) for stack in stacks), default=0)
+        # Lo que sale: +1 + índice de llave, -1 - índice de tesoro, 0 nada
+        self.stack_items = np.zeros((len(furniture), max(depth, 1)), dtype=np.int32)
+        for f, stack in enumerate(stacks):
+            for position, obj_id in enumerate(stack):
+                if types[obj_id] == "key":
+                    self.stack_items[f, position] = 1 + key_index[obj_id]
+                elif types[obj_id] == "treasure":
+                    self.stack_items[f, position] = -1 - treasure_index[obj_id]
+        self.stack_sizes = np.array([len(stack) for stack in stacks], dtype=np.int16)
+        self.treasure_values = np.array([world.objects[t].get("value", 0) for t in treasures], dtype=np.int64)
+
+        # Huecos de cada habitación: tipo, mueble, llave que pide la puerta y habitación a la que lleva
+        slots = max((len(world.room_items[room]) for room in rooms), default=0)
+        shape = (len(rooms), max(slots, 1))
+        self.slot_kind = np.zeros(shape, dtype=np.int8)
+        self.slot_furniture = np.zeros(shape, dtype=np.int32)
+        self.slot_key = np.full(shape, -1, dtype=np.int32)
+        self.slot_next = np.zeros(shape, dtype=np.int32)
+        for r, room_id in enumerate(rooms):
+            for s, obj_id in enumerate(world.room_items[room_id].values()):
+                if types[obj_id] == "door":
+                    next_room = world.next_room(room_id, obj_id)
+                    key_id = world.door_key.get(obj_id)
+                    if next_room is None or next_room not in self.room_index:
+                        continue
+                    self.slot_kind[r, s] = _DOOR
+                    self.slot_next[r, s] = self.room_index[next_room]
+                    # Una puerta sin llave no se abre nunca
+                    self.slot_key[r, s] = key_index.get(key_id, -1) if key_id is not None else -1
+                else:
+                    self.slot_kind[r, s] = _FURNITURE
+                    self.slot_furniture[r, s] = furniture_index[obj_id]
+        self.hint_action = shape[1]
+        self.num_actions = shape[1] + 1
+
+        self.start_keys = np.array([start.has(k) for k in keys], dtype=bool)
+        self.start_treasures = np.array([start.has(t) for t in treasures], dtype=bool)
+        self.start_value = start.treasure_value
+        self.start_examined = start.examined_count
+        # Muebles ya examinados al empezar: volver a examinarlos no cuenta otra vez
+        self.start_examined_furniture = np.array([bool(start.examined >> f & 1) for f in furniture], dtype=bool)
+        bits = world.achievement_bits
+        self.start_unlocked = np.array([start.is_unlocked(key) for key in bits], dtype=bool)
+        self.achievement_columns = {key: column for column, key in enumerate(bits)}
+
+    def reset(self, n: int) -> Observation:
+        """Empezar n partidas nuevas (descarta las anteriores)"""
+        self.n = n
+        self.room = np.full(n, self.room_index[self.start_room], dtype=np.int32)
+        self.keys = np.tile(self.start_keys, (n, 1))
+        self.treasures = np.tile(self.start_treasures, (n, 1))
+        self.remaining = np.tile(self.stack_sizes, (n, 1))
+        self.examined = np.tile(self.start_examined_furniture, (n, 1))
+        self.examined_count = np.full(n, self.start_examined, dtype=np.int32)
+        self.treasure_value = np.full(n, self.start_value, dtype=np.int64)
+        self.unlocked = np.tile(self.start_unlocked, (n, 1))
+        self.hints = np.full(n, self.hint_limit, dtype=np.int32)
+        self.steps = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        self.escaped = np.zeros(n, dtype=bool)
+        self.score = self._score(np.arange(n))
+        return self.observation()
+
+    def observation(self) -> Observation:
+        """Estado de las n partidas. Son los arrays internos: no hay que modificarlos"""
+        return {
+            "room": self.room,
+            "keys": self.keys,
+            "treasures": self.treasures,
+            "remaining": self.remaining,
+            "hints": self.hints,
+            "elapsed": self.steps * self.seconds_per_step,
+            "done": self.done,
+        }
+
+    def step(self, actions: np.ndarray) -> Tuple[Observation, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Aplicar una acción a cada partida: (observación, recompensa, terminada, info).
+
+        info["escaped"] dice qué partidas terminaron escapando en este paso e
+        info["score"] su puntuación final (la de todas, terminen o no).
+        """
+        actions = np.asarray(actions)
+        if self.autoreset and self.done.any():
+            self._restart(np.flatnonzero(self.done))
+        active = np.flatnonzero(~self.done)
+        action = actions[active]
+        room = self.room[active]
+        self.steps[active] += 1
+
+        hint = active[(action == self.hint_action) & (self.hints[active] > 0)]
+        self.hints[hint] -= 1
+
+        slot = np.where((action >= 0) & (action < self.hint_action), action, 0)
+        kind = np.where((action >= 0) & (action < self.hint_action), self.slot_kind[room, slot], _EMPTY)
+
+        # Muebles: se examinan y sale lo siguiente que guardan
+        pick = kind == _FURNITURE
+        games = active[pick]
+        furniture = self.slot_furniture[room[pick], slot[pick]]
+        newly = ~self.examined[games, furniture]
+        self.examined[games, furniture] = True
+        self.examined_count[games] += newly
+        left = self.remaining[games, furniture]
+        found = left > 0
+        games, furniture, left = games[found], furniture[found], left[found]
+        self.remaining[games, furniture] = left - 1
+        item = self.stack_items[furniture, left - 1]
+        # 0 es un objeto que no es llave ni tesoro: sale del mueble pero no cuenta
+        is_key = item > 0
+        self.keys[games[is_key], item[is_key] - 1] = True
+        is_treasure = item < 0
+        treasure = -1 - item[is_treasure]
+        treasure_games = games[is_treasure]
+        self.treasures[treasure_games, treasure] = True
+        np.add.at(self.treasure_value, treasure_games, self.treasure_values[treasure])
+
+        # Puertas: con la llave se cruza
+        door = kind == _DOOR
+        games = active[door]
+        key = self.slot_key[room[door], slot[door]]
+        opens = (key >= 0) & self.keys[games, np.maximum(key, 0)]
+        self.room[games[opens]] = self.slot_next[room[door][opens], slot[door][opens]]
+
+        # Logros y final de la partida, en el orden del motor: escapar antes que el tiempo
+        elapsed = self.steps[active] * self.seconds_per_step
+        escaped = self.room[active] == self.room_index[self.target_room]
+        rules = self.rules
+        self._unlock("treasure_hunter", active, self.treasures[active].sum(axis=1) >= rules.hunter_treasures)
+        self._unlock("master_explorer", active, self.examined_count[active] >= rules.explorer_examined)
+        self._unlock("speed_runner", active, escaped & (elapsed < rules.speed_run_seconds))
+        finished = escaped | (elapsed > self.time_limit)
+        self.escaped[active] = escaped
+        self.done[active] = finished
+
+        reward = np.zeros(self.n, dtype=np.int64)
+        score = self._score(active)
+        reward[active] = score - self.score[active]
+        self.score[active] = score
+        escaped_now = np.zeros(self.n, dtype=bool)
+        escaped_now[active] = escaped
+        return self.observation(), reward, self.done.copy(), {"escaped": escaped_now, "score": self.score.copy()}
+
+    def _unlock(self, achievement: str, games: np.ndarray, condition: np.ndarray) -> None:
+        column = self.achievement_columns.get(achievement)
+        if column is not None:
+            self.unlocked[games[condition], column] = True
+
+    def _score(self, games: np.ndarray) -> np.ndarray:
+        """calculate_score de las partidas games"""
+        elapsed = self.steps[games] * self.seconds_per_step
+        remaining = np.maximum(0, self.time_limit - elapsed)
+        score = (remaining / 60 * 100).astype(np.int64)
+        score += self.treasure_value[games] + 1000 * self.unlocked[games].sum(axis=1)
+        return (score * self.rules.score_multiplier).astype(np.int64)
+
+    def _restart(self, games: np.ndarray) -> None:
+        self.room[games] = self.room_index[self.start_room]
+        self.keys[games] = self.start_keys
+        self.treasures[games] = self.start_treasures
+        self.remaining[games] = self.stack_sizes
+        self.examined[games] = self.start_examined_furniture
+        self.examined_count[games] = self.start_examined
+        self.treasure_value[games] = self.start_value
+        self.unlocked[games] = self.start_unlocked
+        self.hints[games] = self.hint_limit
+        self.steps[games] = 0
+        self.done[games] = False
+        self.escaped[games] = False
+        self.score[games] = self._score(games)
+
+    def action_names(self, room: int) -> Tuple[str, ...]:
+        """Nombre del objeto de cada acción en la habitación room (índice de room_ids)"""
+        return tuple(self.world.room_items[int(self.room_ids[room])])
@@ -0,0 +1,412 @@
+"""
+Equilibrio
+----------
+Partidas de Monte Carlo para ajustar GAME_CONFIG (hint_limit, time_limit,
+dificultad, score_multiplier) y los umbrales de los logros: millones de
+partidas de agentes (aleatorio y heurístico) repartidas en un pool de
+procesos, reducidas a distribuciones de puntuación, tiempo hasta escapar,
+pistas usadas y porcentaje de cada logro.
+
+Cada proceso carga el mundo una vez (cargador.load_world) y juega lotes de
+partidas sobre la máquina de estados del motor V2 sin E/S, con un reloj
+simulado: cada comando consume unos segundos de "pensar" al azar, así que el
+tiempo límite y speed_runner funcionan como en una partida real. De cada
+partida solo vuelve al proceso principal una tupla de números (RunResult),
+nunca el GameState, y los resultados se van acumulando en histogramas a
+medida que llegan los lotes. La partida i usa la semilla seed + i: con los
+mismos argumentos las distribuciones salen idénticas.
+
+    python equilibrio.py mundos/mansion.json --runs 100000 --set time_limit=1200
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import funcionesfinal_v2 as game_engine
+from cargador import load_world
+from estado import GameState
+from mundo import World
+from simulacion import HeadlessIO
+
+OUTCOMES = ("escaped", "timeout", "quit", "incomplete")
+
+# Lo que se puede cambiar con --set: nombre en GAME_CONFIG -> clave del estado inicial
+# que lee GameState.from_dict (las claves del estado también valen con su nombre)
+SETTINGS = {
+    "hint_limit": "hints_remaining",
+    "time_limit": "time_limit",
+    "difficulty": "difficulty",
+    "sound_enabled": "sound_enabled",
+    # Un número o {dificultad: factor}, como en la configuración del mundo
+    "score_multiplier": "score_multiplier",
+    # Umbrales de los logros (estado.Rules)
+    "speed_run_seconds": "speed_run_seconds",
+    "hunter_treasures": "hunter_treasures",
+    "explorer_examined": "explorer_examined",
+}
+
+# Agente: agent(sesión, estado de la máquina que espera la línea) -> línea
+Agent = Callable[[game_engine.GameSession, str], str]
+
+AGENTS: Dict[str, Callable[[random.Random], Agent]] = {}
+
+
+def agent(name: str):
+    """Decorador que registra una clase de agente; se crea uno nuevo por partida con su rng"""
+    def decorator(cls):
+        AGENTS[name] = cls
+        return cls
+    return decorator
+
+
+@agent("random")
+class RandomAgent:
+    """Examina objetos de la habitación al azar y a veces pide una pista"""
+
+    def __init__(self, rng: random.Random, hint_rate: float = 0.03, enter_rate: float = 0.7):
+        self.rng = rng
+        self.hint_rate = hint_rate
+        self.enter_rate = enter_rate
+
+    def __call__(self, session: game_engine.GameSession, waiting: str) -> str:
+        rng = self.rng
+        if waiting == "confirm_door":
+            return "si" if rng.random() < self.enter_rate else "no"
+        if waiting == "confirm_quit":
+            return "no"
+        if rng.random() < self.hint_rate:
+            return "hint"
+        items = list(session.world.room_items[session.game_state.room])
+        return f"examine {rng.choice(items)}" if items else "hint"
+
+
+@agent("heuristic")
+class HeuristicAgent:
+    """Vacía los muebles de cada habitación y va a la más cercana donde quede algo por hacer.
+
+    Sale en cuanto puede llegar a la salida. Cuando ya no queda nada por hacer
+    a su alcance (o con probabilidad hint_rate al quedarse sin nada en una
+    habitación) pide una pista y va a la habitación que le indica.
+    """
+
+    def __init__(self, rng: random.Random, hint_rate: float = 0.2):
+        self.rng = rng
+        self.hint_rate = hint_rate
+        self.emptied: Set[int] = set()  # muebles en los que ya no encontró nada
+        self.visited: Set[int] = set()
+        self.goal: Optional[int] = None  # habitación que indicó la última pista
+        self.last: Optional[Tuple[int, int]] = None  # (mueble examinado, lo recogido antes)
+
+    def __call__(self, session: game_engine.GameSession, waiting: str) -> str:
+        if waiting != "command":
+            return "si" if waiting == "confirm_door" else "no"
+        state = session.game_state
+        world = session.world
+        taken = state.removed
+        if self.last is not None and self.last[1] == taken:
+            self.emptied.add(self.last[0])
+        self.last = None
+        self.visited.add(state.room)
+        if self.goal == state.room:
+            self.goal = None
+
+        items = world.room_items[state.room]
+        for name, item_id in items.items():
+            if world.types[item_id] == "furniture" and item_id not in self.emptied:
+                self.last = (item_id, taken)
+                return f"examine {name}"
+
+        path = self._path(state, world)
+        if path is None or (self.goal is None and state.hints_remaining > 0
+                            and self.rng.random() < self.hint_rate):
+            if state.hints_remaining > 0:
+                tracker = session.hints
+                plan = tracker.plan
+                if plan is not None:
+                    self.goal = plan.rooms[tracker.position] if tracker.position < len(plan.items) else state.target_room
+                return "hint"
+        if path is None:
+            # Nada más que hacer: examinar algo al azar hasta que se acabe el tiempo
+            return f"examine {self.rng.choice(list(items))}"
+        return f"examine {world.names[path]}"
+
+    def _path(self, state: GameState, world: World) -> Optional[int]:
+        """Primera puerta del camino más corto (con las llaves que tiene) a lo siguiente que hacer"""
+        start = state.room
+        first: Dict[int, int] = {start: -1}  # habitación -> primera puerta del camino
+        queue: Deque[int] = deque([start])
+        best: Optional[int] = None
+        while queue:
+            room = queue.popleft()
+            if room == state.target_room or room == self.goal:
+                return first[room]
+            # Lo más cercano por hacer, salvo que la salida o la pista queden a tiro
+            if best is None and room != start and (room not in self.visited or self._pending(world, room)):
+                best = first[room]
+            for door_id, next_room in world.door_next.get(room, {}).items():
+                if next_room not in first and state.can_open(door_id):
+                    first[next_room] = door_id if room == start else first[room]
+                    queue.append(next_room)
+        return best
+
+    def _pending(self, world: World, room: int) -> bool:
+        return any(world.types[item_id] == "furniture" and item_id not in self.emptied
+                   for item_id in world.room_items[room].values())
+
+
+class RunResult(NamedTuple):
+    """Resumen numérico de una partida: es lo único que cruza entre procesos"""
+    agent: str
+    outcome: str
+    score: int
+    elapsed: float  # segundos simulados
+    commands: int
+    hints_used: int
+    treasures: int
+    examined: int
+    unlocked: int  # bits de world.achievement_bits
+
+
+def play(world: World, initial: Dict[str, Any], agent_name: str, seed: int,
+         think: Tuple[float, float] = (3.0, 20.0), max_commands: int = 5_000) -> RunResult:
+    """Jugar una partida con un agente y un reloj simulado; think = segundos por comando (mín, máx)"""
+    rng = random.Random(seed)
+    state = GameState.from_dict(world, initial)
+    state.start_time = 0.0
+    hints_start = state.hints_remaining
+    player = AGENTS[agent_name](rng)
+    with game_engine.use_io(HeadlessIO(iter(()), capture=False)):
+        run = game_engine.start_session(state, world, seed=seed, now=0.0)
+        now = 0.0
+        commands = 0
+        while not run.done and commands < max_commands:
+            line = player(run.context, run.state)
+            now += rng.uniform(*think)
+            commands += 1
+            game_engine.feed_line(run, line if now <= state.time_limit else None, now)
+        outcome = run.state if run.done else "incomplete"
+        score = game_engine.calculate_score(state)
+    return RunResult(agent_name, outcome, score, state.now, commands, hints_start - state.hints_remaining,
+                     state.treasure_count, state.examined_count, state.unlocked)
+
+
+# Mundo de cada proceso del pool, cargado una vez en _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def state_overrides(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Pasar los nombres de GAME_CONFIG (hint_limit...) a claves del estado inicial"""
+    fields = set(SETTINGS.values())
+    state = {}
+    for key, value in overrides.items():
+        if key in SETTINGS:
+            state[SETTINGS[key]] = value
+        elif key in fields:
+            state[key] = value
+        else:
+            valid = ", ".join(sorted(set(SETTINGS) | fields))
+            raise ValueError(f"No se puede cambiar '{key}': usa una de {valid}")
+    return state
+
+
+def _init_worker(path: str, overrides: Dict[str, Any], think: Tuple[float, float]) -> None:
+    loaded = load_world(path)
+    initial = loaded.initial_state()
+    initial.update(overrides)
+    _worker.update(world=loaded.world, initial=initial, think=think)
+
+
+def _play_batch(agent_name: str, first_seed: int, count: int) -> List[RunResult]:
+    world, initial, think = _worker["world"], _worker["initial"], _worker["think"]
+    return [play(world, initial, agent_name, seed, think) for seed in range(first_seed, first_seed + count)]
+
+
+def iter_results(path: str, runs: int, agents: Iterable[str] = ("random", "heuristic"),
+                 overrides: Optional[Dict[str, Any]] = None, seed: int = 0, workers: Optional[int] = None,
+                 batch_size: int = 500, think: Tuple[float, float] = (3.0, 20.0)) -> Iterator[RunResult]:
+    """Resultados de runs partidas por agente a medida que los procesos terminan cada lote.
+
+    Solo hay unos pocos lotes por proceso pendientes a la vez, así que la memoria no
+    depende de runs. overrides cambia la configuración de la partida (hint_limit,
+    time_limit, difficulty, score_multiplier, los umbrales de los logros...; ver SETTINGS).
+    """
+    agents = list(agents)
+    for name in agents:
+        if name not in AGENTS:
+            raise ValueError(f"Agente desconocido: '{name}'")
+    overrides = state_overrides(overrides or {})
+    workers = workers or os.cpu_count() or 1
+    batches = ((name, seed + start, min(batch_size, runs - start))
+               for name in agents for start in range(0, runs, batch_size))
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(path, overrides, think)) as pool:
+        pending: Set[Future] = set()
+        for batch in batches:
+            pending.add(pool.submit(_play_batch, *batch))
+            if len(pending) >= 4 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+@dataclass
+class Histogram:
+    """Distribución de un valor en casillas de ancho width, acumulable sin guardar los valores"""
+    width: float
+    counts: Counter = field(default_factory=Counter)
+    n: int = 0
+    total: float = 0.0
+    low: float = math.inf
+    high: float = -math.inf
+
+    def add(self, value: float) -> None:
+        self.counts[math.floor(value / self.width)] += 1
+        self.n += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else math.nan
+
+    def percentile(self, p: float) -> float:
+        """Percentil p (0-100), con la precisión de una casilla"""
+        if not self.n:
+            return math.nan
+        rank = p / 100 * self.n
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.high, max(self.low, (bucket + 1) * self.width))
+        return self.high
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean, "min": self.low, "max": self.high,
+                "p10": self.percentile(10), "p50": self.percentile(50), "p90": self.percentile(90),
+                "width": self.width, "counts": {str(bucket * self.width): count
+                                                 for bucket, count in sorted(self.counts.items())}}
+
+
+@dataclass
+class Summary:
+    """Distribuciones de las partidas de un agente"""
+    achievement_bits: Dict[str, int] = field(default_factory=dict)  # logros del mundo -> bit
+    runs: int = 0
+    outcomes: Counter = field(default_factory=Counter)
+    score: Histogram = field(default_factory=lambda: Histogram(100))
+    escape_time: Histogram = field(default_factory=lambda: Histogram(30))  # solo las que escapan
+    hints_used: Histogram = field(default_factory=lambda: Histogram(1))
+    commands: Histogram = field(default_factory=lambda: Histogram(10))
+    treasures: Histogram = field(default_factory=lambda: Histogram(1))
+    examined: Histogram = field(default_factory=lambda: Histogram(1))
+    unlocked: Counter = field(default_factory=Counter)  # logro -> partidas que lo desbloquean
+
+    def add(self, result: RunResult) -> None:
+        self.runs += 1
+        self.outcomes[result.outcome] += 1
+        self.score.add(result.score)
+        if result.outcome == "escaped":
+            self.escape_time.add(result.elapsed)
+        self.hints_used.add(result.hints_used)
+        self.commands.add(result.commands)
+        self.treasures.add(result.treasures)
+        self.examined.add(result.examined)
+        for key, bit in self.achievement_bits.items():
+            if result.unlocked >> bit & 1:
+                self.unlocked[key] += 1
+
+    def rates(self) -> Dict[str, float]:
+        """Porcentaje de partidas que desbloquean cada logro del mundo (0 si ninguna)"""
+        if not self.runs:
+            return {}
+        return {key: 100 * self.unlocked[key] / self.runs for key in self.achievement_bits}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "outcomes": {outcome: self.outcomes[outcome] for outcome in OUTCOMES},
+            "score": self.score.to_dict(),
+            "escape_time": self.escape_time.to_dict(),
+            "hints_used": self.hints_used.to_dict(),
+            "commands": self.commands.to_dict(),
+            "treasures": self.treasures.to_dict(),
+            "examined": self.examined.to_dict(),
+            "achievement_rates": self.rates(),
+        }
+
+
+def balance(path: str, runs: int, agents: Iterable[str] = ("random", "heuristic"),
+            overrides: Optional[Dict[str, Any]] = None, seed: int = 0, workers: Optional[int] = None,
+            batch_size: int = 500, think: Tuple[float, float] = (3.0, 20.0),
+            progress: Optional[Callable[[int], None]] = None) -> Dict[str, Summary]:
+    """Jugar runs partidas por agente y reducirlas a un Summary por agente"""
+    achievement_bits = dict(load_world(path).world.achievement_bits)
+    summaries: Dict[str, Summary] = {}
+    for done, result in enumerate(iter_results(path, runs, agents, overrides, seed, workers, batch_size, think), 1):
+        summary = summaries.get(result.agent)
+        if summary is None:
+            summary = summaries[result.agent] = Summary(achievement_bits)
+        summary.add(result)
+        if progress is not None and done % batch_size == 0:
+            progress(done)
+    return summaries
+
+
+def _parse_override(text: str) -> Tuple[str, Any]:
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Partidas de Monte Carlo para equilibrar el juego")
+    parser.add_argument("world", help="archivo del mundo (.json o .toml)")
+    parser.add_argument("--runs", type=int, default=10_000, help="partidas por agente")
+    parser.add_argument("--agents", nargs="+", default=["random", "heuristic"], choices=sorted(AGENTS))
+    parser.add_argument("--set", dest="overrides", action="append", default=[], type=_parse_override,
+                        metavar="CLAVE=VALOR",
+                        help=f"cambiar la configuración ({', '.join(SETTINGS)}), p. ej. hint_limit=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--think", type=float, nargs=2, default=(3.0, 20.0), metavar=("MIN", "MAX"),
+                        help="segundos simulados por comando")
+    parser.add_argument("--output", help="guardar las distribuciones en JSON")
+    args = parser.parse_args(argv)
+    try:
+        state_overrides(dict(args.overrides))
+    except ValueError as error:
+        parser.error(str(error))
+
+    summaries = balance(args.world, args.runs, args.agents, dict(args.overrides), args.seed, args.workers,
+                        args.batch_size, tuple(args.think))
+    for name, summary in summaries.items():
+        escaped = 100 * summary.outcomes["escaped"] / summary.runs
+        print(f"\n{name}: {summary.runs} partidas, escapan el {escaped:.1f}%")
+        print(f"  puntuación  media {summary.score.mean:8.0f}  p10 {summary.score.percentile(10):6.0f}"
+              f"  p50 {summary.score.percentile(50):6.0f}  p90 {summary.score.percentile(90):6.0f}")
+        print(f"  escape (s)  media {summary.escape_time.mean:8.0f}  p10 {summary.escape_time.percentile(10):6.0f}"
+              f"  p50 {summary.escape_time.percentile(50):6.0f}  p90 {summary.escape_time.percentile(90):6.0f}")
+        print(f"  pistas      media {summary.hints_used.mean:8.2f}")
+        for key, rate in sorted(summary.rates().items()):
+            print(f"  logro {key}: {rate:.1f}%")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({name: summary.to_dict() for name, summary in summaries.items()}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Estado de partida compacto
+--------------------------
+Estado con __slots__ que guarda llaves, tesoros y objetos examinados como
+conjuntos de bits sobre los ids del mundo compilado.
+
+El estado es la capa de cambios de una sesión sobre el mundo compartido: los
+objetos sacados de los muebles (removed: todos, sean o no llaves o tesoros),
+las puertas abiertas y los logros desbloqueados. Empezar otra partida solo crea un GameState nuevo.
+"""
+
+import time
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+from mundo import World
+
+
+def popcount(bits: int) -> int:
+    """Número de bits activos"""
+    return bits.bit_count()
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Recorrer los ids activos de un conjunto de bits, de menor a mayor"""
+    if bits >> 64:
+        # Cada operación sobre un entero enorme copia el entero entero: se recorre
+        # por palabras de 64 bits para que el coste sea lineal y no cuadrático
+        data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        for offset in range(0, len(data), 8):
+            word = int.from_bytes(data[offset:offset + 8], "little")
+            while word:
+                low = word & -word
+                yield offset * 8 + low.bit_length() - 1
+                word ^= low
+        return
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# Multiplicador de la puntuación por dificultad (como GAME_CONFIG["score_multiplier"])
+SCORE_MULTIPLIERS = {"easy": 0.5, "normal": 1.0, "hard": 2.0}
+
+
+class Rules(NamedTuple):
+    """Lo ajustable de la puntuación y de los logros de una partida"""
+    score_multiplier: float = 1.0
+    speed_run_seconds: float = 900  # escapar en menos de 15 minutos
+    hunter_treasures: int = 3  # todos los tesoros
+    explorer_examined: int = 15  # número arbitrario de objetos
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], difficulty: str = "normal") -> "Rules":
+        """Reglas de un diccionario como INIT_GAME_STATE; score_multiplier es un número o uno por dificultad"""
+        multiplier = config.get("score_multiplier", SCORE_MULTIPLIERS)
+        if isinstance(multiplier, Mapping):
+            multiplier = multiplier.get(difficulty, 1.0)
+        thresholds = {name: config[name] for name in cls._fields[1:] if name in config}
+        return cls(multiplier, **thresholds)
+
+
+class GameState:
+    """Estado de una partida sobre un mundo compilado"""
+    __slots__ = (
+        "world", "room", "target_room", "keys", "treasures", "removed", "examined",
+        "opened", "unlocked", "treasure_value", "hints_remaining",
+        "start_time", "time_limit", "difficulty", "sound_enabled", "rules", "now",
+    )
+
+    def __init__(self, world: World, room: int, target_room: int, hints_remaining: int = 3,
+                 time_limit: float = 1800, difficulty: str = "normal",
+                 start_time: Optional[float] = None, sound_enabled: bool = True,
+                 rules: Optional[Rules] = None):
+        self.world = world
+        self.room = room
+        self.target_room = target_room
+        self.keys = 0
+        self.treasures = 0
+        self.removed = 0  # todo lo sacado de los muebles: llaves, tesoros y cualquier otro objeto
+        self.examined = 0
+        self.opened = 0  # puertas abiertas
+        self.unlocked = 0  # logros desbloqueados, por posición en world.achievement_bits
+        self.treasure_value = 0
+        self.hints_remaining = hints_remaining
+        self.start_time = time.time() if start_time is None else start_time
+        # Hora del turno en curso: la fija quien alimenta la partida, así se puede reproducir
+        self.now = self.start_time
+        self.time_limit = time_limit
+        self.difficulty = difficulty
+        self.sound_enabled = sound_enabled
+        self.rules = Rules.from_config({}, difficulty) if rules is None else rules
+
+    def copy(self) -> "GameState":
+        """Copia independiente; el mundo se comparte y el resto son enteros inmutables"""
+        clone = GameState.__new__(GameState)
+        for slot in GameState.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        return clone
+
+    @classmethod
+    def from_dict(cls, world: World, game_state: Dict[str, Any]) -> "GameState":
+        """Crear el estado a partir de un diccionario como INIT_GAME_STATE del notebook"""
+        state = cls(
+            world,
+            room=world.id_of(game_state["current_room"]),
+            target_room=world.id_of(game_state["target_room"]),
+            hints_remaining=game_state.get("hints_remaining", 3),
+            time_limit=game_state.get("time_limit", 1800),
+            difficulty=game_state.get("difficulty", "normal"),
+            start_time=game_state.get("start_time"),
+            sound_enabled=game_state.get("sound_enabled", True),
+            rules=Rules.from_config(game_state, game_state.get("difficulty", "normal")),
+        )
+        for obj in game_state.get("keys_collected", []) + game_state.get("treasure_collected", []):
+            state.collect(world.id_of(obj))
+        for name in game_state.get("removed_objects", ()):
+            state.collect(world.ids[name])
+        for name in game_state.get("examined_objects", ()):
+            state.examine(world.ids[name])
+        for key, achievement in game_state.get("achievements", {}).items():
+            if achievement.get("unlocked"):
+                state.unlock(key)
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación por nombres, apta para guardar en JSON"""
+        names = self.world.names
+        return {
+            "current_room": names[self.room],
+            "target_room": names[self.target_room],
+            "keys_collected": [names[i] for i in iter_bits(self.keys)],
+            "treasure_collected": [names[i] for i in iter_bits(self.treasures)],
+            # Lo sacado de los muebles que no es llave ni tesoro
+            "removed_objects": [names[i] for i in iter_bits(self.removed & ~(self.keys | self.treasures))],
+            "examined_objects": [names[i] for i in iter_bits(self.examined)],
+            "hints_remaining": self.hints_remaining,
+            "start_time": self.start_time,
+            "time_limit": self.time_limit,
+            "difficulty": self.difficulty,
+            "achievements": {key: self.is_unlocked(key) for key in self.world.achievements},
+        }
+
+    def update_from_dict(self, data: Dict[str, Any]) -> None:
+        """Restaurar el progreso desde to_dict()"""
+        ids = self.world.ids
+        self.room = ids[data["current_room"]]
+        self.keys = self.treasures = self.removed = self.examined = self.unlocked = self.treasure_value = 0
+        for name in data["keys_collected"] + data["treasure_collected"] + data.get("removed_objects", []):
+            self.collect(ids[name])
+        for name in data["examined_objects"]:
+            self.examine(ids[name])
+        self.hints_remaining = data["hints_remaining"]
+        self.start_time = data["start_time"]
+        for key, unlocked in data["achievements"].items():
+            if unlocked:
+                self.unlock(key)
+
+    @property
+    def current_room(self) -> Dict[str, Any]:
+        return self.world.objects[self.room]
+
+    def collect(self, obj_id: int) -> None:
+        """Sacar un objeto de su mueble; las llaves y los tesoros van al inventario"""
+        self.removed |= 1 << obj_id
+        kind = self.world.types[obj_id]
+        if kind == "key":
+            self.keys |= 1 << obj_id
+        elif kind == "treasure" and not self.treasures >> obj_id & 1:
+            self.treasures |= 1 << obj_id
+            self.treasure_value += self.world.objects[obj_id].get("value", 0)
+
+    def examine(self, obj_id: int) -> None:
+        self.examined |= 1 << obj_id
+
+    def has(self, obj_id: int) -> bool:
+        """Comprobar en O(1) si una llave o un tesoro está en el inventario"""
+        return bool((self.keys | self.treasures) >> obj_id & 1)
+
+    def next_content(self, container_id: int) -> Optional[int]:
+        """Siguiente objeto que queda dentro de un mueble (el último de la lista primero)"""
+        removed = self.removed
+        for obj_id in reversed(self.world.contents.get(container_id, ())):
+            if not removed >> obj_id & 1:
+                return obj_id
+        return None
+
+    def can_open(self, door_id: int) -> bool:
+        """Comprobar en O(1) si se tiene la llave de una puerta"""
+        key_id = self.world.door_key.get(door_id)
+        return key_id is not None and bool(self.keys >> key_id & 1)
+
+    def open_door(self, door_id: int) -> None:
+        self.opened |= 1 << door_id
+
+    def is_unlocked(self, achievement: str) -> bool:
+        """Los logros que el mundo no define cuentan como ya resueltos"""
+        bit = self.world.achievement_bits.get(achievement)
+        return bit is None or bool(self.unlocked >> bit & 1)
+
+    def unlock(self, achievement: str) -> None:
+        bit = self.world.achievement_bits.get(achievement)
+        if bit is not None:
+            self.unlocked |= 1 << bit
+
+    @property
+    def achievement_count(self) -> int:
+        return popcount(self.unlocked)
+
+    @property
+    def key_count(self) -> int:
+        return popcount(self.keys)
+
+    @property
+    def treasure_count(self) -> int:
+        return popcount(self.treasures)
+
+    @property
+    def examined_count(self) -> int:
+        return popcount(self.examined)
+
+    def inventory(self) -> List[int]:
+        """Ids de los objetos del inventario (llaves y tesoros)"""
+        return list(iter_bits(self.keys | self.treasures))
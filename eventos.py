@@ -0,0 +1,88 @@
+"""
+Eventos de partida
+------------------
+Bus de publicación/suscripción para lo que pasa en una partida: llave o
+tesoro encontrado, objeto examinado, habitación nueva y huida.
+
+Los logros son reglas declarativas (logro, evento, condición) que se
+agrupan por evento: publicar un evento solo mira las reglas de ese evento
+cuyo logro aún no se ha desbloqueado, y cada condición lee contadores que el
+GameState ya lleva al día. Añadir un logro es registrar una regla más, sin
+tocar el código de los comandos.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from estado import GameState
+
+KEY_FOUND = "key_found"
+TREASURE_FOUND = "treasure_found"
+OBJECT_EXAMINED = "object_examined"
+ROOM_ENTERED = "room_entered"
+ESCAPED = "escaped"
+
+EVENTS = (KEY_FOUND, TREASURE_FOUND, OBJECT_EXAMINED, ROOM_ENTERED, ESCAPED)
+
+# Suscriptor: (estado, id del objeto o la habitación del evento)
+Subscriber = Callable[[GameState, int], None]
+Condition = Callable[[GameState, int], bool]
+
+
+class EventBus:
+    """Suscriptores por evento; publish() llama a los de ese evento en orden de suscripción"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Subscriber]] = {event: [] for event in EVENTS}
+
+    def subscribe(self, event: str) -> Callable[[Subscriber], Subscriber]:
+        """Decorador que suscribe subscriber(estado, id) a event"""
+        subscribers = self._subscribers[event]  # KeyError si el evento no existe
+
+        def decorator(subscriber: Subscriber) -> Subscriber:
+            subscribers.append(subscriber)
+            return subscriber
+        return decorator
+
+    def publish(self, event: str, state: GameState, obj_id: int = -1) -> None:
+        for subscriber in self._subscribers[event]:
+            subscriber(state, obj_id)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Logro que se desbloquea cuando pasa event y se cumple condition"""
+    achievement: str
+    event: str
+    condition: Condition
+
+
+class AchievementRules:
+    """Reglas de logros agrupadas por evento"""
+
+    def __init__(self):
+        self.rules: Dict[str, List[Rule]] = {event: [] for event in EVENTS}
+
+    def rule(self, achievement: str, event: str) -> Callable[[Condition], Condition]:
+        """Decorador que registra condition(estado, id) -> bool como regla de achievement"""
+        rules = self.rules[event]
+
+        def decorator(condition: Condition) -> Condition:
+            rules.append(Rule(achievement, event, condition))
+            return condition
+        return decorator
+
+    def attach(self, bus: EventBus, on_unlock: Optional[Callable[[GameState, str], None]] = None) -> None:
+        """Evaluar las reglas en cada evento del bus; on_unlock anuncia cada logro nuevo"""
+        for event, rules in self.rules.items():
+            bus.subscribe(event)(self._checker(rules, on_unlock))
+
+    @staticmethod
+    def _checker(rules: List[Rule], on_unlock: Optional[Callable[[GameState, str], None]]) -> Subscriber:
+        def check(state: GameState, obj_id: int) -> None:
+            for rule in rules:
+                if not state.is_unlocked(rule.achievement) and rule.condition(state, obj_id):
+                    state.unlock(rule.achievement)
+                    if on_unlock is not None:
+                        on_unlock(state, rule.achievement)
+        return check
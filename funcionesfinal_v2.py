@@ -7,30 +7,51 @@ Motor de juego mejorado con características modernas y visualización avanzada.
 import time
 import os
 import sys
-from typing import Dict, List, Optional, Set, Any
-import random
-from datetime import datetime
-from colorama import init, Fore, Back, Style
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Set, Any, Tuple, TypeVar, Union
+from weakref import WeakKeyDictionary
 
-# Inicializar colorama para colores en la terminal
-init(autoreset=True)
+from comandos import CommandTable, NameIndex, room_index
+from estado import GameState, iter_bits
+from diario import Journal
+from eventos import (ESCAPED, KEY_FOUND, OBJECT_EXAMINED, ROOM_ENTERED, TREASURE_FOUND,
+                     AchievementRules, EventBus)
+from guardado import AutoSaver, SaveError, SaveStore, capture, last_saved
+from maquina import MachineRun, StateMachine
+from metricas import Labels, Metrics
+from mundo import World, compile_world
+from pantalla import Frame, GridMap, Renderer, ViewportMap, renderer_for, strip_ansi
+from sonido import SoundQueue
+from temporizador import Countdown, format_remaining, read_line
+
+if TYPE_CHECKING:
+    import random
+    from clasificacion import Leaderboard
+    from pistas import HintTracker
+
+# Códigos ANSI de colorama (Fore.X y Style.X) escritos tal cual: colorama solo se
+# importa en la consola de Windows, que necesita traducirlos (ver prepare_terminal)
+_BRIGHT = "\x1b[1m"
 
 class GameColors:
     """Colores para diferentes elementos del juego"""
-    TITLE = Fore.CYAN + Style.BRIGHT
-    ROOM = Fore.GREEN + Style.BRIGHT
-    ITEM = Fore.YELLOW
-    KEY = Fore.MAGENTA + Style.BRIGHT
-    DOOR = Fore.BLUE + Style.BRIGHT
-    ERROR = Fore.RED + Style.BRIGHT
-    SUCCESS = Fore.GREEN + Style.BRIGHT
-    HINT = Fore.CYAN
-    RESET = Style.RESET_ALL
-    TREASURE = Fore.YELLOW + Style.BRIGHT
-    PROGRESS = Fore.WHITE + Style.BRIGHT
-    ACHIEVEMENT = Fore.MAGENTA
-    INVENTORY = Fore.BLUE
-    SCORE = Fore.GREEN + Style.BRIGHT
+    TITLE = "\x1b[36m" + _BRIGHT     # Fore.CYAN + Style.BRIGHT
+    ROOM = "\x1b[32m" + _BRIGHT      # Fore.GREEN + Style.BRIGHT
+    ITEM = "\x1b[33m"                # Fore.YELLOW
+    KEY = "\x1b[35m" + _BRIGHT       # Fore.MAGENTA + Style.BRIGHT
+    DOOR = "\x1b[34m" + _BRIGHT      # Fore.BLUE + Style.BRIGHT
+    ERROR = "\x1b[31m" + _BRIGHT     # Fore.RED + Style.BRIGHT
+    SUCCESS = "\x1b[32m" + _BRIGHT   # Fore.GREEN + Style.BRIGHT
+    HINT = "\x1b[36m"                # Fore.CYAN
+    RESET = "\x1b[0m"                # Style.RESET_ALL
+    TREASURE = "\x1b[33m" + _BRIGHT  # Fore.YELLOW + Style.BRIGHT
+    PROGRESS = "\x1b[37m" + _BRIGHT  # Fore.WHITE + Style.BRIGHT
+    ACHIEVEMENT = "\x1b[35m"         # Fore.MAGENTA
+    INVENTORY = "\x1b[34m"           # Fore.BLUE
+    SCORE = "\x1b[32m" + _BRIGHT     # Fore.GREEN + Style.BRIGHT
+    PLAYER = "\x1b[31m" + _BRIGHT    # Fore.RED + Style.BRIGHT
 
 class GameArt:
     """Arte ASCII para diferentes elementos del juego"""
@@ -69,211 +90,360 @@ class GameArt:
     📂 ¡Partida Cargada! 📂{GameColors.RESET}
     """
 
+class GameIO:
+    """Entrada y salida del juego en la terminal (comportamiento por defecto)"""
+    # Los canales sin pantalla pueden omitir el dibujo del mapa y los paneles
+    renders = True
+    # Se elige al dibujar el primer frame: ANSI en la terminal, texto plano si la salida se redirige
+    renderer: Optional[Renderer] = None
+    _countdown: Optional[Countdown] = None
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        if text:
+            # Como colorama con autoreset: cada escritura termina con los colores restablecidos
+            text = terminal_text(text + GameColors.RESET)
+        print(text, end=end)
+
+    def draw(self, frame: Frame) -> None:
+        """Emitir un frame completo con una sola escritura"""
+        if self.renderer is None:
+            self.renderer = renderer_for(sys.stdout)
+        self.write(self.renderer.render(frame), end="")
+
+    def read(self, prompt: str) -> str:
+        return input(terminal_text(prompt))
+
+    def read_before(self, prompt: str, deadline: float) -> Optional[str]:
+        """Leer una línea antes de deadline; None si el tiempo se agota esperando"""
+        if self._countdown is None:
+            self._countdown = Countdown(lambda remaining: f"{GameColors.PROGRESS}⏳ Tiempo restante: {format_remaining(remaining)}{GameColors.RESET}")
+        return read_line(terminal_text(prompt), deadline, self._countdown.refresh)
+
+    def clear(self) -> None:
+        os.system('cls' if os.name == 'nt' else 'clear')
+        if self._countdown is not None:
+            self._countdown.invalidate()  # la pantalla limpia ya no tiene la cuenta atrás
+
+    def bell(self, pauses: Tuple[float, ...]) -> None:
+        """Encolar la campana; la toca otro hilo, así que el turno no espera a las pausas"""
+        sounds.cue(pauses)
+
+_terminal_ready = False
+_plain_output = False
+
+def prepare_terminal() -> None:
+    """Preparar la salida estándar para los colores la primera vez que se escribe en ella.
+
+    Una terminal de Unix (o Jupyter) entiende los códigos ANSI sin ayuda y en un archivo
+    o una tubería se quitan como en los frames (renderer_for). colorama solo se importa
+    en la consola de Windows, que necesita traducirlos.
+    """
+    global _terminal_ready, _plain_output
+    _terminal_ready = True
+    _plain_output = not renderer_for(sys.stdout).ansi
+    if os.name == "nt":
+        from colorama import init
+        init()
+
+def terminal_text(text: str) -> str:
+    """Texto para la salida estándar: sin códigos ANSI si no es una terminal"""
+    if not _terminal_ready:
+        prepare_terminal()
+    return strip_ansi(text) if _plain_output else text
+
+# Efectos de sonido de la terminal: un solo hilo para todas las partidas del proceso
+sounds = SoundQueue()
+
+# Partidas guardadas, una ranura por nombre
+save_store = SaveStore("partidas")
+
+# Canal de entrada/salida activo; los motores sin interfaz lo sustituyen con use_io()
+_current_io: ContextVar[GameIO] = ContextVar("current_io", default=GameIO())
+
+def get_io() -> GameIO:
+    """Obtener el canal de entrada/salida activo"""
+    return _current_io.get()
+
+@contextmanager
+def use_io(io: GameIO) -> Iterator[GameIO]:
+    """Usar otro canal de entrada/salida dentro de un bloque with"""
+    token = _current_io.set(io)
+    try:
+        yield io
+    finally:
+        _current_io.reset(token)
+
+def write(text: str = "", end: str = "\n") -> None:
+    """Escribir texto en el canal activo"""
+    _current_io.get().write(text, end)
+
+def draw(frame: Frame) -> None:
+    """Dibujar un frame en el canal activo"""
+    _current_io.get().draw(frame)
+
+def read(prompt: str) -> str:
+    """Leer una línea del canal activo"""
+    return _current_io.get().read(prompt)
+
+# Métricas de la partida que está jugando su turno; None si no se miden
+_current_metrics: ContextVar[Optional[Metrics]] = ContextVar("current_metrics", default=None)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def measured(name: str, **labels: str) -> Callable[[F], F]:
+    """Decorador que mide cada llamada en el histograma name si el turno lleva métricas"""
+    key: Labels = tuple(labels.items())
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            metrics = _current_metrics.get()
+            if metrics is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start, key)
+        return timed  # type: ignore[return-value]
+    return decorator
+
 class GameSounds:
-    """Efectos de sonido del juego usando caracteres ASCII"""
+    """Efectos de sonido del juego usando caracteres ASCII.
+
+    No suenan si la partida tiene el sonido desactivado (GAME_CONFIG["sound_enabled"]).
+    """
+    @staticmethod
+    @measured("sound")
+    def play(game_state: GameState, pauses: Tuple[float, ...]) -> None:
+        if game_state.sound_enabled:
+            get_io().bell(pauses)
+
     @staticmethod
-    def play_key_found():
-        print('\a')  # Bell sound
-        time.sleep(0.1)
+    def play_key_found(game_state: GameState):
+        GameSounds.play(game_state, (0.1,))
     
     @staticmethod
-    def play_door_open():
-        print('\a')
-        time.sleep(0.1)
-        print('\a')
+    def play_door_open(game_state: GameState):
+        GameSounds.play(game_state, (0.1, 0))
     
     @staticmethod
-    def play_treasure_found():
-        for _ in range(3):
-            print('\a')
-            time.sleep(0.1)
+    def play_treasure_found(game_state: GameState):
+        GameSounds.play(game_state, (0.1, 0.1, 0.1))
     
     @staticmethod
-    def play_achievement():
-        for _ in range(2):
-            print('\a')
-            time.sleep(0.2)
+    def play_achievement(game_state: GameState):
+        GameSounds.play(game_state, (0.2, 0.2))
 
 def clear_screen():
     """Limpiar la pantalla de la terminal"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    get_io().clear()
 
-def get_elapsed_time(start_time: float) -> str:
+def get_elapsed_time(start_time: float, now: Optional[float] = None) -> str:
     """Obtener el tiempo transcurrido en formato legible"""
-    elapsed = int(time.time() - start_time)
+    elapsed = int((time.time() if now is None else now) - start_time)
     minutes = elapsed // 60
     seconds = elapsed % 60
     return f"{minutes:02d}:{seconds:02d}"
 
-def calculate_score(game_state: Dict[str, Any]) -> int:
+def calculate_score(game_state: GameState) -> int:
     """Calcular la puntuación actual del juego"""
     score = 0
     
     # Puntos por tiempo restante
-    time_elapsed = time.time() - game_state["start_time"]
-    time_remaining = max(0, game_state["time_limit"] - time_elapsed)
+    time_elapsed = game_state.now - game_state.start_time
+    time_remaining = max(0, game_state.time_limit - time_elapsed)
     score += int((time_remaining / 60) * 100)  # 100 puntos por minuto restante
     
     # Puntos por tesoros
-    score += sum(treasure.get("value", 0) for treasure in game_state["treasure_collected"])
+    score += game_state.treasure_value
     
     # Puntos por logros
-    score += sum(1000 for achievement in game_state["achievements"].values() if achievement["unlocked"])
+    score += 1000 * game_state.achievement_count
     
     # Multiplicador por dificultad
-    multiplier = {
-        "easy": 0.5,
-        "normal": 1.0,
-        "hard": 2.0
-    }.get(game_state["difficulty"], 1.0)
-    
-    return int(score * multiplier)
-
-def check_achievements(game_state: Dict[str, Any]) -> None:
-    """Verificar y actualizar logros"""
-    achievements = game_state["achievements"]
-    
-    # Speed Runner
-    if not achievements["speed_runner"]["unlocked"]:
-        time_elapsed = time.time() - game_state["start_time"]
-        if time_elapsed < 900:  # 15 minutos
-            achievements["speed_runner"]["unlocked"] = True
-            print(GameArt.ACHIEVEMENT)
-            print(f"¡Logro desbloqueado: {achievements['speed_runner']['name']}!")
-            GameSounds.play_achievement()
-    
-    # Treasure Hunter
-    if not achievements["treasure_hunter"]["unlocked"]:
-        if len(game_state["treasure_collected"]) >= 3:  # todos los tesoros
-            achievements["treasure_hunter"]["unlocked"] = True
-            print(GameArt.ACHIEVEMENT)
-            print(f"¡Logro desbloqueado: {achievements['treasure_hunter']['name']}!")
-            GameSounds.play_achievement()
-    
-    # Master Explorer
-    if not achievements["master_explorer"]["unlocked"]:
-        if len(game_state["examined_objects"]) >= 15:  # número arbitrario de objetos
-            achievements["master_explorer"]["unlocked"] = True
-            print(GameArt.ACHIEVEMENT)
-            print(f"¡Logro desbloqueado: {achievements['master_explorer']['name']}!")
-            GameSounds.play_achievement()
-
-def print_map(game_state: Dict[str, Any], object_relations: Dict[str, List]) -> None:
+    return int(score * game_state.rules.score_multiplier)
+
+# Eventos de la partida: los comandos publican y los logros (y quien quiera) se suscriben
+GAME_EVENTS = EventBus()
+FOUND_EVENTS = {"key": KEY_FOUND, "treasure": TREASURE_FOUND}
+
+# Logros: regla(estado, id del evento) -> si se desbloquea
+ACHIEVEMENT_RULES = AchievementRules()
+
+# Los umbrales de los logros están en game_state.rules (estado.Rules)
+@ACHIEVEMENT_RULES.rule("speed_runner", ESCAPED)
+def speed_runner(game_state: GameState, _: int) -> bool:
+    return game_state.now - game_state.start_time < game_state.rules.speed_run_seconds
+
+@ACHIEVEMENT_RULES.rule("treasure_hunter", TREASURE_FOUND)
+def treasure_hunter(game_state: GameState, _: int) -> bool:
+    return game_state.treasure_count >= game_state.rules.hunter_treasures
+
+@ACHIEVEMENT_RULES.rule("master_explorer", OBJECT_EXAMINED)
+def master_explorer(game_state: GameState, _: int) -> bool:
+    return game_state.examined_count >= game_state.rules.explorer_examined
+
+def announce_achievement(game_state: GameState, key: str) -> None:
+    """Anunciar un logro recién desbloqueado"""
+    write(GameArt.ACHIEVEMENT)
+    write(f"¡Logro desbloqueado: {game_state.world.achievements[key]['name']}!")
+    GameSounds.play_achievement(game_state)
+
+ACHIEVEMENT_RULES.attach(GAME_EVENTS, announce_achievement)
+
+# Posición (columna, fila) de cada habitación de la mansión del notebook en el mapa.
+# Los mundos generados traen la suya en el campo "position" de cada habitación
+ROOMS_LAYOUT = {
+    "game_room":     (0, 0),
+    "bedroom1":      (0, 1),
+    "bedroom2":      (0, 2),
+    "livingroom":    (1, 1),
+    "outside":       (2, 1)
+}
+MAP_WIDTH = 40
+MAP_HEIGHT = 7
+MAP_CELL = (8, 2)
+
+_map_grids: "WeakKeyDictionary[World, Union[GridMap, ViewportMap]]" = WeakKeyDictionary()
+
+def room_layout(world: World) -> Dict[str, Tuple[int, int]]:
+    """Posición de cada habitación por nombre: su campo "position" o, si no lo tiene, ROOMS_LAYOUT"""
+    layout = {}
+    for room_id in world.room_items:
+        room = world.objects[room_id]
+        position = room.get("position")
+        if position is None:
+            # Las claves de ROOMS_LAYOUT llevan guiones bajos y los nombres espacios ("game room")
+            position = ROOMS_LAYOUT.get(room["name"].replace(" ", "_"))
+        if position is not None:
+            layout[room["name"]] = tuple(position)
+    return layout
+
+def map_grid(world: World) -> Union[GridMap, ViewportMap]:
+    """Mapa del mundo: filas precalculadas si cabe entero, una ventana alrededor del jugador si no"""
+    grid = _map_grids.get(world)
+    if grid is None:
+        layout = room_layout(world)
+        columns = (MAP_WIDTH - 2) // MAP_CELL[0]
+        rows = -(-MAP_HEIGHT // MAP_CELL[1])
+        fits = all(0 <= col < columns and 0 <= row < rows for col, row in layout.values())
+        kind = GridMap if fits else ViewportMap
+        grid = _map_grids[world] = kind(layout, MAP_WIDTH - 2, MAP_HEIGHT,
+                                        room=(GameColors.ROOM, "□"), player=(GameColors.PLAYER, "P"),
+                                        reset=GameColors.RESET, cell=MAP_CELL)
+    return grid
+
+@measured("render", panel="map")
+def print_map(game_state: GameState, world: World) -> None:
     """Mostrar un mapa ASCII del juego con la posición actual"""
-    rooms_layout = {
-        "game_room":     (0, 0),
-        "bedroom1":      (0, 1),
-        "bedroom2":      (0, 2),
-        "livingroom":    (1, 1),
-        "outside":       (2, 1)
-    }
-    
-    map_width = 40
-    map_height = 7
-    current_room = game_state["current_room"]["name"]
-    
-    print(f"\n{GameColors.TITLE}═══ MAPA DEL JUEGO ═══{GameColors.RESET}")
-    print("╔" + "═" * (map_width-2) + "╗")
-    
-    for y in range(map_height):
-        print("║", end="")
-        for x in range(map_width-2):
-            room_found = False
-            for room, pos in rooms_layout.items():
-                if pos == (x//8, y//2):
-                    if room == current_room:
-                        print(f"{GameColors.PLAYER}P{GameColors.RESET}", end="")
-                    else:
-                        print(f"{GameColors.ROOM}□{GameColors.RESET}", end="")
-                    room_found = True
-                    break
-            if not room_found:
-                if x % 8 == 7:
-                    print("│", end="")
-                elif y % 2 == 1:
-                    print("─", end="")
-                else:
-                    print(" ", end="")
-        print("║")
-    
-    print("╚" + "═" * (map_width-2) + "╝")
-
-def print_status(game_state: Dict[str, Any]) -> None:
+    if not get_io().renders:
+        return
+    frame = Frame()
+    frame.add(f"\n{GameColors.TITLE}═══ MAPA DEL JUEGO ═══{GameColors.RESET}")
+    frame.add("╔" + "═" * (MAP_WIDTH-2) + "╗")
+    frame.extend(f"║{row}║" for row in map_grid(world).lines(world.names[game_state.room]))
+    frame.add("╚" + "═" * (MAP_WIDTH-2) + "╝")
+    draw(frame)
+
+@measured("render", panel="status")
+def print_status(game_state: GameState) -> None:
     """Mostrar el estado actual del juego"""
-    print(f"\n{GameColors.PROGRESS}═══ ESTADO ACTUAL ═══{GameColors.RESET}")
-    print(f"{GameColors.ROOM}Habitación Actual: {game_state['current_room']['name']}{GameColors.RESET}")
+    if not get_io().renders:
+        return
+    names = game_state.world.names
+    frame = Frame()
+    frame.add(f"\n{GameColors.PROGRESS}═══ ESTADO ACTUAL ═══{GameColors.RESET}")
+    frame.add(f"{GameColors.ROOM}Habitación Actual: {names[game_state.room]}{GameColors.RESET}")
     
     # Tiempo y puntuación
-    elapsed_time = get_elapsed_time(game_state["start_time"])
+    elapsed_time = get_elapsed_time(game_state.start_time, game_state.now)
     score = calculate_score(game_state)
-    print(f"{GameColors.PROGRESS}Tiempo: {elapsed_time}{GameColors.RESET}")
-    print(f"{GameColors.SCORE}Puntuación: {score}{GameColors.RESET}")
+    frame.add(f"{GameColors.PROGRESS}Tiempo: {elapsed_time}{GameColors.RESET}")
+    frame.add(f"{GameColors.SCORE}Puntuación: {score}{GameColors.RESET}")
     
     # Inventario
-    if game_state["inventory"]:
-        print(f"{GameColors.INVENTORY}Inventario: {', '.join(item['name'] for item in game_state['inventory'])}{GameColors.RESET}")
+    inventory = game_state.inventory()
+    if inventory:
+        frame.add(f"{GameColors.INVENTORY}Inventario: {', '.join(names[i] for i in inventory)}{GameColors.RESET}")
     else:
-        print(f"{GameColors.INVENTORY}Inventario: Vacío{GameColors.RESET}")
+        frame.add(f"{GameColors.INVENTORY}Inventario: Vacío{GameColors.RESET}")
     
     # Llaves
-    if game_state["keys_collected"]:
-        print(f"{GameColors.KEY}Llaves: {', '.join(k['name'] for k in game_state['keys_collected'])}{GameColors.RESET}")
+    if game_state.keys:
+        frame.add(f"{GameColors.KEY}Llaves: {', '.join(names[i] for i in iter_bits(game_state.keys))}{GameColors.RESET}")
     else:
-        print(f"{GameColors.KEY}Llaves: Ninguna{GameColors.RESET}")
+        frame.add(f"{GameColors.KEY}Llaves: Ninguna{GameColors.RESET}")
     
     # Tesoros
-    if game_state["treasure_collected"]:
-        print(f"{GameColors.TREASURE}Tesoros: {', '.join(t['name'] for t in game_state['treasure_collected'])}{GameColors.RESET}")
+    if game_state.treasures:
+        frame.add(f"{GameColors.TREASURE}Tesoros: {', '.join(names[i] for i in iter_bits(game_state.treasures))}{GameColors.RESET}")
     else:
-        print(f"{GameColors.TREASURE}Tesoros: Ninguno{GameColors.RESET}")
+        frame.add(f"{GameColors.TREASURE}Tesoros: Ninguno{GameColors.RESET}")
     
     # Pistas restantes
-    print(f"{GameColors.HINT}Pistas restantes: {game_state['hints_remaining']}{GameColors.RESET}")
+    frame.add(f"{GameColors.HINT}Pistas restantes: {game_state.hints_remaining}{GameColors.RESET}")
+    draw(frame)
 
-def print_inventory(game_state: Dict[str, Any]) -> None:
+@measured("render", panel="inventory")
+def print_inventory(game_state: GameState) -> None:
     """Mostrar el inventario detallado"""
-    print(f"\n{GameColors.INVENTORY}═══ INVENTARIO ═══{GameColors.RESET}")
-    if not game_state["inventory"]:
-        print("El inventario está vacío")
-        return
-    
-    for item in game_state["inventory"]:
-        print(f"\n{GameColors.ITEM}{item['name']}{GameColors.RESET}")
+    frame = Frame()
+    frame.add(f"\n{GameColors.INVENTORY}═══ INVENTARIO ═══{GameColors.RESET}")
+    inventory = game_state.inventory()
+    if not inventory:
+        frame.add("El inventario está vacío")
+    
+    for item_id in inventory:
+        item = game_state.world.objects[item_id]
+        frame.add(f"\n{GameColors.ITEM}{item['name']}{GameColors.RESET}")
         if "description" in item:
-            print(f"  {item['description']}")
+            frame.add(f"  {item['description']}")
         if "power" in item:
-            print(f"  Poder: {item['power']}")
+            frame.add(f"  Poder: {item['power']}")
+    draw(frame)
 
-def print_achievements(game_state: Dict[str, Any]) -> None:
+@measured("render", panel="achievements")
+def print_achievements(game_state: GameState) -> None:
     """Mostrar los logros y su estado"""
-    print(f"\n{GameColors.ACHIEVEMENT}═══ LOGROS ═══{GameColors.RESET}")
-    for achievement in game_state["achievements"].values():
-        status = "✓" if achievement["unlocked"] else "✗"
-        color = GameColors.SUCCESS if achievement["unlocked"] else GameColors.ERROR
-        print(f"{color}{status} {achievement['name']}: {achievement['description']}{GameColors.RESET}")
-
-def get_hint(game_state: Dict[str, Any], object_relations: Dict[str, List]) -> None:
-    """Proporcionar una pista basada en el estado actual del juego"""
-    if game_state["hints_remaining"] <= 0:
-        print(f"{GameColors.ERROR}No te quedan pistas disponibles.{GameColors.RESET}")
+    frame = Frame()
+    frame.add(f"\n{GameColors.ACHIEVEMENT}═══ LOGROS ═══{GameColors.RESET}")
+    for key, achievement in game_state.world.achievements.items():
+        unlocked = game_state.is_unlocked(key)
+        status = "✓" if unlocked else "✗"
+        color = GameColors.SUCCESS if unlocked else GameColors.ERROR
+        frame.add(f"{color}{status} {achievement['name']}: {achievement['description']}{GameColors.RESET}")
+    draw(frame)
+
+def get_hint(game_state: GameState, world: World, rng: Optional["random.Random"] = None,
+             tracker: Optional["HintTracker"] = None) -> None:
+    """Proporcionar una pista: la siguiente acción útil según el plan de tracker.
+
+    Sin tracker (o si no hay salida posible) se da una pista genérica de la habitación.
+    """
+    if game_state.hints_remaining <= 0:
+        write(f"{GameColors.ERROR}No te quedan pistas disponibles.{GameColors.RESET}")
         return
     
-    current_room = game_state["current_room"]["name"]
-    hints = [
-        f"Hay algo interesante en {obj['name']}..." for obj in object_relations[current_room]
-    ]
-    
-    if not game_state["keys_collected"]:
-        hints.append("Busca las llaves en los muebles de la habitación.")
-    elif len(game_state["treasure_collected"]) < 3:
-        hints.append("Aún hay tesoros ocultos por descubrir.")
-    
-    hint = random.choice(hints)
-    game_state["hints_remaining"] -= 1
-    print(f"{GameColors.HINT}Pista: {hint}{GameColors.RESET}")
-    print(f"Te quedan {game_state['hints_remaining']} pistas.")
+    hint = tracker.hint(game_state) if tracker is not None else None
+    if hint is None:
+        hints = [
+            f"Hay algo interesante en {name}..." for name in world.room_items[game_state.room]
+        ]
+        
+        if not game_state.keys:
+            hints.append("Busca las llaves en los muebles de la habitación.")
+        elif game_state.treasure_count < 3:
+            hints.append("Aún hay tesoros ocultos por descubrir.")
+        
+        if rng is None:
+            import random
+            rng = random.Random()
+        hint = rng.choice(hints)
+    game_state.hints_remaining -= 1
+    write(f"{GameColors.HINT}Pista: {hint}{GameColors.RESET}")
+    write(f"Te quedan {game_state.hints_remaining} pistas.")
 
-def handle_inventory_command(game_state: Dict[str, Any], command: List[str]) -> None:
+def handle_inventory_command(game_state: GameState, command: List[str]) -> None:
     """Manejar comandos relacionados con el inventario"""
     if len(command) == 1:
         print_inventory(game_state)
@@ -281,253 +451,560 @@ def handle_inventory_command(game_state: Dict[str, Any], command: List[str]) ->
     
     action = command[1]
     if action == "use" and len(command) > 2:
-        item_name = " ".join(command[2:])
-        use_item(game_state, item_name)
+        names = game_state.world.names
+        inventory = NameIndex([names[i] for i in game_state.inventory()])
+        item_name = resolve_item(inventory, " ".join(command[2:]), "No tienes ese objeto en tu inventario.")
+        if item_name is not None:
+            use_item(game_state, item_name)
     else:
-        print(f"{GameColors.ERROR}Comando de inventario no válido.{GameColors.RESET}")
+        write(f"{GameColors.ERROR}Comando de inventario no válido.{GameColors.RESET}")
 
-def use_item(game_state: Dict[str, Any], item_name: str) -> None:
+def use_item(game_state: GameState, item_name: str) -> None:
     """Usar un objeto del inventario"""
-    for item in game_state["inventory"]:
-        if item["name"] == item_name:
-            if item["type"] == "key":
-                print(f"{GameColors.KEY}Selecciona una puerta para usar la llave.{GameColors.RESET}")
-            elif item["type"] == "treasure":
-                print(f"{GameColors.TREASURE}Usas el poder de {item['name']}: {item['power']}{GameColors.RESET}")
-            return
-    print(f"{GameColors.ERROR}No tienes ese objeto en tu inventario.{GameColors.RESET}")
-
-def handle_door(game_state: Dict[str, Any], object_relations: Dict[str, List], door: Dict[str, Any], current_room: Dict[str, Any]) -> None:
-    """Manejar interacción con puertas"""
-    have_key = any(key["target"] == door for key in game_state["keys_collected"])
-    
-    if have_key:
-        print(f"{GameColors.SUCCESS}¡Tienes la llave! La puerta se abre...{GameColors.RESET}")
-        GameSounds.play_door_open()
-        next_room = get_next_room_of_door(door, object_relations, current_room)
-        if next_room and input(f"{GameColors.HINT}¿Quieres entrar a la siguiente habitación? (si/no): {GameColors.RESET}").strip().lower() == 'si':
-            game_state["current_room"] = next_room
-            print_map(game_state, object_relations)
-    else:
-        print(f"{GameColors.ERROR}La puerta está cerrada. {door['mechanism']}{GameColors.RESET}")
+    item_id = game_state.world.ids.get(item_name)
+    if item_id is not None and game_state.has(item_id):
+        item = game_state.world.objects[item_id]
+        if item["type"] == "key":
+            write(f"{GameColors.KEY}Selecciona una puerta para usar la llave.{GameColors.RESET}")
+        elif item["type"] == "treasure":
+            write(f"{GameColors.TREASURE}Usas el poder de {item['name']}: {item['power']}{GameColors.RESET}")
+        return
+    write(f"{GameColors.ERROR}No tienes ese objeto en tu inventario.{GameColors.RESET}")
+
+def handle_door(game_state: GameState, world: World, door_id: int) -> Optional[int]:
+    """Manejar interacción con puertas. Devuelve la habitación a la que lleva si se abre"""
+    if game_state.can_open(door_id):
+        write(f"{GameColors.SUCCESS}¡Tienes la llave! La puerta se abre...{GameColors.RESET}")
+        game_state.open_door(door_id)
+        GameSounds.play_door_open(game_state)
+        return get_next_room_of_door(door_id, world, game_state.room)
+    write(f"{GameColors.ERROR}La puerta está cerrada. {world.objects[door_id]['mechanism']}{GameColors.RESET}")
+    return None
 
-def handle_furniture(game_state: Dict[str, Any], object_relations: Dict[str, List], item: Dict[str, Any]) -> None:
+def handle_furniture(game_state: GameState, world: World, item_id: int) -> None:
     """Manejar interacción con muebles"""
+    item = world.objects[item_id]
     # Agregar el objeto a los examinados
-    game_state["examined_objects"].add(item["name"])
+    game_state.examine(item_id)
     
-    print(f"\n{GameColors.ITEM}{item['description']}{GameColors.RESET}")
+    write(f"\n{GameColors.ITEM}{item['description']}{GameColors.RESET}")
     if "interaction" in item:
-        print(f"{GameColors.HINT}{item['interaction']}{GameColors.RESET}")
+        write(f"{GameColors.HINT}{item['interaction']}{GameColors.RESET}")
     
-    if item["name"] in object_relations and object_relations[item["name"]]:
-        found_item = object_relations[item["name"]].pop()
+    # El mundo no cambia: lo que ya se sacó del mueble lo recuerda el estado de la partida
+    found_id = game_state.next_content(item_id)
+    if found_id is not None:
+        found_item = world.objects[found_id]
+        game_state.collect(found_id)
         if found_item["type"] == "key":
-            game_state["keys_collected"].append(found_item)
-            print(f"{GameColors.SUCCESS}¡Has encontrado {found_item['name']}!{GameColors.RESET}")
-            print(f"{GameColors.HINT}{found_item['hint']}{GameColors.RESET}")
-            print(f"{GameColors.ITEM}{found_item['story']}{GameColors.RESET}")
-            GameSounds.play_key_found()
+            write(f"{GameColors.SUCCESS}¡Has encontrado {found_item['name']}!{GameColors.RESET}")
+            write(f"{GameColors.HINT}{found_item['hint']}{GameColors.RESET}")
+            write(f"{GameColors.ITEM}{found_item['story']}{GameColors.RESET}")
+            GameSounds.play_key_found(game_state)
         elif found_item["type"] == "treasure":
-            game_state["treasure_collected"].append(found_item)
-            print(GameArt.TREASURE)
-            print(f"{GameColors.TREASURE}Has encontrado: {found_item['name']}{GameColors.RESET}")
-            print(f"{GameColors.HINT}{found_item['description']}{GameColors.RESET}")
-            print(f"{GameColors.ITEM}Poder: {found_item['power']}{GameColors.RESET}")
-            GameSounds.play_treasure_found()
+            write(GameArt.TREASURE)
+            write(f"{GameColors.TREASURE}Has encontrado: {found_item['name']}{GameColors.RESET}")
+            write(f"{GameColors.HINT}{found_item['description']}{GameColors.RESET}")
+            write(f"{GameColors.ITEM}Poder: {found_item['power']}{GameColors.RESET}")
+            GameSounds.play_treasure_found(game_state)
+        else:
+            # No va al inventario, pero sale del mueble y deja ver lo que había debajo
+            write(f"{GameColors.ITEM}Encuentras {found_item['name']}, pero no te sirve de nada.{GameColors.RESET}")
         
-        game_state["inventory"].append(found_item)
         print_status(game_state)
-        check_achievements(game_state)
+        event = FOUND_EVENTS.get(found_item["type"])
+        if event is not None:
+            GAME_EVENTS.publish(event, game_state, found_id)
     else:
-        print(f"{GameColors.HINT}No encuentras nada más interesante en este objeto.{GameColors.RESET}")
+        write(f"{GameColors.HINT}No encuentras nada más interesante en este objeto.{GameColors.RESET}")
+    GAME_EVENTS.publish(OBJECT_EXAMINED, game_state, item_id)
 
-def push_item(game_state: Dict[str, Any], object_relations: Dict[str, List], item_name: str) -> None:
+def push_item(game_state: GameState, world: World, item_name: str) -> None:
     """Manejar empuje de objetos"""
-    current_room = game_state["current_room"]
-    
-    for item in object_relations[current_room["name"]]:
-        if item["name"] == item_name:
-            if item["name"] == "dining table":
-                if not any(t["target"] == item for t in game_state["treasure_collected"]):
-                    found_treasure = next(t for t in object_relations["dining table"] if t["type"] == "treasure")
-                    game_state["treasure_collected"].append(found_treasure)
-                    game_state["inventory"].append(found_treasure)
-                    print(GameArt.TREASURE)
-                    print(f"{GameColors.TREASURE}Has encontrado: {found_treasure['name']}{GameColors.RESET}")
-                    print(f"{GameColors.HINT}{found_treasure['description']}{GameColors.RESET}")
-                    print(f"{GameColors.ITEM}Poder: {found_treasure['power']}{GameColors.RESET}")
-                    GameSounds.play_treasure_found()
-                    check_achievements(game_state)
-                else:
-                    print(f"{GameColors.HINT}Ya encontraste el tesoro aquí.{GameColors.RESET}")
+    item_id = world.find_in_room(game_state.room, item_name)
+    
+    if item_id is not None:
+        item = world.objects[item_id]
+        if item["name"] == "dining table":
+            # Los tesoros no tienen "target": se busca el que sigue dentro de la mesa
+            found_id = next((i for i in world.contents.get(item_id, ())
+                             if world.types[i] == "treasure" and not game_state.has(i)), None)
+            if found_id is not None:
+                found_treasure = world.objects[found_id]
+                game_state.collect(found_id)
+                write(GameArt.TREASURE)
+                write(f"{GameColors.TREASURE}Has encontrado: {found_treasure['name']}{GameColors.RESET}")
+                write(f"{GameColors.HINT}{found_treasure['description']}{GameColors.RESET}")
+                write(f"{GameColors.ITEM}Poder: {found_treasure['power']}{GameColors.RESET}")
+                GameSounds.play_treasure_found(game_state)
+                GAME_EVENTS.publish(TREASURE_FOUND, game_state, found_id)
             else:
-                print(f"{GameColors.HINT}Nada sucede al empujar este objeto.{GameColors.RESET}")
-            return
+                write(f"{GameColors.HINT}Ya encontraste el tesoro aquí.{GameColors.RESET}")
+        else:
+            write(f"{GameColors.HINT}Nada sucede al empujar este objeto.{GameColors.RESET}")
+        return
     
-    print(f"{GameColors.ERROR}No encuentras ese objeto en esta habitación.{GameColors.RESET}")
+    write(f"{GameColors.ERROR}No encuentras ese objeto en esta habitación.{GameColors.RESET}")
 
-def get_next_room_of_door(door: Dict[str, Any], object_relations: Dict[str, List], current_room: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def get_next_room_of_door(door_id: int, world: World, room_id: int) -> Optional[int]:
     """Obtener la siguiente habitación a través de una puerta"""
-    for room in object_relations[door["name"]]:
-        if room != current_room:
-            return room
-    return None
+    return world.next_room(room_id, door_id)
 
-def victory_sequence(game_state: Dict[str, Any]) -> None:
+def victory_sequence(game_state: GameState) -> None:
     """Mostrar secuencia de victoria"""
     clear_screen()
-    print(GameArt.VICTORY)
+    write(GameArt.VICTORY)
     
     # Mostrar resumen final
-    print(f"\n{GameColors.TITLE}═══ RESUMEN FINAL ═══{GameColors.RESET}")
+    write(f"\n{GameColors.TITLE}═══ RESUMEN FINAL ═══{GameColors.RESET}")
     
     # Tiempo total
-    elapsed_time = get_elapsed_time(game_state["start_time"])
-    print(f"\n{GameColors.PROGRESS}Tiempo total: {elapsed_time}{GameColors.RESET}")
+    elapsed_time = get_elapsed_time(game_state.start_time, game_state.now)
+    write(f"\n{GameColors.PROGRESS}Tiempo total: {elapsed_time}{GameColors.RESET}")
     
     # Puntuación final
     final_score = calculate_score(game_state)
-    print(f"{GameColors.SCORE}Puntuación final: {final_score}{GameColors.RESET}")
+    write(f"{GameColors.SCORE}Puntuación final: {final_score}{GameColors.RESET}")
     
     # Tesoros encontrados
-    print(f"\n{GameColors.TREASURE}Tesoros encontrados: {len(game_state['treasure_collected'])}/3{GameColors.RESET}")
-    for treasure in game_state["treasure_collected"]:
-        print(f"  - {treasure['name']}: {treasure['power']}")
+    write(f"\n{GameColors.TREASURE}Tesoros encontrados: {game_state.treasure_count}/3{GameColors.RESET}")
+    for treasure_id in iter_bits(game_state.treasures):
+        treasure = game_state.world.objects[treasure_id]
+        write(f"  - {treasure['name']}: {treasure['power']}")
     
     # Logros desbloqueados
-    print(f"\n{GameColors.ACHIEVEMENT}Logros desbloqueados:{GameColors.RESET}")
-    for achievement in game_state["achievements"].values():
-        if achievement["unlocked"]:
-            print(f"  ✓ {achievement['name']}")
+    write(f"\n{GameColors.ACHIEVEMENT}Logros desbloqueados:{GameColors.RESET}")
+    for key, achievement in game_state.world.achievements.items():
+        if game_state.is_unlocked(key):
+            write(f"  ✓ {achievement['name']}")
     
-    print(f"\n{GameColors.HINT}¡Gracias por jugar!{GameColors.RESET}")
+    write(f"\n{GameColors.HINT}¡Gracias por jugar!{GameColors.RESET}")
+
+def start_game(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World]) -> str:
+    """Iniciar una partida nueva y devolver cómo terminó.
 
-def start_game(game_state: Dict[str, Any], object_relations: Dict[str, List]) -> None:
-    """Iniciar el juego"""
+    Ni game_state ni object_relations se modifican, así que se puede volver a
+    llamar con los mismos diccionarios. Pasar un World ya compilado evita
+    recompilar el mundo en cada partida. La partida se autoguarda en la ranura
+    'autosave' cada game_state["autosave_every"] turnos (0 lo desactiva) y
+    lleva un diario en game_state["journal_dir"] para poder repetirla. Si se
+    escapa, la puntuación se apunta en la clasificación game_state["leaderboard"]
+    a nombre de game_state["player"].
+    """
+    state, world, autosave, journal = new_game(game_state, object_relations)
+    print_intro()
+    try:
+        outcome = play_room(state, state.room, world, autosave, journal)
+    finally:
+        if autosave is not None:
+            autosave.close(timeout=5)
+        if journal is not None:
+            journal.close()
+    record_outcome(state, outcome, game_state)
+    return outcome
+
+def new_game(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World]
+             ) -> Tuple[GameState, World, Optional[AutoSaver], Optional[Journal]]:
+    """Estado, mundo, autoguardado y diario de una partida nueva, como los prepara start_game"""
+    world = object_relations if isinstance(object_relations, World) else compile_world(object_relations, game_state.get("achievements"))
+    state = GameState.from_dict(world, game_state)
+    state.start_time = time.time()
+    every = game_state.get("autosave_every", 5)
+    autosave = AutoSaver(save_store, every_turns=every) if every else None
+    journal_dir = game_state.get("journal_dir", "diarios")
+    journal = None
+    if journal_dir:
+        state.now = state.start_time
+        journal = Journal.create(state, journal_dir)
+    return state, world, autosave, journal
+
+def record_outcome(state: GameState, outcome: str, game_state: Dict[str, Any]) -> None:
+    """Apuntar la partida en la clasificación game_state["leaderboard"] si se escapó"""
+    leaderboard_path = game_state.get("leaderboard", "clasificacion.db")
+    if outcome == "escaped" and leaderboard_path:
+        from clasificacion import Leaderboard  # sqlite3 solo hace falta al terminar
+        with Leaderboard(leaderboard_path) as leaderboard:
+            record_run(state, leaderboard, game_state.get("player", "jugador"))
+
+def record_run(game_state: GameState, leaderboard: "Leaderboard", player: str) -> None:
+    """Apuntar una partida terminada en la clasificación y mostrar su puesto"""
+    from clasificacion import Run
+    run = Run.from_state(game_state, calculate_score(game_state), player)
+    leaderboard.add(run)
+    standing = leaderboard.standing(run.world, run.difficulty, run.score)
+    write(f"{GameColors.SCORE}Clasificación ({run.difficulty}): {standing}{GameColors.RESET}")
+
+def print_intro() -> None:
+    """Mostrar el logo, la historia inicial y la ayuda"""
     clear_screen()
-    print(GameArt.LOGO)
+    write(GameArt.LOGO)
     
-    print(f"{GameColors.HINT}Despiertas en una mansión misteriosa, rodeado de enigmas y secretos.")
-    print("No recuerdas cómo llegaste aquí, pero sientes que cada objeto guarda una historia.")
-    print(f"Tu misión es escapar, pero ten cuidado: el tiempo corre en tu contra...{GameColors.RESET}\n")
+    write(f"{GameColors.HINT}Despiertas en una mansión misteriosa, rodeado de enigmas y secretos.")
+    write("No recuerdas cómo llegaste aquí, pero sientes que cada objeto guarda una historia.")
+    write(f"Tu misión es escapar, pero ten cuidado: el tiempo corre en tu contra...{GameColors.RESET}\n")
     
     print_help()
-    play_room(game_state, game_state["current_room"], object_relations)
 
 def print_help() -> None:
     """Mostrar ayuda del juego"""
-    print(f"\n{GameColors.TITLE}═══ COMANDOS DISPONIBLES ═══{GameColors.RESET}")
-    print(f"{GameColors.HINT}explore{GameColors.RESET}: Explorar la habitación actual")
-    print(f"{GameColors.HINT}examine <objeto>{GameColors.RESET}: Examinar un objeto específico")
-    print(f"{GameColors.HINT}push <objeto>{GameColors.RESET}: Empujar un objeto")
-    print(f"{GameColors.HINT}take <objeto>{GameColors.RESET}: Tomar un objeto")
-    print(f"{GameColors.HINT}inventory{GameColors.RESET}: Ver inventario")
-    print(f"{GameColors.HINT}use <objeto>{GameColors.RESET}: Usar un objeto del inventario")
-    print(f"{GameColors.HINT}map{GameColors.RESET}: Mostrar el mapa")
-    print(f"{GameColors.HINT}status{GameColors.RESET}: Mostrar estado actual")
-    print(f"{GameColors.HINT}hint{GameColors.RESET}: Obtener una pista (limitado)")
-    print(f"{GameColors.HINT}achievements{GameColors.RESET}: Ver logros")
-    print(f"{GameColors.HINT}save{GameColors.RESET}: Guardar partida")
-    print(f"{GameColors.HINT}load{GameColors.RESET}: Cargar partida")
-    print(f"{GameColors.HINT}help{GameColors.RESET}: Mostrar esta ayuda")
-    print(f"{GameColors.HINT}quit{GameColors.RESET}: Salir del juego")
-
-def play_room(game_state: Dict[str, Any], room: Dict[str, Any], object_relations: Dict[str, List]) -> None:
-    """Jugar en una habitación"""
-    game_state["current_room"] = room
-    
-    while True:
-        # Verificar tiempo límite
-        if time.time() - game_state["start_time"] > game_state["time_limit"]:
-            print(f"{GameColors.ERROR}¡Se ha agotado el tiempo! Game Over.{GameColors.RESET}")
-            print(GameArt.GAME_OVER)
-            return
-        
-        print(f"\n{GameColors.ROOM}Estás en: {room['name']}{GameColors.RESET}")
-        command = input(f"{GameColors.HINT}¿Qué quieres hacer? {GameColors.RESET}").strip().lower().split()
-        
-        if not command:
-            continue
-            
-        action = command[0]
-        
-        if action == "quit":
-            if input("¿Seguro que quieres salir? (si/no): ").lower() == "si":
-                print(GameArt.GAME_OVER)
-                return
-        elif action == "help":
-            print_help()
-        elif action == "map":
-            print_map(game_state, object_relations)
-        elif action == "status":
-            print_status(game_state)
-        elif action == "explore":
-            explore_room(object_relations, room)
-        elif action == "examine" and len(command) > 1:
-            examine_item(game_state, object_relations, " ".join(command[1:]), room)
-        elif action == "push" and len(command) > 1:
-            push_item(game_state, object_relations, " ".join(command[1:]))
-        elif action == "inventory":
-            handle_inventory_command(game_state, command)
-        elif action == "hint":
-            get_hint(game_state, object_relations)
-        elif action == "achievements":
-            print_achievements(game_state)
-        elif action == "save":
-            save_game(game_state)
-            print(GameArt.SAVE)
-        elif action == "load":
-            loaded_state = load_game()
-            if loaded_state:
-                game_state.update(loaded_state)
-                print(GameArt.LOAD)
-                print_status(game_state)
-        else:
-            print(f"{GameColors.ERROR}Comando no válido. Escribe 'help' para ver los comandos disponibles.{GameColors.RESET}")
-            
-        if game_state["current_room"] == game_state["target_room"]:
-            victory_sequence(game_state)
-            return
+    write(f"\n{GameColors.TITLE}═══ COMANDOS DISPONIBLES ═══{GameColors.RESET}")
+    write(f"{GameColors.HINT}explore{GameColors.RESET}: Explorar la habitación actual")
+    write(f"{GameColors.HINT}examine <objeto>{GameColors.RESET}: Examinar un objeto específico")
+    write(f"{GameColors.HINT}push <objeto>{GameColors.RESET}: Empujar un objeto")
+    write(f"{GameColors.HINT}take <objeto>{GameColors.RESET}: Tomar un objeto")
+    write(f"{GameColors.HINT}inventory{GameColors.RESET}: Ver inventario")
+    write(f"{GameColors.HINT}use <objeto>{GameColors.RESET}: Usar un objeto del inventario")
+    write(f"{GameColors.HINT}map{GameColors.RESET}: Mostrar el mapa")
+    write(f"{GameColors.HINT}status{GameColors.RESET}: Mostrar estado actual")
+    write(f"{GameColors.HINT}hint{GameColors.RESET}: Obtener una pista (limitado)")
+    write(f"{GameColors.HINT}achievements{GameColors.RESET}: Ver logros")
+    write(f"{GameColors.HINT}save [nombre]{GameColors.RESET}: Guardar partida")
+    write(f"{GameColors.HINT}load [nombre]{GameColors.RESET}: Cargar partida")
+    write(f"{GameColors.HINT}help{GameColors.RESET}: Mostrar esta ayuda")
+    write(f"{GameColors.HINT}quit{GameColors.RESET}: Salir del juego")
+    write(f"\nLos comandos y los objetos se pueden abreviar: {GameColors.HINT}ex pia{GameColors.RESET} = examine piano")
 
-def explore_room(object_relations: Dict[str, List], room: Dict[str, Any]) -> None:
-    """Explorar una habitación"""
-    items = [i["name"] for i in object_relations[room["name"]]]
-    print(f"\n{GameColors.ROOM}Exploras {room['name']}.{GameColors.RESET}")
-    print(room["description"])
-    print(f"{GameColors.ITEM}Objetos encontrados: {', '.join(items)}{GameColors.RESET}")
-
-def examine_item(game_state: Dict[str, Any], object_relations: Dict[str, List], item_name: str, room: Dict[str, Any]) -> None:
-    """Examinar un objeto"""
-    current_room = game_state["current_room"]
-    
-    for item in object_relations[current_room["name"]]:
-        if item["name"] == item_name:
-            if item["type"] == "door":
-                handle_door(game_state, object_relations, item, current_room)
-            else:
-                handle_furniture(game_state, object_relations, item)
-            return
-    
-    print(f"{GameColors.ERROR}No encuentras ese objeto en esta habitación.{GameColors.RESET}")
-
-def save_game(game_state: Dict[str, Any]) -> None:
-    """Guardar el estado actual del juego"""
-    save_data = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "game_state": {k: v for k, v in game_state.items() if isinstance(v, (dict, list, str, int, float, bool))}
-    }
-    with open('savegame.json', 'w') as f:
-        json.dump(save_data, f)
-    print(f"{GameColors.SUCCESS}¡Partida guardada exitosamente!{GameColors.RESET}")
-
-def load_game() -> Optional[Dict[str, Any]]:
-    """Cargar una partida guardada"""
+class GameSession:
+    """Partida en curso: estado, mundo, la habitación de la puerta recién abierta y lo que
+    la acompaña (autoguardado, diario, números aleatorios, ranuras de guardado, pistas y métricas)"""
+    __slots__ = ("game_state", "world", "pending_room", "autosave", "journal", "seed", "_rng", "saves", "_hints",
+                 "metrics")
+
+    def __init__(self, game_state: GameState, world: World, autosave: Optional[AutoSaver] = None,
+                 journal: Optional[Journal] = None, seed: Optional[int] = None,
+                 saves: Optional[SaveStore] = None, metrics: Optional[Metrics] = None):
+        self.game_state = game_state
+        self.world = world
+        self.pending_room: Optional[int] = None
+        self.autosave = autosave
+        self.journal = journal
+        # Con la misma semilla las pistas salen en el mismo orden
+        self.seed = journal.seed if journal is not None else seed
+        self._rng: Optional["random.Random"] = None
+        self.saves = save_store if saves is None else saves
+        self._hints: Optional["HintTracker"] = None
+        self.metrics = metrics
+
+    @property
+    def hints(self) -> "HintTracker":
+        """Plan de pistas; pistas (y el solucionador) se importa y planifica la primera vez que hace falta"""
+        if self._hints is None:
+            from pistas import HintTracker
+            self._hints = HintTracker(self.game_state)
+        return self._hints
+
+    @property
+    def rng(self) -> "random.Random":
+        """Números aleatorios de las pistas genéricas; random se importa la primera vez que hacen falta"""
+        if self._rng is None:
+            import random
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+def play_room(game_state: GameState, room: int, world: World, autosave: Optional[AutoSaver] = None,
+              journal: Optional[Journal] = None, metrics: Optional[Metrics] = None) -> str:
+    """Jugar desde una habitación. Devuelve el resultado: 'escaped', 'timeout' o 'quit'"""
+    game_state.room = room
+    run = start_session(game_state, world, autosave, journal, metrics=metrics)
+    io = get_io()
+    while not run.done:
+        # El tiempo límite vence aunque el jugador no llegue a pulsar Enter
+        feed_line(run, io.read_before(run.prompt, game_state.start_time + game_state.time_limit))
+    if autosave is not None:
+        # Guardar el final de la partida antes de volver
+        autosave.request(game_state)
+        autosave.wait(timeout=5)
+    return run.state
+
+def start_session(game_state: GameState, world: World, autosave: Optional[AutoSaver] = None,
+                  journal: Optional[Journal] = None, seed: Optional[int] = None,
+                  now: Optional[float] = None, saves: Optional[SaveStore] = None,
+                  metrics: Optional[Metrics] = None) -> MachineRun:
+    """Empezar una partida que se alimenta con feed_line(), sin bloquear en read().
+
+    Con metrics, cada turno apunta en él sus latencias y contadores (ver metricas.py).
+    """
+    if now is None:
+        now = journal.header["now"] if journal is not None else time.time()
+    game_state.now = now
+    session = GameSession(game_state, world, autosave, journal, seed, saves, metrics)
+    if metrics is None:
+        return GAME_MACHINE.start(session, "turn")
+    metrics.count("sessions")
+    token = _current_metrics.set(metrics)
+    try:
+        return GAME_MACHINE.start(session, "turn")
+    finally:
+        _current_metrics.reset(token)
+
+def feed_line(run: MachineRun, line: Optional[str], now: Optional[float] = None) -> None:
+    """Entregar una línea a la partida (None si se agotó el tiempo) con la hora del turno.
+
+    La hora se fija una vez por turno y se apunta en el diario junto con la línea,
+    así que repetir el diario da exactamente la misma partida.
+    """
+    session: GameSession = run.context
+    session.game_state.now = time.time() if now is None else now
+    if session.journal is not None:
+        session.journal.record(session.game_state.now, line)
+    if session.metrics is None:
+        _deliver(run, line)
+    else:
+        _deliver_measured(run, line, session.metrics)
+
+def _deliver(run: MachineRun, line: Optional[str]) -> None:
+    if line is None:
+        run.interrupt(time_up_state)
+    else:
+        run.feed(line)
+
+# Contador de cada final de partida
+OUTCOME_COUNTERS = {"escaped": "escapes", "timeout": "timeouts", "quit": "quits"}
+
+def _deliver_measured(run: MachineRun, line: Optional[str], metrics: Metrics) -> None:
+    """_deliver() midiendo el turno entero, con las métricas a mano de los paneles.
+
+    Llaves, tesoros, habitaciones y pistas se cuentan comparando el estado antes y
+    después del turno, así que sin métricas los eventos no pagan nada.
+    """
+    game_state: GameState = run.context.game_state
+    before = (game_state.key_count, game_state.treasure_count, game_state.room, game_state.hints_remaining)
+    token = _current_metrics.set(metrics)
+    start = time.perf_counter()
+    try:
+        _deliver(run, line)
+    finally:
+        metrics.observe("turn", time.perf_counter() - start)
+        _current_metrics.reset(token)
+    keys, treasures, room, hints = before
+    for name, found in (("keys_found", game_state.key_count - keys),
+                        ("treasures_found", game_state.treasure_count - treasures),
+                        ("rooms_entered", int(game_state.room != room)),
+                        ("hints_used", hints - game_state.hints_remaining)):
+        if found > 0:
+            metrics.count(name, amount=found)
+    if run.done:
+        metrics.count(OUTCOME_COUNTERS.get(run.state, run.state))
+
+def turn_state(session: GameSession, _: Optional[str] = None) -> str:
+    """Comprobar el tiempo límite y presentar la habitación actual"""
+    game_state = session.game_state
+    if game_state.now - game_state.start_time > game_state.time_limit:
+        return time_up_state(session)
+    if session.autosave is not None:
+        session.autosave.tick(game_state)
+    # Avanzar el plan de pistas (si ya se pidió alguna) con lo que haya cambiado en el turno anterior
+    if session._hints is not None:
+        session._hints.update(game_state)
+    
+    write(f"\n{GameColors.ROOM}Estás en: {session.world.names[game_state.room]}{GameColors.RESET}")
+    return "command"
+
+def time_up_state(session: GameSession, _: Optional[str] = None) -> str:
+    """Terminar la partida porque se agotó el tiempo límite"""
+    write(f"{GameColors.ERROR}¡Se ha agotado el tiempo! Game Over.{GameColors.RESET}")
+    write(GameArt.GAME_OVER)
+    return "timeout"
+
+def command_state(session: GameSession, line: str) -> str:
+    """Separar la línea en palabras y ejecutar el comando"""
+    command = line.strip().lower().split()
+    if not command:
+        return "turn"
+    return process_command(session, command)
+
+def process_command(session: GameSession, command: List[str]) -> str:
+    """Ejecutar un comando ya separado en palabras. Devuelve el siguiente estado"""
+    metrics = session.metrics
+    if metrics is not None:
+        start = time.perf_counter()
+    argument = " ".join(command[1:])
+    candidates, suggestions = COMMANDS.resolve(command[0], bool(argument))
+    
+    if len(candidates) > 1:
+        names = ", ".join(c.name for c in candidates)
+        write(f"{GameColors.HINT}¿Qué comando quieres usar? {names}{GameColors.RESET}")
+        return "turn"
+    if not candidates or (candidates[0].required and not argument):
+        write(f"{GameColors.ERROR}Comando no válido. Escribe 'help' para ver los comandos disponibles.{GameColors.RESET}")
+        if suggestions:
+            write(f"{GameColors.HINT}¿Quisiste decir '{suggestions[0].name}'?{GameColors.RESET}")
+        if metrics is not None:
+            metrics.count("invalid_commands")
+        return "turn"
+    
+    action = candidates[0]
+    if action.takes == "room" and argument:
+        index = room_index(session.world, session.game_state.room)
+        argument = resolve_item(index, argument, "No encuentras ese objeto en esta habitación.")
+        if argument is None:
+            return "turn"
+    if metrics is None:
+        return action.handler(session, argument) or check_victory(session)
+    
+    labels = (("command", action.name),)
+    handler_start = time.perf_counter()
+    metrics.observe("parse", handler_start - start)
+    metrics.count("commands", labels)
     try:
-        with open('savegame.json', 'r') as f:
-            save_data = json.load(f)
-        print(f"{GameColors.SUCCESS}¡Partida cargada exitosamente!{GameColors.RESET}")
-        return save_data["game_state"]
-    except FileNotFoundError:
-        print(f"{GameColors.ERROR}No se encontró ninguna partida guardada.{GameColors.RESET}")
+        next_state = action.handler(session, argument)
+    finally:
+        metrics.observe("command", time.perf_counter() - handler_start, labels)
+    return next_state or check_victory(session)
+
+def resolve_item(index: NameIndex, query: str, missing: str) -> Optional[str]:
+    """Completar un nombre abreviado entre los de index. Devuelve None si no hay uno solo"""
+    matches, suggestions = index.resolve(query)
+    names = index.names
+    if len(matches) == 1:
+        return names[matches[0]]
+    if matches:
+        write(f"{GameColors.HINT}¿A cuál te refieres? {', '.join(names[i] for i in matches)}{GameColors.RESET}")
+        return None
+    write(f"{GameColors.ERROR}{missing}{GameColors.RESET}")
+    if suggestions:
+        write(f"{GameColors.HINT}¿Quisiste decir '{names[suggestions[0]]}'?{GameColors.RESET}")
+    return None
+
+# Comandos del juego: manejador(sesión, argumento) -> siguiente estado, o None para seguir jugando
+COMMANDS = CommandTable()
+
+@COMMANDS.register("quit")
+def quit_command(session: GameSession, _: str) -> str:
+    return "confirm_quit"
+
+@COMMANDS.register("help")
+def help_command(session: GameSession, _: str) -> None:
+    print_help()
+
+@COMMANDS.register("map")
+def map_command(session: GameSession, _: str) -> None:
+    print_map(session.game_state, session.world)
+
+@COMMANDS.register("status")
+def status_command(session: GameSession, _: str) -> None:
+    print_status(session.game_state)
+
+@COMMANDS.register("explore")
+def explore_command(session: GameSession, _: str) -> None:
+    explore_room(session.world, session.game_state.room)
+
+@COMMANDS.register("examine", takes="room", required=True)
+def examine_command(session: GameSession, item_name: str) -> Optional[str]:
+    next_room = examine_item(session.game_state, session.world, item_name)
+    if next_room is not None:
+        session.pending_room = next_room
+        return "confirm_door"
+    return None
+
+@COMMANDS.register("push", takes="room", required=True)
+def push_command(session: GameSession, item_name: str) -> None:
+    push_item(session.game_state, session.world, item_name)
+
+@COMMANDS.register("inventory", takes="inventory")
+def inventory_command(session: GameSession, argument: str) -> None:
+    handle_inventory_command(session.game_state, ["inventory"] + argument.split())
+
+@COMMANDS.register("hint")
+def hint_command(session: GameSession, _: str) -> None:
+    get_hint(session.game_state, session.world, session.rng, session.hints)
+
+@COMMANDS.register("achievements")
+def achievements_command(session: GameSession, _: str) -> None:
+    print_achievements(session.game_state)
+
+@COMMANDS.register("save")
+def save_command(session: GameSession, slot: str) -> None:
+    if save_game(session.game_state, slot or "default", session.saves):
+        write(GameArt.SAVE)
+
+@COMMANDS.register("load")
+def load_command(session: GameSession, slot: str) -> None:
+    if load_game(session.game_state, slot or "default", session.saves, session.journal):
+        write(GameArt.LOAD)
+        print_status(session.game_state)
+
+def confirm_door_state(session: GameSession, answer: str) -> str:
+    """Entrar en la habitación de la puerta abierta si el jugador responde 'si'"""
+    next_room, session.pending_room = session.pending_room, None
+    if answer.strip().lower() == 'si':
+        session.game_state.room = next_room
+        print_map(session.game_state, session.world)
+        GAME_EVENTS.publish(ROOM_ENTERED, session.game_state, next_room)
+    return check_victory(session)
+
+def confirm_quit_state(session: GameSession, answer: str) -> str:
+    """Salir del juego si el jugador lo confirma"""
+    if answer.lower() == "si":
+        write(GameArt.GAME_OVER)
+        return "quit"
+    return "turn"
+
+def check_victory(session: GameSession) -> str:
+    """Terminar la partida si el jugador llegó a la habitación objetivo"""
+    if session.game_state.room == session.game_state.target_room:
+        GAME_EVENTS.publish(ESCAPED, session.game_state, session.game_state.room)
+        victory_sequence(session.game_state)
+        return "escaped"
+    return "turn"
+
+# Bucle de juego: estado -> (prompt, manejador). Los estados sin prompt se ejecutan solos
+GAME_MACHINE = StateMachine({
+    "turn": (None, turn_state),
+    "command": (lambda session: f"{GameColors.HINT}¿Qué quieres hacer? {GameColors.RESET}", command_state),
+    "confirm_door": (lambda session: f"{GameColors.HINT}¿Quieres entrar a la siguiente habitación? (si/no): {GameColors.RESET}", confirm_door_state),
+    "confirm_quit": (lambda session: "¿Seguro que quieres salir? (si/no): ", confirm_quit_state),
+}, final=("escaped", "timeout", "quit"))
+
+def explore_room(world: World, room_id: int) -> None:
+    """Explorar una habitación"""
+    room = world.objects[room_id]
+    items = list(world.room_items[room_id])
+    write(f"\n{GameColors.ROOM}Exploras {room['name']}.{GameColors.RESET}")
+    write(room["description"])
+    write(f"{GameColors.ITEM}Objetos encontrados: {', '.join(items)}{GameColors.RESET}")
+
+def examine_item(game_state: GameState, world: World, item_name: str) -> Optional[int]:
+    """Examinar un objeto. Devuelve la habitación siguiente si se abrió una puerta"""
+    item_id = world.find_in_room(game_state.room, item_name)
+    
+    if item_id is not None:
+        if world.types[item_id] == "door":
+            return handle_door(game_state, world, item_id)
+        handle_furniture(game_state, world, item_id)
         return None
+    
+    write(f"{GameColors.ERROR}No encuentras ese objeto en esta habitación.{GameColors.RESET}")
+    return None
+
+@measured("storage", operation="save")
+def save_game(game_state: GameState, slot: str = "default", store: Optional[SaveStore] = None) -> bool:
+    """Guardar el estado actual del juego en una ranura con nombre"""
+    store = save_store if store is None else store
+    try:
+        store.save(slot, game_state)
+    except (SaveError, OSError) as error:
+        write(f"{GameColors.ERROR}No se pudo guardar la partida: {error}{GameColors.RESET}")
+        return False
+    write(f"{GameColors.SUCCESS}¡Partida guardada exitosamente en '{slot}'!{GameColors.RESET}")
+    return True
+
+@measured("storage", operation="load")
+def load_game(game_state: GameState, slot: str = "default", store: Optional[SaveStore] = None,
+              journal: Optional[Journal] = None) -> bool:
+    """Cargar una partida guardada sobre el estado actual; el diario apunta lo que se cargó"""
+    store = save_store if store is None else store
+    try:
+        saved_at = store.load(slot, game_state)
+    except (SaveError, OSError) as error:
+        if journal is not None:
+            journal.record_load(None, str(error))
+        write(f"{GameColors.ERROR}{error}{GameColors.RESET}")
+        slots = store.slots()
+        if slots:
+            write(f"{GameColors.HINT}Partidas guardadas: {', '.join(slots)}{GameColors.RESET}")
+        return False
+    if journal is not None:
+        journal.record_load(capture(game_state))
+    write(f"{GameColors.SUCCESS}¡Partida cargada exitosamente! (guardada el {last_saved(saved_at)}){GameColors.RESET}")
+    return True
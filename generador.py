@@ -0,0 +1,237 @@
+"""
+Generador de mansiones
+----------------------
+Crea mundos aleatorios (con semilla, así que la misma semilla da la misma
+mansión) de 10 a 100.000 habitaciones en el formato object_relations del
+notebook, para medir cómo escala cada parte del motor.
+
+Las habitaciones se colocan en una cuadrícula haciendo crecer un árbol desde
+la habitación inicial: cada habitación nueva se pega a una ya colocada y la
+puerta entre ambas es una arista del árbol. Así cada habitación tiene su
+posición en el mapa (campo "position") y un orden de creación en el que su
+"padre" siempre va antes.
+
+La mansión siempre tiene solución: la llave de la puerta por la que se entra
+a una habitación se esconde en su padre o en uno de sus antepasados, que se
+alcanzan sin cruzar esa puerta. Por inducción sobre el orden de creación,
+toda la mansión (y la salida, pegada a la habitación más profunda) se puede
+recorrer. Las puertas extra entre vecinos forman ciclos opcionales. Los
+muebles guardan varios objetos apilados (se sacan del último al primero,
+como en GameState.next_content), con tesoros encima de algunas llaves.
+
+No hay muebles dentro de muebles: el motor, el esquema de cargador.py
+("furniture" solo contiene "key" y "treasure"), el solucionador y el entorno
+por lotes solo conocen una pila de objetos por mueble. El anidamiento se
+hace con esas pilas: para llegar a una llave hay que sacar antes lo que
+tiene encima, igual que habría que abrir antes el cofre que la contiene.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+Position = Tuple[int, int]
+
+_NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+FURNITURE_KINDS = ("chest", "wardrobe", "desk", "cabinet", "bookcase", "trunk", "dresser", "sideboard")
+TREASURE_KINDS = ("ancient book", "crystal orb", "mystic amulet", "golden chalice", "silver mirror",
+                  "jade figurine", "ruby ring", "old map")
+
+# Pocos textos compartidos: con 100.000 habitaciones no conviene un texto por objeto
+ROOM_TEXTS = (
+    "Una sala en penumbra con el papel de las paredes despegado.",
+    "Un pasillo estrecho donde el suelo cruje a cada paso.",
+    "Una habitación polvorienta con muebles cubiertos por sábanas.",
+    "Un salón frío iluminado por una lámpara que parpadea.",
+)
+FURNITURE_TEXT = "Un mueble antiguo con cajones que no cierran del todo."
+DOOR_TEXT = "Una puerta de madera con una cerradura de hierro."
+DOOR_MECHANISM = "Necesita su llave."
+KEY_HINT = "Una llave de hierro con un número grabado."
+KEY_STORY = "Alguien la escondió aquí hace mucho tiempo."
+TREASURE_TEXT = "Un objeto valioso olvidado por los antiguos dueños."
+TREASURE_POWER = "Brilla con luz propia."
+
+
+@dataclass
+class Mansion:
+    """Mundo generado: relaciones como en el notebook y posición de cada habitación"""
+    object_relations: Dict[str, List[Dict[str, Any]]]
+    rooms: Dict[str, Dict[str, Any]]  # nombre -> habitación
+    start: Dict[str, Any]
+    target: Dict[str, Any]
+    layout: Dict[str, Position] = field(default_factory=dict)  # nombre -> (columna, fila)
+    seed: Optional[int] = None
+
+    def initial_state(self, achievements: Optional[Dict[str, Dict[str, Any]]] = None,
+                      **config: Any) -> Dict[str, Any]:
+        """Estado inicial como INIT_GAME_STATE del notebook; config añade o cambia claves"""
+        state = {
+            "current_room": self.start,
+            "keys_collected": [],
+            "target_room": self.target,
+            "treasure_collected": [],
+            "hints_remaining": 3,
+            "time_limit": 1800,
+            "achievements": achievements or {},
+            "examined_objects": set(),
+            "difficulty": "normal",
+        }
+        state.update(config)
+        return state
+
+    def to_document(self) -> Dict[str, Any]:
+        """La mansión en el formato de archivo de cargador.py, para guardarla como JSON"""
+        sections: Dict[str, Dict[str, Any]] = {
+            "rooms": {}, "furniture": {}, "doors": {}, "keys": {}, "treasures": {}
+        }
+        section_of = {"room": "rooms", "furniture": "furniture", "door": "doors",
+                      "key": "keys", "treasure": "treasures"}
+        for items in self.object_relations.values():
+            for obj in items:
+                entry = {name: value for name, value in obj.items() if name != "type"}
+                if obj["type"] == "key":
+                    entry["target"] = obj["target"]["name"]
+                if obj["type"] == "room" and "position" in entry:
+                    entry["position"] = list(entry["position"])
+                sections[section_of[obj["type"]]][obj["name"]] = entry
+        return {
+            "format": 1,
+            "start": self.start["name"],
+            "target": self.target["name"],
+            **sections,
+            "relations": {owner: [obj["name"] for obj in items]
+                          for owner, items in self.object_relations.items()},
+        }
+
+
+def _grow(count: int, rng: random.Random) -> Tuple[List[Position], List[int]]:
+    """Colocar count casillas pegadas en la cuadrícula; devuelve posiciones y padre de cada una"""
+    cells = [(0, 0)]
+    parents = [-1]
+    index = {(0, 0): 0}
+    frontier = [(0, 0)]  # casillas ya colocadas que pueden tener vecinos libres
+    while len(cells) < count:
+        slot = rng.randrange(len(frontier))
+        x, y = frontier[slot]
+        free = [(x + dx, y + dy) for dx, dy in _NEIGHBOURS if (x + dx, y + dy) not in index]
+        if not free:
+            # Sacar de la frontera en O(1): se cambia por la última
+            frontier[slot] = frontier[-1]
+            frontier.pop()
+            continue
+        cell = rng.choice(free)
+        index[cell] = len(cells)
+        parents.append(index[(x, y)])
+        cells.append(cell)
+        frontier.append(cell)
+    return cells, parents
+
+
+def generate_mansion(rooms: int = 50, seed: Optional[int] = None, extra_doors: float = 0.15,
+                     treasure_ratio: float = 0.2, key_distance: int = 3) -> Mansion:
+    """Generar una mansión con solución de rooms habitaciones (más la salida).
+
+    extra_doors: puertas opcionales entre vecinos por cada habitación.
+    treasure_ratio: tesoros por cada llave.
+    key_distance: cuántos antepasados hacia atrás puede estar la llave de una puerta.
+    """
+    if rooms < 1:
+        raise ValueError("La mansión necesita al menos una habitación")
+    rng = random.Random(seed)
+    cells, parents = _grow(rooms, rng)
+    depth = [0] * rooms
+    for i in range(1, rooms):
+        depth[i] = depth[parents[i]] + 1
+
+    # La salida se pega a la habitación más profunda que tenga un vecino libre
+    index = {cell: i for i, cell in enumerate(cells)}
+    exit_from, exit_cell = -1, None
+    for i in sorted(range(rooms), key=depth.__getitem__, reverse=True):
+        x, y = cells[i]
+        free = [(x + dx, y + dy) for dx, dy in _NEIGHBOURS if (x + dx, y + dy) not in index]
+        if free:
+            exit_from, exit_cell = i, rng.choice(free)
+            break
+
+    # Posiciones desde (0, 0) para el mapa
+    left = min(min(x for x, _ in cells), exit_cell[0])
+    top = min(min(y for _, y in cells), exit_cell[1])
+    room_objs = [{"name": f"room {i}", "type": "room", "description": rng.choice(ROOM_TEXTS),
+                  "position": (x - left, y - top)} for i, (x, y) in enumerate(cells)]
+    outside = {"name": "outside", "type": "room",
+               "description": "¡La libertad te espera! El aire fresco nunca se había sentido tan bien.",
+               "position": (exit_cell[0] - left, exit_cell[1] - top)}
+
+    relations: Dict[str, List[Dict[str, Any]]] = {room["name"]: [] for room in room_objs}
+    relations["outside"] = []
+    # Objetos que se esconderán en cada habitación, en orden de apilado
+    stash: List[List[Dict[str, Any]]] = [[] for _ in range(rooms)]
+
+    def holder_for(room: int) -> int:
+        """Antepasado de room (de 0 a key_distance niveles por encima de su padre)"""
+        holder = parents[room]
+        for _ in range(rng.randrange(key_distance)):
+            if parents[holder] < 0:
+                break
+            holder = parents[holder]
+        return holder
+
+    treasures = 0
+
+    def add_door(a: int, b_room: Dict[str, Any], holder: int) -> None:
+        nonlocal treasures
+        number = len(doors)
+        door = {"name": f"door {number}", "type": "door", "description": DOOR_TEXT, "mechanism": DOOR_MECHANISM}
+        doors.append(door)
+        relations[room_objs[a]["name"]].append(door)
+        relations[b_room["name"]].append(door)
+        relations[door["name"]] = [room_objs[a], b_room]
+        key = {"name": f"key for door {number}", "type": "key", "target": door,
+               "hint": KEY_HINT, "story": KEY_STORY}
+        stash[holder].append(key)
+        if rng.random() < treasure_ratio:
+            # El tesoro va encima de la llave: hay que sacarlo antes
+            treasures += 1
+            stash[holder].append({"name": f"{rng.choice(TREASURE_KINDS)} {treasures}", "type": "treasure",
+                                  "description": TREASURE_TEXT, "power": TREASURE_POWER,
+                                  "value": rng.randrange(500, 2500, 100)})
+
+    doors: List[Dict[str, Any]] = []
+    for i in range(1, rooms):
+        add_door(parents[i], room_objs[i], holder_for(i))
+    # La llave de la salida, en la propia habitación más profunda
+    add_door(exit_from, outside, exit_from)
+
+    # Ciclos opcionales: puertas entre vecinos que aún no están unidos
+    joined = {(min(i, parents[i]), max(i, parents[i])) for i in range(1, rooms)}
+    for _ in range(int(extra_doors * rooms)):
+        a = rng.randrange(rooms)
+        x, y = cells[a]
+        dx, dy = rng.choice(_NEIGHBOURS)
+        b = index.get((x + dx, y + dy))
+        if b is None or (min(a, b), max(a, b)) in joined:
+            continue
+        joined.add((min(a, b), max(a, b)))
+        later = max(a, b)
+        add_door(min(a, b), room_objs[later], holder_for(later))
+
+    # Cada habitación reparte lo suyo en uno a tres muebles
+    for i, items in enumerate(stash):
+        kinds = rng.sample(FURNITURE_KINDS, rng.randint(1, 3))
+        pieces = [{"name": f"{kind} {i}", "type": "furniture", "description": FURNITURE_TEXT} for kind in kinds]
+        for piece in pieces:
+            relations[room_objs[i]["name"]].append(piece)
+            relations[piece["name"]] = []
+        for item in items:
+            # Cada llave elige mueble y su tesoro (que va justo después) la tapa en el mismo
+            if item["type"] == "key":
+                piece = rng.choice(pieces)
+            relations[piece["name"]].append(item)
+
+    layout = {room["name"]: room["position"] for room in room_objs}
+    layout["outside"] = outside["position"]
+    all_rooms = {room["name"]: room for room in room_objs}
+    all_rooms["outside"] = outside
+    return Mansion(relations, all_rooms, room_objs[0], outside, layout, seed)
@@ -0,0 +1,300 @@
+"""
+Partidas guardadas
+------------------
+Guardado por ranuras con nombre. Cada ranura es un archivo de líneas JSON:
+la primera línea es una foto completa del progreso y las siguientes son los
+cambios (deltas) desde el guardado anterior, así que guardar cuesta lo que
+ha cambiado y no lo que mide el mundo.
+
+El progreso se guarda con los ids enteros y los conjuntos de bits del
+GameState, junto con una huella del mundo compilado para no cargar una
+partida sobre otro mundo. La foto completa se escribe en un archivo temporal
+que luego se renombra, y cada delta se añade con una sola escritura: si el
+programa se corta a medias, como mucho se pierde la última línea.
+
+AutoSaver guarda cada pocos turnos o segundos sin bloquear el turno: en el
+hilo del juego solo se copian unos enteros y la escritura (con su fsync) la
+hace un hilo aparte. Si llega otro guardado mientras se escribe el anterior,
+solo se escribe el más reciente. close() escribe lo pendiente y termina el
+hilo, así que cada partida lo cierra al acabar.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from estado import GameState
+from mundo import World
+
+# Campos del GameState que forman el progreso de una partida
+FIELDS = (
+    "room", "keys", "treasures", "removed", "examined", "opened", "unlocked",
+    "treasure_value", "hints_remaining", "start_time",
+)
+
+SUFFIX = ".sav"
+_SLOT_NAME = re.compile(r"[\w-]{1,40}")
+
+
+class SaveError(Exception):
+    """La ranura no existe, tiene un nombre no válido o no corresponde a este mundo"""
+
+
+_fingerprints: "WeakKeyDictionary[World, int]" = WeakKeyDictionary()
+
+
+def world_fingerprint(world: World) -> int:
+    """Huella de los nombres del mundo en orden de id: cambia si cambian los ids"""
+    fingerprint = _fingerprints.get(world)
+    if fingerprint is None:
+        fingerprint = _fingerprints[world] = zlib.crc32("\0".join(world.names).encode("utf-8"))
+    return fingerprint
+
+
+def capture(state: GameState) -> Dict[str, Any]:
+    """Progreso de la partida como diccionario de enteros"""
+    return {field: getattr(state, field) for field in FIELDS}
+
+
+def restore(state: GameState, progress: Dict[str, Any]) -> None:
+    """Poner en state un progreso de capture()"""
+    for field in FIELDS:
+        if field in progress:
+            setattr(state, field, progress[field])
+    if "removed" not in progress:
+        # Partidas y diarios de antes de removed: solo se sacaban llaves y tesoros
+        state.removed = state.keys | state.treasures
+
+
+# JSON no convierte enteros de más de 4300 cifras, y los conjuntos de bits de un
+# mundo de cientos de miles de objetos los pasan: esos se escriben en hexadecimal
+_HEX_FROM = 1 << 64
+
+
+def encode_progress(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Progreso listo para JSON: los enteros grandes como texto "0x..." """
+    return {field: hex(value) if isinstance(value, int) and value >= _HEX_FROM else value
+            for field, value in progress.items()}
+
+
+def decode_progress(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Deshacer encode_progress"""
+    return {field: int(value, 16) if isinstance(value, str) and value.startswith("0x") else value
+            for field, value in progress.items()}
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class SaveStore:
+    """Ranuras de guardado dentro de un directorio"""
+
+    def __init__(self, directory: str = "partidas", compact_every: int = 32):
+        self.directory = directory
+        self.compact_every = compact_every  # deltas antes de reescribir la foto completa
+        # ranura -> (progreso guardado, deltas desde la foto, tamaño del archivo tras escribir)
+        self._written: Dict[str, Tuple[Dict[str, Any], int, int]] = {}
+        # El autoguardado escribe desde otro hilo
+        self._lock = threading.Lock()
+
+    def path(self, slot: str) -> str:
+        if not _SLOT_NAME.fullmatch(slot):
+            raise SaveError(f"Nombre de partida no válido: '{slot}'")
+        return os.path.join(self.directory, slot + SUFFIX)
+
+    def slots(self) -> List[str]:
+        """Nombres de las ranuras guardadas, de la más reciente a la más antigua"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and entry.name.endswith(SUFFIX)]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [entry.name[:-len(SUFFIX)] for entry in entries]
+
+    def save(self, slot: str, state: GameState) -> int:
+        """Guardar la partida en la ranura; devuelve los bytes escritos"""
+        return self.save_progress(slot, state.world, capture(state))
+
+    def save_progress(self, slot: str, world: World, progress: Dict[str, Any]) -> int:
+        """Guardar un progreso ya capturado con capture()"""
+        path = self.path(slot)
+        with self._lock:
+            return self._save(slot, path, world, progress)
+
+    def _save(self, slot: str, path: str, world: World, progress: Dict[str, Any]) -> int:
+        written = self._written.get(slot)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = -1
+        # Solo se añade un delta si el archivo sigue como lo dejamos y no hay demasiados
+        if written is None or written[2] != size or written[1] >= self.compact_every:
+            return self._write_snapshot(slot, path, world, progress)
+
+        previous, deltas, _ = written
+        changes = {field: value for field, value in progress.items() if previous[field] != value}
+        if not changes:
+            return 0
+        data = _dumps({"time": time.time(), "delta": encode_progress(changes)})
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._written[slot] = (progress, deltas + 1, size + len(data))
+        return len(data)
+
+    def _write_snapshot(self, slot: str, path: str, world: World, progress: Dict[str, Any]) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        data = _dumps({"world": world_fingerprint(world), "time": time.time(),
+                       "state": encode_progress(progress)})
+        import tempfile  # solo al escribir: no retrasa el arranque
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix="." + slot, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._written[slot] = (progress, 0, len(data))
+        return len(data)
+
+    def read(self, slot: str, world: World) -> Tuple[Dict[str, Any], float]:
+        """Progreso guardado en la ranura y la hora del último guardado"""
+        path = self.path(slot)
+        try:
+            with open(path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            raise SaveError(f"No hay ninguna partida guardada con el nombre '{slot}'") from None
+
+        try:
+            snapshot = json.loads(lines[0])
+        except (IndexError, ValueError):
+            raise SaveError(f"La partida '{slot}' está dañada") from None
+        if snapshot.get("world") != world_fingerprint(world):
+            raise SaveError(f"La partida '{slot}' es de otro mundo")
+
+        progress = decode_progress(snapshot["state"])
+        saved_at = snapshot["time"]
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # última línea cortada a medias: se ignora
+            progress.update(decode_progress(record["delta"]))
+            saved_at = record["time"]
+        return progress, saved_at
+
+    def load(self, slot: str, state: GameState) -> float:
+        """Restaurar la partida de la ranura sobre state; devuelve la hora del guardado"""
+        progress, saved_at = self.read(slot, state.world)
+        restore(state, progress)
+        return saved_at
+
+    def delete(self, slot: str) -> None:
+        path = self.path(slot)
+        with self._lock:
+            self._written.pop(slot, None)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class AutoSaver:
+    """Autoguardado de una partida cada every_turns turnos o every_seconds segundos"""
+
+    def __init__(self, store: SaveStore, slot: str = "autosave", every_turns: int = 5,
+                 every_seconds: float = 60):
+        store.path(slot)  # comprobar el nombre ya, no en el hilo de escritura
+        self.store = store
+        self.slot = slot
+        self.every_turns = every_turns
+        self.every_seconds = every_seconds
+        self.turns = 0
+        self.last = time.monotonic()
+        self.saved = 0
+        self.error: Optional[Exception] = None  # último fallo de escritura, si lo hubo
+        self._pending: Optional[Tuple[World, Dict[str, Any]]] = None
+        self._writing = False
+        self._closed = False
+        self._ready = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def tick(self, state: GameState) -> bool:
+        """Contar un turno y pedir un guardado si toca; devuelve si se pidió"""
+        self.turns += 1
+        if self.turns < self.every_turns and time.monotonic() - self.last < self.every_seconds:
+            return False
+        self.request(state)
+        return True
+
+    def request(self, state: GameState) -> None:
+        """Pedir un guardado del estado actual; vuelve sin esperar a la escritura"""
+        self.turns = 0
+        self.last = time.monotonic()
+        snapshot = (state.world, capture(state))
+        with self._ready:
+            # Si aún no se escribió el anterior, se sustituye: solo importa el más reciente
+            self._pending = snapshot
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="autosave", daemon=True)
+                self._worker.start()
+            self._ready.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._ready:
+                while self._pending is None and not self._closed:
+                    self._ready.wait()
+                if self._pending is None:
+                    return  # cerrado y sin nada pendiente
+                (world, progress), self._pending = self._pending, None
+                self._writing = True
+            try:
+                self.store.save_progress(self.slot, world, progress)
+                self.saved += 1
+            except (SaveError, OSError) as error:
+                self.error = error
+            with self._ready:
+                self._writing = False
+                self._ready.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que se escriba lo pendiente (p. ej. al terminar la partida)"""
+        with self._ready:
+            return self._ready.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Escribir lo pendiente y terminar el hilo de escritura; devuelve si terminó a tiempo"""
+        with self._ready:
+            self._closed = True
+            worker = self._worker
+            self._ready.notify_all()
+        if worker is None:
+            return True
+        worker.join(timeout)
+        if worker.is_alive():
+            return False
+        self._worker = None
+        return True
+
+
+def last_saved(saved_at: float) -> str:
+    """Hora de guardado legible"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(saved_at))
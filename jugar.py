@@ -0,0 +1,76 @@
+"""
+Jugar
+-----
+Punto de entrada de la terminal: carga un mundo (la mansión del notebook si
+no se indica otro) y empieza una partida sin pasar por el notebook.
+
+    python -m jugar
+    python -m jugar mundos/mansion.json --difficulty hard --player Ana
+
+El arranque hasta el primer prompt se mide en rendimiento.py (cold_start).
+Para que quede en decenas de milisegundos, el mundo se lee de la caché
+compilada de cargador.py y el motor no importa al arrancar lo que la partida
+quizá no use: colorama (solo en la consola de Windows), pistas y el
+solucionador (con la primera pista, que es cuando se planifica), random
+(pistas genéricas), tomllib (mundos TOML), sqlite3 (clasificación, al
+escapar) ni tempfile (al guardar).
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+DEFAULT_WORLD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mundos", "mansion.json")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m jugar", description="Jugar al Escape Room en la terminal")
+    parser.add_argument("world", nargs="?", default=DEFAULT_WORLD, help="archivo del mundo (.json o .toml)")
+    parser.add_argument("--difficulty", choices=("easy", "normal", "hard"), help="dificultad de la partida")
+    parser.add_argument("--time-limit", type=int, help="tiempo límite en segundos")
+    parser.add_argument("--hints", type=int, help="pistas disponibles")
+    parser.add_argument("--player", default="jugador", help="nombre en la clasificación")
+    parser.add_argument("--no-sound", action="store_true", help="sin efectos de sonido")
+    parser.add_argument("--no-autosave", action="store_true", help="sin autoguardado")
+    parser.add_argument("--no-journal", action="store_true", help="sin diario de la partida")
+    parser.add_argument("--no-leaderboard", action="store_true", help="no apuntar la partida en la clasificación")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # El motor se importa después de leer los argumentos: --help no lo carga
+    import funcionesfinal_v2 as game_engine
+    from cargador import WorldFileError, load_world
+
+    try:
+        loaded = load_world(args.world)
+    except (OSError, WorldFileError) as error:
+        print(f"No se puede cargar el mundo: {error}", file=sys.stderr)
+        return 2
+    game_state = loaded.initial_state()
+    if args.difficulty is not None:
+        game_state["difficulty"] = args.difficulty
+    if args.time_limit is not None:
+        game_state["time_limit"] = args.time_limit
+    if args.hints is not None:
+        game_state["hints_remaining"] = args.hints
+    game_state["player"] = args.player
+    game_state["sound_enabled"] = not args.no_sound
+    if args.no_autosave:
+        game_state["autosave_every"] = 0
+    if args.no_journal:
+        game_state["journal_dir"] = None
+    if args.no_leaderboard:
+        game_state["leaderboard"] = None
+    try:
+        game_engine.start_game(game_state, loaded.world)
+    except (EOFError, KeyboardInterrupt):
+        print()
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Máquina de estados
+------------------
+Bucle iterativo dirigido por tabla que usan los dos motores del juego.
+
+Cada estado tiene un prompt y un manejador. Los estados sin prompt se
+ejecutan solos; los que tienen prompt esperan una línea de entrada. El
+manejador recibe el contexto y la línea y devuelve el nombre del siguiente
+estado. Como el bucle nunca se llama a sí mismo, la profundidad de pila es
+constante por muchos turnos que dure la partida.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+Prompt = Optional[Callable[[Any], str]]
+Handler = Callable[[Any, Optional[str]], str]
+
+
+class StateMachine:
+    """Tabla de estados: nombre -> (prompt, manejador)"""
+
+    def __init__(self, table: Dict[str, Tuple[Prompt, Handler]], final: Iterable[str]):
+        self.table = table
+        self.final = frozenset(final)
+
+    def start(self, context: Any, state: str) -> "MachineRun":
+        """Empezar una ejecución que se alimenta línea a línea"""
+        return MachineRun(self, context, state)
+
+    def run(self, context: Any, state: str, read: Callable[[str], str]) -> str:
+        """Ejecutar hasta un estado final leyendo con read(); devuelve ese estado"""
+        run = self.start(context, state)
+        while not run.done:
+            run.feed(read(run.prompt))
+        return run.state
+
+
+class MachineRun:
+    """Ejecución en curso: avanza hasta el siguiente estado que necesita entrada"""
+    __slots__ = ("machine", "context", "state", "prompt")
+
+    def __init__(self, machine: StateMachine, context: Any, state: str):
+        self.machine = machine
+        self.context = context
+        self.state = state
+        self.prompt: Optional[str] = None
+        self._advance()
+
+    @property
+    def done(self) -> bool:
+        return self.state in self.machine.final
+
+    def feed(self, line: str) -> None:
+        """Entregar la línea que pide el prompt actual"""
+        if self.done:
+            raise RuntimeError(f"La máquina ya terminó en '{self.state}'")
+        _, handle = self.machine.table[self.state]
+        self.state = handle(self.context, line)
+        self._advance()
+
+    def interrupt(self, handle: Handler) -> None:
+        """Salir del estado actual con otro manejador, p. ej. cuando vence un plazo"""
+        if self.done:
+            return
+        self.state = handle(self.context, None)
+        self._advance()
+
+    def _advance(self) -> None:
+        table = self.machine.table
+        final = self.machine.final
+        while self.state not in final:
+            prompt, handle = table[self.state]
+            if prompt is not None:
+                self.prompt = prompt(self.context)
+                return
+            self.state = handle(self.context, None)
+        self.prompt = None
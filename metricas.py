@@ -0,0 +1,155 @@
+"""
+Métricas
+--------
+Contadores e histogramas de latencia de una partida (o de muchas juntas).
+
+El motor los rellena solo si la partida se empezó con un Metrics
+(start_session(..., metrics=Metrics())). Con metrics=None no se llama a
+time.perf_counter(): cada comando solo comprueba que no hay métricas, cada
+panel lee una ContextVar y los contadores salen de comparar el estado antes
+y después del turno. Lo que se mide:
+
+- turn: la línea completa, desde feed_line() hasta el siguiente prompt.
+- parse: resolver el comando y el objeto abreviados.
+- command{command=...}: el manejador de cada comando, paneles incluidos.
+- render{panel=...}: cada panel dibujado (status, map, inventory, achievements).
+- storage{operation=...}: guardar y cargar partidas (save, load).
+- sound: encolar un efecto de sonido.
+
+y los contadores commands{command=...}, invalid_commands, keys_found,
+treasures_found, rooms_entered, hints_used, sessions, escapes, timeouts y
+quits.
+
+Los histogramas tienen cubos fijos (de 1 µs a unos 16 s, duplicando), así
+que sumar los de muchas partidas es sumar listas: merge() junta las métricas
+de cada sesión en unas globales. Se exportan como texto de Prometheus o como
+líneas JSON.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Límites superiores de los cubos, en segundos
+BUCKETS: Tuple[float, ...] = tuple(1e-6 * 2 ** i for i in range(25))
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+class Histogram:
+    """Cuántas medidas caen en cada cubo, más su suma y su número"""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)  # el último: más que BUCKETS[-1]
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Límite superior del cubo donde cae el cuantil q (inf si cae por encima del último)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Contadores e histogramas por nombre y etiquetas"""
+
+    def __init__(self):
+        self.counters: Dict[Key, int] = {}
+        self.histograms: Dict[Key, Histogram] = {}
+
+    def count(self, name: str, labels: Labels = (), amount: int = 1) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, labels: Labels = ()) -> None:
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def merge(self, other: "Metrics") -> None:
+        """Sumar las métricas de other (de una sesión) a estas"""
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, histogram in other.histograms.items():
+            mine = self.histograms.get(key)
+            if mine is None:
+                mine = self.histograms[key] = Histogram()
+            mine.merge(histogram)
+
+    def counter(self, name: str, labels: Labels = ()) -> int:
+        return self.counters.get((name, labels), 0)
+
+    def histogram(self, name: str, labels: Labels = ()) -> Optional[Histogram]:
+        return self.histograms.get((name, labels))
+
+    def prometheus(self, prefix: str = "escape_room") -> str:
+        """Formato de texto de Prometheus: contadores _total e histogramas _seconds"""
+        lines: List[str] = []
+        for name in sorted({name for name, _ in self.counters}):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (other, labels), value in sorted(self.counters.items()):
+                if other == name:
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+        for name in sorted({name for name, _ in self.histograms}):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (other, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if other != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self, **extra: str) -> Iterator[str]:
+        """Una línea JSON por contador o histograma; extra se añade a todas (p. ej. session=...)"""
+        for (name, labels), value in sorted(self.counters.items()):
+            yield json.dumps({"metric": name, "type": "counter", "labels": dict(labels), "value": value, **extra},
+                             ensure_ascii=False)
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            yield json.dumps({"metric": name, "type": "histogram", "labels": dict(labels),
+                              "count": histogram.count, "sum": histogram.sum,
+                              "p50": _finite(histogram.quantile(0.5)), "p99": _finite(histogram.quantile(0.99)),
+                              "buckets": histogram.counts, **extra}, ensure_ascii=False)
+
+
+def _finite(bound: float) -> Optional[float]:
+    """JSON no admite infinito: un cuantil por encima del último cubo sale como null"""
+    return None if bound == float("inf") else bound
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
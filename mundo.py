@@ -0,0 +1,142 @@
+"""
+Mundo compilado
+---------------
+Convierte los diccionarios del notebook (habitaciones, muebles, puertas, llaves
+y object_relations) en un mundo indexado con identificadores enteros, mapas
+nombre -> objeto por habitación y una tabla de adyacencia de puertas.
+
+El mundo compilado es una plantilla inmutable que comparten todas las
+partidas; lo que cambia durante el juego vive en el GameState de cada sesión.
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+_EMPTY: Mapping = MappingProxyType({})
+
+
+def freeze(mapping: Dict) -> Mapping:
+    """Vista de solo lectura de un diccionario"""
+    return MappingProxyType(mapping)
+
+
+@dataclass(frozen=True, eq=False)
+class World:
+    """Mundo indexado e inmutable: cada objeto tiene un id entero estable.
+
+    Dos mundos solo son iguales si son el mismo objeto, así que se pueden usar
+    como clave de cachés (p. ej. los índices de nombres de comandos.py).
+    """
+    objects: Tuple[Mapping[str, Any], ...]  # id -> objeto (solo lectura)
+    names: Tuple[str, ...]  # id -> nombre
+    types: Tuple[str, ...]  # id -> tipo
+    ids: Mapping[str, int]  # nombre -> id
+    room_items: Mapping[int, Mapping[str, int]]  # habitación -> {nombre: id}
+    contents: Mapping[int, Tuple[int, ...]]  # contenedor -> ids de su contenido
+    door_rooms: Mapping[int, Tuple[int, ...]]  # puerta -> habitaciones que une
+    door_next: Mapping[int, Mapping[int, int]]  # habitación -> {puerta: habitación siguiente}
+    key_door: Mapping[int, int]  # llave -> puerta que abre
+    door_key: Mapping[int, int]  # puerta -> llave que la abre
+    achievements: Mapping[str, Mapping[str, Any]]  # logro -> definición
+    achievement_bits: Mapping[str, int]  # logro -> posición en el conjunto de bits
+
+    def id_of(self, obj: Mapping[str, Any]) -> int:
+        """Obtener el id de un objeto a partir de su diccionario"""
+        return self.ids[obj["name"]]
+
+    def find_in_room(self, room_id: int, item_name: str) -> Optional[int]:
+        """Buscar un objeto por nombre en una habitación en O(1)"""
+        return self.room_items.get(room_id, _EMPTY).get(item_name)
+
+    def next_room(self, room_id: int, door_id: int) -> Optional[int]:
+        """Habitación a la que lleva una puerta desde la habitación indicada"""
+        return self.door_next.get(room_id, _EMPTY).get(door_id)
+
+    def opens(self, key_id: int, door_id: int) -> bool:
+        """Comprobar si una llave abre una puerta comparando ids"""
+        return self.key_door.get(key_id) == door_id
+
+
+def compile_world(object_relations: Dict[str, List],
+                  achievements: Optional[Dict[str, Dict[str, Any]]] = None) -> World:
+    """Compilar object_relations (y los logros) en un mundo indexado e inmutable"""
+    objects: List[Mapping[str, Any]] = []
+    names: List[str] = []
+    types: List[str] = []
+    ids: Dict[str, int] = {}
+
+    def intern(obj: Dict[str, Any]) -> int:
+        obj_id = ids.get(obj["name"])
+        if obj_id is None:
+            obj_id = len(objects)
+            ids[obj["name"]] = obj_id
+            # Copia propia: el mundo no cambia aunque se editen los diccionarios originales
+            objects.append(freeze(dict(obj)))
+            names.append(obj["name"])
+            types.append(obj["type"])
+        return obj_id
+
+    for items in object_relations.values():
+        for obj in items:
+            intern(obj)
+    # Las habitaciones sin diccionario propio (p. ej. sin puertas que lleguen a ellas)
+    for name in object_relations:
+        if name not in ids:
+            intern({"name": name, "type": "room"})
+
+    room_items: Dict[int, Mapping[str, int]] = {}
+    contents: Dict[int, Tuple[int, ...]] = {}
+    door_rooms: Dict[int, Tuple[int, ...]] = {}
+    for name, items in object_relations.items():
+        owner = ids[name]
+        item_ids = tuple(ids[obj["name"]] for obj in items)
+        kind = types[owner]
+        if kind == "room":
+            room_items[owner] = freeze({names[i]: i for i in item_ids})
+        elif kind == "door":
+            door_rooms[owner] = item_ids
+        else:
+            contents[owner] = item_ids
+
+    door_next: Dict[int, Mapping[int, int]] = {}
+    for room_id, items in room_items.items():
+        exits = {}
+        for item_id in items.values():
+            if types[item_id] != "door":
+                continue
+            for other in door_rooms.get(item_id, ()):
+                if other != room_id:
+                    exits[item_id] = other
+                    break
+        door_next[room_id] = freeze(exits)
+
+    key_door: Dict[int, int] = {}
+    door_key: Dict[int, int] = {}
+    for key_id in range(len(objects)):
+        if types[key_id] == "key":
+            door_id = intern(objects[key_id]["target"])
+            key_door[key_id] = door_id
+            door_key[door_id] = key_id
+
+    # Solo la definición del logro; el estado "unlocked" pertenece a cada partida
+    achievements = achievements or {}
+    achievement_defs = {
+        key: freeze({k: v for k, v in definition.items() if k != "unlocked"})
+        for key, definition in achievements.items()
+    }
+
+    return World(
+        objects=tuple(objects),
+        names=tuple(names),
+        types=tuple(types),
+        ids=freeze(ids),
+        room_items=freeze(room_items),
+        contents=freeze(contents),
+        door_rooms=freeze(door_rooms),
+        door_next=freeze(door_next),
+        key_door=freeze(key_door),
+        door_key=freeze(door_key),
+        achievements=freeze(achievement_defs),
+        achievement_bits=freeze({key: bit for bit, key in enumerate(achievement_defs)}),
+    )
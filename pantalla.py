@@ -0,0 +1,200 @@
+"""
+Pantalla
+--------
+Capa de dibujo del motor V2: cada pantalla (mapa, estado, inventario...) se
+compone en memoria como un Frame y se emite con una sola escritura.
+
+- Renderer emite el frame tal cual, con colores ANSI. PlainRenderer quita
+  los códigos ANSI para la salida redirigida a un archivo o a una tubería.
+- Panel redibuja una zona fija de la pantalla reescribiendo solo las líneas
+  que cambiaron desde el dibujo anterior. La cuenta atrás de la terminal
+  (temporizador.Countdown) es un Panel de una línea.
+- GridMap precalcula las filas del mapa una vez por habitación resaltada, así
+  que dibujar el mapa no recorre casillas. ViewportMap dibuja solo una ventana
+  alrededor del jugador, para mapas generados demasiado grandes.
+"""
+
+import re
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Colores y estilos (CSI ... m), movimientos del cursor y guardar/restaurar (ESC 7 / ESC 8)
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b[78]")
+
+
+def strip_ansi(text: str) -> str:
+    """Texto sin códigos de escape ANSI"""
+    return _ANSI.sub("", text)
+
+
+class Frame:
+    """Pantalla compuesta en memoria, línea a línea"""
+    __slots__ = ("lines",)
+
+    def __init__(self, lines: Iterable[str] = ()):
+        self.lines: List[str] = list(lines)
+
+    def add(self, text: str = "") -> None:
+        """Añadir texto; cada salto de línea empieza una línea nueva del frame"""
+        self.lines.extend(text.split("\n"))
+
+    def extend(self, lines: Iterable[str]) -> None:
+        self.lines.extend(lines)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class Renderer:
+    """Convierte frames en texto para una terminal con colores ANSI"""
+    ansi = True
+
+    def render(self, frame: Frame) -> str:
+        return frame.text()
+
+
+class PlainRenderer(Renderer):
+    """Salida sin códigos ANSI, para archivos, tuberías y pruebas"""
+    ansi = False
+
+    def render(self, frame: Frame) -> str:
+        return strip_ansi(frame.text())
+
+
+def renderer_for(stream=None) -> Renderer:
+    """Renderer adecuado para un flujo: ANSI en terminales y en Jupyter, texto plano si no"""
+    stream = stream or sys.stdout
+    try:
+        tty = stream.isatty()
+    except (AttributeError, ValueError):
+        tty = False
+    # Jupyter no es una terminal pero muestra los colores ANSI
+    return Renderer() if tty or "ipykernel" in sys.modules else PlainRenderer()
+
+
+class Panel:
+    """Zona fija de la pantalla que se redibuja solo donde cambia"""
+
+    def __init__(self, renderer: Renderer, top: int = 1):
+        self.renderer = renderer
+        self.top = top
+        self.previous: Tuple[str, ...] = ()
+
+    def update(self, frame: Frame) -> str:
+        """Texto que lleva la pantalla del frame anterior a este; vacío si no cambió nada"""
+        lines = tuple(frame.lines)
+        previous, self.previous = self.previous, lines
+        if lines == previous:
+            return ""
+        if not self.renderer.ansi:
+            # Sin control del cursor solo se puede volver a escribir el frame entero
+            return self.renderer.render(frame)
+
+        out = []
+        for row, line in enumerate(lines):
+            if row >= len(previous) or previous[row] != line:
+                out.append(f"\x1b[{self.top + row};1H\x1b[2K{line}")
+        for row in range(len(lines), len(previous)):
+            out.append(f"\x1b[{self.top + row};1H\x1b[2K")
+        # Guardar el cursor antes y devolverlo después, para no mover la línea de entrada
+        return "\x1b7" + "".join(out) + "\x1b8"
+
+    def invalidate(self) -> None:
+        """Olvidar el frame anterior (p. ej. después de limpiar la pantalla)"""
+        self.previous = ()
+
+
+Runs = List[List[Tuple[Optional[str], str]]]
+
+
+def _grid_runs(owners: Mapping[Tuple[int, int], str], width: int, height: int,
+               cell: Tuple[int, int], origin: Tuple[int, int] = (0, 0)) -> Runs:
+    """Filas de casillas como tramos (habitación o None, texto), empezando en la casilla origin"""
+    cell_w, cell_h = cell
+    left, top = origin
+    # Tramos para colorear cada habitación una sola vez por fila
+    rows: Runs = []
+    for y in range(top, top + height):
+        runs: List[Tuple[Optional[str], str]] = []
+        for x in range(left, left + width):
+            owner = owners.get((x // cell_w, y // cell_h))
+            if owner is not None:
+                char = "."  # solo cuenta casillas: el símbolo se pone al dibujar
+            elif x % cell_w == cell_w - 1:
+                char = "│"
+            elif y % cell_h == cell_h - 1:
+                char = "─"
+            else:
+                char = " "
+            if runs and runs[-1][0] == owner:
+                runs[-1] = (owner, runs[-1][1] + char)
+            else:
+                runs.append((owner, char))
+        rows.append(runs)
+    return rows
+
+
+def _draw_runs(rows: Runs, current: Optional[str], room: Tuple[str, str], player: Tuple[str, str],
+               reset: str) -> Tuple[str, ...]:
+    lines = []
+    for runs in rows:
+        parts = []
+        for owner, text in runs:
+            if owner is None:
+                parts.append(text)
+            else:
+                color, glyph = player if owner == current else room
+                parts.append(f"{color}{glyph * len(text)}{reset}")
+        lines.append("".join(parts))
+    return tuple(lines)
+
+
+class GridMap:
+    """Mapa de casillas con las filas precalculadas para cada habitación resaltada.
+
+    layout asigna a cada habitación su bloque (columna, fila); cada bloque mide
+    cell casillas. room y player son (color, símbolo) de las casillas de una
+    habitación y de la habitación del jugador; el resto de casillas son paredes.
+    """
+
+    def __init__(self, layout: Mapping[str, Tuple[int, int]], width: int, height: int,
+                 room: Tuple[str, str], player: Tuple[str, str], reset: str = "\x1b[0m",
+                 cell: Tuple[int, int] = (8, 2)):
+        owners = {pos: name for name, pos in layout.items()}
+        rows = _grid_runs(owners, width, height, cell)
+        self.frames: Dict[str, Tuple[str, ...]] = {
+            name: _draw_runs(rows, name, room, player, reset) for name in layout
+        }
+        self.empty = _draw_runs(rows, None, room, player, reset)
+
+    def lines(self, current: str) -> Tuple[str, ...]:
+        """Filas del mapa con la habitación current resaltada"""
+        return self.frames.get(current, self.empty)
+
+
+class ViewportMap:
+    """Ventana de width x height casillas centrada en el jugador, para mapas que no caben.
+
+    Mismos argumentos que GridMap. No precalcula nada por habitación (con miles de
+    habitaciones no cabría en memoria): cada dibujo recorre solo las casillas de la ventana.
+    """
+
+    def __init__(self, layout: Mapping[str, Tuple[int, int]], width: int, height: int,
+                 room: Tuple[str, str], player: Tuple[str, str], reset: str = "\x1b[0m",
+                 cell: Tuple[int, int] = (8, 2)):
+        self.layout = layout
+        self.owners = {pos: name for name, pos in layout.items()}
+        self.width = width
+        self.height = height
+        self.room = room
+        self.player = player
+        self.reset = reset
+        self.cell = cell
+
+    def lines(self, current: str) -> Tuple[str, ...]:
+        """Filas de la ventana con la habitación current resaltada en el centro"""
+        cell_w, cell_h = self.cell
+        col, row = self.layout.get(current, (0, 0))
+        origin = (col * cell_w + cell_w // 2 - self.width // 2, row * cell_h + cell_h // 2 - self.height // 2)
+        rows = _grid_runs(self.owners, self.width, self.height, self.cell, origin)
+        return _draw_runs(rows, current, self.room, self.player, self.reset)
@@ -0,0 +1,160 @@
+"""
+Pistas
+------
+Pistas que siempre apuntan a un avance real hacia la salida.
+
+Una vez por mundo se precalcula el grafo de dependencias: qué puerta abre
+cada llave, qué habitaciones une cada puerta y en qué mueble (y en qué
+habitación) está cada objeto. Con él y la ruta de solucionador.py se
+prepara un plan: la lista ordenada de objetos que hay que recoger para
+escapar, cada uno con su pista ya escrita.
+
+Recoger nunca cierra caminos, así que el plan sigue valiendo haga lo que
+haga el jugador: tras cada cambio de estado basta con saltar los objetos
+del plan que ya tiene. Servir una pista es leer la del primero que falta.
+Solo se vuelve a planificar si se carga una partida anterior al plan. Los
+planes de cada mundo se guardan en una caché LRU de PLAN_CACHE_SIZE entradas:
+cada carga o punto de partida distinto crea uno, y en un servidor con muchas
+partidas del mismo mundo no pueden crecer sin límite.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from weakref import WeakKeyDictionary, ref
+
+from estado import GameState
+from mundo import World
+from solucionador import solve
+
+
+@dataclass(frozen=True)
+class Dependencies:
+    """Grafo de dependencias llave -> puerta -> habitación -> mueble de un mundo"""
+    opens: Dict[int, int]  # llave -> puerta que abre
+    leads: Dict[int, Tuple[int, ...]]  # puerta -> habitaciones que une
+    holders: Dict[int, Tuple[int, int]]  # objeto -> (habitación, mueble que lo guarda)
+
+
+_dependencies: "WeakKeyDictionary[World, Dependencies]" = WeakKeyDictionary()
+
+
+def dependencies(world: World) -> Dependencies:
+    """Grafo de dependencias del mundo (se calcula una vez por mundo)"""
+    graph = _dependencies.get(world)
+    if graph is None:
+        holders = {}
+        for room_id, items in world.room_items.items():
+            for item_id in items.values():
+                for obj_id in world.contents.get(item_id, ()):
+                    holders[obj_id] = (room_id, item_id)
+        graph = _dependencies[world] = Dependencies(dict(world.key_door), dict(world.door_rooms), holders)
+    return graph
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Objetos que hay que recoger para escapar, en orden, con la pista de cada uno"""
+    base: int  # lo que ya se tenía al planificar: el plan solo vale si se sigue teniendo
+    items: Tuple[int, ...]
+    rooms: Tuple[int, ...]  # habitación donde está cada objeto
+    here: Tuple[str, ...]  # pista si el jugador está en esa habitación
+    away: Tuple[str, ...]  # pista si está en otra
+    exit: str  # pista cuando ya se tiene todo
+    optimal: bool = True  # False si el solucionador no terminó y el plan puede dar rodeos
+
+
+# Planes guardados por mundo; los menos usados recientemente se descartan
+PLAN_CACHE_SIZE = 256
+
+# mundo -> (habitación, salida, recogido) -> plan, o None si no hay salida
+_plans: "WeakKeyDictionary[World, Callable[[int, int, int], Optional[Plan]]]" = WeakKeyDictionary()
+
+
+def _planner(world: World) -> Callable[[int, int, int], Optional[Plan]]:
+    """Planes de un mundo con caché LRU; guarda el mundo con una referencia débil para
+    que la caché no lo mantenga vivo"""
+    planner = _plans.get(world)
+    if planner is None:
+        world_ref = ref(world)
+
+        @lru_cache(maxsize=PLAN_CACHE_SIZE)
+        def planner(room: int, target: int, taken: int) -> Optional[Plan]:
+            return _make_plan(world_ref(), room, target, taken)
+        _plans[world] = planner
+    return planner
+
+
+def plan_for(world: World, room: int, target: int, taken: int) -> Optional[Plan]:
+    """Plan para escapar desde room con lo recogido en taken (se reutiliza entre partidas)"""
+    return _planner(world)(room, target, taken)
+
+
+def _make_plan(world: World, room: int, target: int, taken: int) -> Optional[Plan]:
+    solution = solve(world, room, target, taken)
+    if solution is None:
+        return None
+    graph = dependencies(world)
+    names = world.names
+    items = tuple(world.ids[name] for name in solution.collected)
+    rooms = []
+    here = []
+    away = []
+    for obj_id in items:
+        room_id, furniture_id = graph.holders[obj_id]
+        rooms.append(room_id)
+        door_id = graph.opens.get(obj_id)
+        if door_id is not None:
+            here.append(f"Examina {names[furniture_id]}: ahí está la llave de {names[door_id]}.")
+            away.append(f"La llave de {names[door_id]} está en {names[furniture_id]}, en {names[room_id]}.")
+        else:
+            # Un objeto que tapa lo que hace falta: hay que sacarlo antes
+            here.append(f"Examina {names[furniture_id]}: guarda algo que necesitas.")
+            away.append(f"En {names[furniture_id]}, en {names[room_id]}, hay algo que necesitas.")
+
+    if len(solution.rooms) < 2:
+        exit_hint = "Ya estás en la salida."
+    else:
+        last = world.ids[solution.rooms[-2]]
+        door_id = next(door for door, next_room in world.door_next[last].items() if next_room == target)
+        exit_hint = (f"Ya tienes todo lo necesario: sal por {names[door_id]}, "
+                     f"en {names[last]}, hacia {names[target]}.")
+    return Plan(taken, items, tuple(rooms), tuple(here), tuple(away), exit_hint, solution.optimal)
+
+
+class HintTracker:
+    """Siguiente acción útil de una partida; update() se llama tras cada cambio de estado"""
+    __slots__ = ("plan", "position", "taken")
+
+    def __init__(self, state: GameState):
+        self.plan: Optional[Plan] = None
+        self.position = 0
+        self.taken = -1
+        self.update(state)
+
+    def update(self, state: GameState) -> None:
+        taken = state.removed
+        if taken == self.taken:
+            return
+        plan = self.plan
+        if plan is None or plan.base & ~taken:
+            # Primera vez o se cargó una partida anterior al plan: se planifica desde aquí
+            plan = self.plan = plan_for(state.world, state.room, state.target_room, taken)
+            self.position = 0
+        elif self.taken & ~taken:
+            self.position = 0  # se perdió progreso (load): el plan vale, pero desde el principio
+        self.taken = taken
+        if plan is not None:
+            while self.position < len(plan.items) and taken >> plan.items[self.position] & 1:
+                self.position += 1
+
+    def hint(self, state: GameState) -> Optional[str]:
+        """Pista de la siguiente acción útil, o None si no hay salida posible"""
+        plan = self.plan
+        if plan is None:
+            return None
+        if self.position == len(plan.items):
+            return plan.exit
+        if plan.rooms[self.position] == state.room:
+            return plan.here[self.position]
+        return plan.away[self.position]
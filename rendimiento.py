@@ -0,0 +1,373 @@
+"""
+Rendimiento
+-----------
+Mide sin interfaz las partes del motor V2 que más se usan (examinar, abrir
+puertas, empujar, puntuación, logros, mapa, pistas, guardar/cargar y una
+partida guionizada entera) sobre mundos pequeños, medianos y enormes, y el
+arranque de `python -m jugar` hasta el primer prompt.
+
+Cada medida repite la función en lotes hasta que el lote dura al menos
+min_time y se queda con el mejor y la mediana de varios lotes, como timeit.
+Lo que la función cambia del estado se prepara fuera del tiempo medido: una
+copia nueva del GameState por llamada. Los resultados se guardan en JSON y se
+comparan con una línea base guardada (de la misma máquina) para marcar las
+regresiones:
+
+    python rendimiento.py --sizes small medium --save-baseline
+    python rendimiento.py --sizes small medium --baseline rendimiento_base.json
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import funcionesfinal_v2 as game_engine
+from cargador import load_world
+from estado import GameState, iter_bits
+from eventos import OBJECT_EXAMINED, TREASURE_FOUND
+from generador import generate_mansion
+from guardado import SaveStore
+from mundo import World, compile_world
+from pistas import HintTracker
+from simulacion import HeadlessIO, iter_commands, run_session
+from solucionador import solve_state
+
+SIZES = ("small", "medium", "huge")
+MANSION_ROOMS = {"medium": 1_000, "huge": 100_000}
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+SMALL_WORLD = os.path.join(PACKAGE_DIR, "mundos", "mansion.json")
+SMALL_SCRIPT = os.path.join(PACKAGE_DIR, "guiones", "mansion_completa.txt")
+# Lo que escribe jugar.py al pedir el primer comando
+FIRST_PROMPT = "¿Qué quieres hacer?".encode("utf-8")
+
+# Con preparación por llamada no se preparan más copias que estas por lote
+MAX_PREPARED = 2_000
+
+
+class _DiscardIO(HeadlessIO):
+    """Compone todas las pantallas (su coste cuenta) pero no guarda la salida"""
+
+    def __init__(self):
+        super().__init__(iter(()), capture=False)
+        self.renders = True
+
+
+@dataclass
+class Fixture:
+    """Mundo de un tamaño con los estados de partida que usan las medidas"""
+    size: str
+    world: World
+    initial: Dict[str, Any]  # estado inicial como INIT_GAME_STATE
+    state: GameState  # partida avanzada: casi todo recogido, inventario grande
+    furniture: str  # mueble de la habitación de state que aún guarda algo
+    door: str  # puerta de la habitación de state
+    push: Tuple[int, str]  # (habitación, objeto) para push_item
+    script: List[str]  # comandos de una partida que escapa
+    path: Optional[str] = None  # archivo del mundo, si lo tiene
+    # Lo que las medidas dejan abierto (directorios temporales); se cierra con close()
+    cleanup: contextlib.ExitStack = field(default_factory=contextlib.ExitStack)
+
+    def temporary_directory(self) -> str:
+        """Directorio temporal que se borra al cerrar el mundo preparado"""
+        return self.cleanup.enter_context(tempfile.TemporaryDirectory(prefix="rendimiento-"))
+
+    def close(self) -> None:
+        self.cleanup.close()
+
+
+def _bits(ids: Iterable[int]) -> int:
+    """Conjunto de bits de ids de una vez (con |= uno a uno sería cuadrático en mundos enormes)"""
+    ids = list(ids)
+    data = bytearray((max(ids, default=0) >> 3) + 1)
+    for obj_id in ids:
+        data[obj_id >> 3] |= 1 << (obj_id & 7)
+    return int.from_bytes(data, "little")
+
+
+def _mid_game(world: World, initial: Dict[str, Any]) -> Tuple[GameState, str]:
+    """Partida con todo recogido salvo un mueble de la habitación inicial"""
+    state = GameState.from_dict(world, initial)
+    room_items = world.room_items[state.room]
+    furniture = next(name for name, item_id in room_items.items() if world.contents.get(item_id))
+    keep = set(world.contents[room_items[furniture]])
+    collected = [obj_id for items in world.contents.values() for obj_id in items if obj_id not in keep]
+    types = world.types
+    state.keys = _bits(obj_id for obj_id in collected if types[obj_id] == "key")
+    treasures = [obj_id for obj_id in collected if types[obj_id] == "treasure"]
+    state.treasures = _bits(treasures)
+    state.treasure_value = sum(world.objects[obj_id].get("value", 0) for obj_id in treasures)
+    state.examined = _bits(obj_id for obj_id in range(len(types)) if types[obj_id] == "furniture")
+    return state, furniture
+
+
+def make_fixture(size: str) -> Fixture:
+    """Cargar o generar el mundo de un tamaño y preparar sus estados"""
+    if size == "small":
+        loaded = load_world(SMALL_WORLD)
+        world, initial = loaded.world, loaded.initial_state()
+        script = list(iter_commands(SMALL_SCRIPT))
+    else:
+        mansion = generate_mansion(MANSION_ROOMS[size], seed=1)
+        world = compile_world(mansion.object_relations)
+        initial = mansion.initial_state()
+        script = solve_state(GameState.from_dict(world, initial)).commands
+    state, furniture = _mid_game(world, initial)
+    room_items = world.room_items[state.room]
+    door = next(name for name, item_id in room_items.items() if world.types[item_id] == "door")
+    # La mesa del comedor es el único objeto que se empuja; sin ella, un mueble cualquiera
+    table = world.ids.get("dining table")
+    if table is not None:
+        push = (next(room for room, items in world.room_items.items() if table in items.values()),
+                "dining table")
+    else:
+        push = (state.room, furniture)
+    return Fixture(size, world, initial, state, furniture, door, push, script,
+                   SMALL_WORLD if size == "small" else None)
+
+
+# Medida: recibe el mundo preparado y devuelve (preparar, llamar), o None si no se aplica a
+# ese mundo. preparar() da el argumento de cada llamada fuera del tiempo medido (None: sin preparación)
+Prepare = Optional[Callable[[], Any]]
+Benchmark = Callable[[Fixture], Optional[Tuple[Prepare, Callable[[Any], Any]]]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """Decorador que registra una medida con su nombre"""
+    def decorator(function: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+@benchmark("examine_item")
+def bench_examine_item(fx: Fixture):
+    return fx.state.copy, lambda state: game_engine.examine_item(state, fx.world, fx.furniture)
+
+
+@benchmark("handle_door")
+def bench_handle_door(fx: Fixture):
+    door_id = fx.world.ids[fx.door]
+    return fx.state.copy, lambda state: game_engine.handle_door(state, fx.world, door_id)
+
+
+@benchmark("push_item")
+def bench_push_item(fx: Fixture):
+    room, name = fx.push
+    start = GameState.from_dict(fx.world, fx.initial)
+    start.room = room
+    return start.copy, lambda state: game_engine.push_item(state, fx.world, name)
+
+
+@benchmark("calculate_score")
+def bench_calculate_score(fx: Fixture):
+    return None, lambda _: game_engine.calculate_score(fx.state)
+
+
+@benchmark("achievements")
+def bench_achievements(fx: Fixture):
+    # Tras la primera llamada los logros ya están desbloqueados: se mide el caso habitual
+    state = fx.state.copy()
+    treasure = next(iter_bits(state.treasures), -1)
+
+    def publish(_: Any) -> None:
+        game_engine.GAME_EVENTS.publish(OBJECT_EXAMINED, state, fx.world.ids[fx.furniture])
+        game_engine.GAME_EVENTS.publish(TREASURE_FOUND, state, treasure)
+    return None, publish
+
+
+@benchmark("print_map")
+def bench_print_map(fx: Fixture):
+    return None, lambda _: game_engine.print_map(fx.state, fx.world)
+
+
+@benchmark("get_hint")
+def bench_get_hint(fx: Fixture):
+    state = GameState.from_dict(fx.world, fx.initial)
+    state.hints_remaining = sys.maxsize
+    tracker = HintTracker(state)
+    return None, lambda _: game_engine.get_hint(state, fx.world, tracker=tracker)
+
+
+@benchmark("save_game")
+def bench_save_game(fx: Fixture):
+    # Cada guardado cambia algo: se mide el delta que escribe el autoguardado, no un guardado vacío
+    store = SaveStore(fx.temporary_directory())
+    turns = itertools.count()
+
+    def prepare() -> GameState:
+        state = fx.state.copy()
+        state.hints_remaining = next(turns)
+        return state
+    return prepare, lambda state: game_engine.save_game(state, "bench", store)
+
+
+@benchmark("load_game")
+def bench_load_game(fx: Fixture):
+    store = SaveStore(fx.temporary_directory())
+    store.save("bench", fx.state)
+    return fx.state.copy, lambda state: game_engine.load_game(state, "bench", store)
+
+
+@benchmark("session")
+def bench_session(fx: Fixture):
+    prepare = lambda: GameState.from_dict(fx.world, fx.initial)  # noqa: E731
+    return prepare, lambda state: run_session(state, fx.script)
+
+
+@benchmark("cold_start")
+def bench_cold_start(fx: Fixture):
+    # Un proceso nuevo por llamada, hasta que pide el primer comando; solo mundos en archivo
+    if fx.path is None:
+        return None
+    command = [sys.executable, "-m", "jugar", fx.path, "--no-journal", "--no-autosave", "--no-leaderboard"]
+
+    def start(_: Any) -> None:
+        process = subprocess.Popen(command, cwd=PACKAGE_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL)
+        output = b""
+        while FIRST_PROMPT not in output:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                raise RuntimeError(f"jugar terminó sin llegar al primer prompt (código {process.wait()})")
+            output += chunk
+        process.kill()
+        process.wait()
+        process.stdin.close()
+        process.stdout.close()
+    return None, start
+
+
+@dataclass
+class Result:
+    """Tiempo por llamada de una medida, en microsegundos"""
+    best: float
+    median: float
+    calls: int  # llamadas por lote
+
+
+def measure(prepare: Prepare, call: Callable[[Any], Any], repeat: int = 5,
+            min_time: float = 0.05) -> Result:
+    """Mejor y mediana del tiempo por llamada en repeat lotes de al menos min_time"""
+    def run_batch(calls: int) -> float:
+        arguments = [prepare() for _ in range(calls)] if prepare is not None else [None] * calls
+        start = time.perf_counter()
+        for argument in arguments:
+            call(argument)
+        return time.perf_counter() - start
+
+    run_batch(1)  # la primera llamada llena las cachés (mapa, índices, planes): no cuenta
+    calls = 1
+    elapsed = run_batch(calls)
+    limit = MAX_PREPARED if prepare is not None else sys.maxsize
+    while elapsed < min_time and calls < limit:
+        calls = min(limit, calls * 2 if elapsed <= 0 else max(calls * 2, int(calls * min_time / elapsed)))
+        elapsed = run_batch(calls)
+    samples = [run_batch(calls) for _ in range(repeat)]
+    per_call = [sample / calls * 1e6 for sample in samples]
+    return Result(min(per_call), statistics.median(per_call), calls)
+
+
+def run(sizes: Iterable[str] = ("small", "medium"), only: Optional[str] = None, repeat: int = 5,
+        min_time: float = 0.05, report: Optional[Callable[[str, Result], None]] = None) -> Dict[str, Result]:
+    """Medir cada función en cada tamaño; claves "tamaño/medida" """
+    results: Dict[str, Result] = {}
+    with game_engine.use_io(_DiscardIO()):
+        for size in sizes:
+            fixture = make_fixture(size)
+            try:
+                for name, bench in BENCHMARKS.items():
+                    if only is not None and only not in name:
+                        continue
+                    bench_calls = bench(fixture)
+                    if bench_calls is None:
+                        continue
+                    prepare, call = bench_calls
+                    key = f"{size}/{name}"
+                    results[key] = measure(prepare, call, repeat, min_time)
+                    if report is not None:
+                        report(key, results[key])
+            finally:
+                fixture.close()  # p. ej. los directorios temporales de save_game y load_game
+    return results
+
+
+def save_results(path: str, results: Dict[str, Result]) -> None:
+    document = {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.node()}",
+        "results": {key: asdict(result) for key, result in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=1)
+
+
+def load_results(path: str) -> Dict[str, Result]:
+    with open(path, encoding="utf-8") as f:
+        return {key: Result(**values) for key, values in json.load(f)["results"].items()}
+
+
+@dataclass
+class Regression:
+    key: str
+    baseline: float  # mediana de la línea base (µs)
+    current: float  # mediana actual (µs)
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.baseline:.2f} µs -> {self.current:.2f} µs (x{self.ratio:.2f})"
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float = 0.25) -> List[Regression]:
+    """Medidas cuya mediana supera la de la línea base en más de threshold (0.25 = 25%)"""
+    return [Regression(key, baseline[key].median, result.median)
+            for key, result in results.items()
+            if key in baseline and result.median > baseline[key].median * (1 + threshold)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Medidas de rendimiento del motor V2")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["small", "medium"])
+    parser.add_argument("-k", dest="only", help="solo las medidas cuyo nombre contiene este texto")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="segundos mínimos por lote")
+    parser.add_argument("--output", default="rendimiento.json")
+    parser.add_argument("--baseline", default="rendimiento_base.json")
+    parser.add_argument("--save-baseline", action="store_true", help="guardar los resultados como línea base")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    def report(key: str, result: Result) -> None:
+        print(f"{key:28} {result.median:12.2f} µs  (mejor {result.best:.2f}, {result.calls} por lote)", flush=True)
+
+    results = run(args.sizes, args.only, args.repeat, args.min_time, report)
+    save_results(args.output, results)
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"Sin línea base ({args.baseline}): usa --save-baseline para guardarla")
+        return 0
+    regressions = compare(results, load_results(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Repetición de partidas
+----------------------
+Vuelve a ejecutar un diario (diario.py) sobre el motor V2 sin E/S y a toda
+velocidad: las horas de cada turno, la semilla y las cargas salen del diario,
+así que la partida sale idéntica. Cada pocos turnos se guarda un punto de
+control, y saltar a un turno cualquiera (seek) parte del más cercano en lugar
+de repetir la partida desde el principio.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import funcionesfinal_v2 as game_engine
+from diario import Journal, LoadResult
+from estado import GameState, Rules
+from guardado import SaveError, capture, restore, world_fingerprint
+from maquina import MachineRun
+from mundo import World
+from simulacion import HeadlessIO
+
+
+class ReplaySaves:
+    """Ranuras de una repetición: no escriben nada y las cargas salen del diario"""
+
+    def __init__(self, loads: List[LoadResult], position: int = 0):
+        self.loads = loads
+        self.position = position
+
+    def save(self, slot: str, state: GameState) -> int:
+        return 0
+
+    def load(self, slot: str, state: GameState) -> float:
+        progress, error = self.loads[self.position]
+        self.position += 1
+        if error is not None:
+            raise SaveError(error)
+        restore(state, progress)
+        return state.now
+
+    def slots(self) -> List[str]:
+        return []
+
+
+@dataclass
+class Checkpoint:
+    """Todo lo que hace falta para seguir la partida desde una entrada del diario"""
+    turn: int
+    progress: Dict[str, Any]
+    now: float
+    rng: Any
+    pending_room: Optional[int]
+    machine_state: str
+    loads: int
+
+
+class Replay:
+    """Repetición de un diario sobre un mundo compilado"""
+
+    def __init__(self, journal: Journal, world: World, checkpoint_every: int = 50):
+        if journal.header["world"] != world_fingerprint(world):
+            raise ValueError("El diario es de otro mundo")
+        self.journal = journal
+        self.world = world
+        self.checkpoint_every = checkpoint_every
+        self.io = HeadlessIO(iter(()), capture=False)
+        self.turn = 0
+        self.saves = ReplaySaves(journal.loads)
+        with game_engine.use_io(self.io):
+            self.run = game_engine.start_session(self._new_state(), world, seed=journal.seed,
+                                                 now=journal.header["now"], saves=self.saves)
+        self.checkpoints: List[Checkpoint] = [self._checkpoint()]
+
+    @property
+    def state(self) -> GameState:
+        return self.run.context.game_state
+
+    @property
+    def done(self) -> bool:
+        return self.run.done
+
+    def _new_state(self) -> GameState:
+        header = self.journal.header
+        initial = header["state"]
+        # Los diarios de antes de rules solo tenían la dificultad
+        rules = Rules.from_config(header.get("rules", {}), header["difficulty"])
+        state = GameState(self.world, initial["room"], header["target_room"],
+                          time_limit=header["time_limit"], difficulty=header["difficulty"],
+                          start_time=initial["start_time"], sound_enabled=False, rules=rules)
+        restore(state, initial)
+        return state
+
+    def _checkpoint(self) -> Checkpoint:
+        session = self.run.context
+        return Checkpoint(self.turn, capture(session.game_state), session.game_state.now,
+                          session.rng.getstate(), session.pending_room, self.run.state, self.saves.position)
+
+    def _restore(self, checkpoint: Checkpoint) -> None:
+        state = self._new_state()
+        restore(state, checkpoint.progress)
+        state.now = checkpoint.now
+        self.saves = ReplaySaves(self.journal.loads, checkpoint.loads)
+        session = game_engine.GameSession(state, self.world, saves=self.saves)
+        session.rng.setstate(checkpoint.rng)
+        session.pending_room = checkpoint.pending_room
+        # Los puntos de control se toman esperando entrada: arrancar ahí no ejecuta ningún manejador
+        self.run = MachineRun(game_engine.GAME_MACHINE, session, checkpoint.machine_state)
+        self.turn = checkpoint.turn
+
+    def step(self) -> bool:
+        """Ejecutar la siguiente entrada del diario; False si ya no quedan o la partida terminó"""
+        if self.run.done or self.turn >= len(self.journal.entries):
+            return False
+        now, line = self.journal.entries[self.turn]
+        with game_engine.use_io(self.io):
+            game_engine.feed_line(self.run, line, now)
+        self.turn += 1
+        # Tras volver a un punto de control antiguo, los siguientes ya existen
+        if self.turn % self.checkpoint_every == 0 and self.turn > self.checkpoints[-1].turn:
+            self.checkpoints.append(self._checkpoint())
+        return True
+
+    def seek(self, turn: int) -> GameState:
+        """Dejar la partida como estaba después de turn entradas y devolver su estado"""
+        nearest = next(c for c in reversed(self.checkpoints) if c.turn <= turn)
+        # Volver atrás obliga a partir de un punto de control; hacia delante, solo si ahorra camino
+        if turn < self.turn or nearest.turn > self.turn:
+            self._restore(nearest)
+        while self.turn < turn and self.step():
+            pass
+        return self.state
+
+    def run_to_end(self) -> str:
+        """Repetir todo el diario; devuelve el estado final de la partida"""
+        while self.step():
+            pass
+        return self.run.state
+
+
+def replay(journal: Journal, world: World) -> Replay:
+    """Repetir un diario completo"""
+    result = Replay(journal, world)
+    result.run_to_end()
+    return result
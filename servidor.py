@@ -0,0 +1,315 @@
+"""
+Servidor de partidas
+--------------------
+Servidor asyncio de protocolo por líneas (se puede jugar con telnet o nc) que
+aloja muchas partidas del motor V2 a la vez en un solo proceso.
+
+Cada conexión tiene su propio GameState y una máquina de estados del motor
+que se alimenta línea a línea con feed(), así que ningún manejador bloquea el
+bucle de eventos. La salida de cada turno se envía de una vez y se espera a
+que el cliente la lea (drain) antes de aceptar la siguiente línea. Las
+conexiones que no escriben nada durante idle_timeout segundos se cierran.
+
+El tiempo límite de todas las partidas lo lleva una sola TimerWheel que
+avanza una vez por segundo: cuando vence el plazo de una sesión se termina
+la partida aunque el jugador esté a mitad de escribir, y antes se le avisa
+del tiempo que le queda.
+
+Al conectarse se pregunta el nombre del jugador, que es con el que entra en
+la clasificación y el directorio de sus partidas dentro de saves_dir: las
+partidas se quedan al desconectarse y se pueden cargar al volver, y un
+jugador no ve las de otro nombre (no hay contraseñas, el nombre es la
+cuenta). Los turnos de save y load se juegan en un hilo con run_in_executor,
+así que el motor anuncia el resultado después de escribir o leer el disco y
+el disco no para a las demás conexiones; lo mismo apuntar una partida en la
+clasificación.
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Union
+from weakref import WeakValueDictionary
+
+import funcionesfinal_v2 as game_engine
+from clasificacion import Leaderboard
+from diario import Journal
+from estado import GameState
+from guardado import SaveStore
+from metricas import Metrics
+from mundo import World, compile_world
+from pantalla import Renderer
+from pistas import plan_for
+from temporizador import TimerWheel, format_remaining
+
+# ANSI: borrar la pantalla y volver al principio
+CLEAR = "\x1b[2J\x1b[H"
+
+# Avisos antes de que se agote el tiempo, en segundos restantes
+WARNINGS = (300, 60, 10)
+
+NAME_PROMPT = "¿Cómo te llamas? "
+# El nombre es también el directorio de sus partidas
+PLAYER_NAME = re.compile(r"[\w-]{1,40}")
+
+# Comandos que leen o escriben en disco: su turno se juega en un hilo
+STORAGE_COMMANDS = frozenset({"save", "load"})
+
+
+def uses_storage(line: str) -> bool:
+    """Si la línea es un save o un load, también abreviados"""
+    words = line.lower().split()
+    if not words:
+        return False
+    candidates, _ = game_engine.COMMANDS.resolve(words[0], len(words) > 1)
+    return len(candidates) == 1 and candidates[0].name in STORAGE_COMMANDS
+
+
+class ConnectionIO(game_engine.GameIO):
+    """Canal de una conexión: acumula la salida del turno hasta que se envía"""
+    renderer = Renderer()
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.rang = False
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        self.chunks.append(text + end)
+
+    def read(self, prompt: str) -> str:
+        raise RuntimeError("Las partidas del servidor se alimentan con feed(), no con read()")
+
+    def read_before(self, prompt: str, deadline: float) -> str:
+        return self.read(prompt)
+
+    def clear(self) -> None:
+        self.chunks.append(CLEAR)
+
+    def bell(self, pauses) -> None:
+        # Un solo toque por turno y sin pausas: dormir aquí pararía a todos los jugadores
+        if not self.rang:
+            self.rang = True
+            self.chunks.append("\a")
+
+    def flush(self) -> bytes:
+        """Sacar la salida pendiente con saltos de línea de telnet"""
+        text = "".join(self.chunks).replace("\n", "\r\n")
+        self.chunks.clear()
+        self.rang = False
+        return text.encode("utf-8")
+
+
+class GameServer:
+    """Servidor que compila el mundo una vez y abre una partida por conexión"""
+
+    def __init__(self, game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+                 idle_timeout: float = 300, max_sessions: int = 10000, max_line: int = 1024,
+                 journal_dir: Optional[str] = None, leaderboard: Optional[Leaderboard] = None,
+                 metrics: Optional[Metrics] = None, metrics_path: Optional[str] = None,
+                 saves_dir: str = "partidas-servidor"):
+        if isinstance(object_relations, World):
+            self.world = object_relations
+        else:
+            self.world = compile_world(object_relations, game_state.get("achievements"))
+        self.initial = GameState.from_dict(self.world, game_state)
+        # El plan de pistas desde el inicio queda en la caché de plan_for y lo comparten todas
+        # las partidas: se calcula ya, no en el turno de la primera pista del primer jugador
+        plan_for(self.world, self.initial.room, self.initial.target_room, self.initial.removed)
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_line = max_line
+        self.journal_dir = journal_dir  # con un directorio, cada partida lleva su diario
+        self.leaderboard = leaderboard  # las partidas ganadas se apuntan por lotes
+        self.saves_dir = saves_dir  # un subdirectorio por jugador, que se conserva
+        # Las conexiones con el mismo nombre comparten SaveStore (y su cerrojo) mientras duren
+        self._saves: "WeakValueDictionary[str, SaveStore]" = WeakValueDictionary()
+        # Con métricas, cada partida mide las suyas y al terminar se suman a las del servidor,
+        # que se escriben en metrics_path (texto de Prometheus) en cada tic
+        if metrics is None and metrics_path is not None:
+            metrics = Metrics()
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+        self.sessions = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.timers = TimerWheel(tick=1.0)
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8023) -> asyncio.AbstractServer:
+        """Empezar a aceptar conexiones; devuelve el servidor de asyncio"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=self.max_line,
+                                                 backlog=1024)
+        if self._ticker is None:
+            self._ticker = asyncio.ensure_future(self.tick())
+        return self.server
+
+    async def tick(self) -> None:
+        """Avanzar la rueda de temporizadores una vez por segundo"""
+        while True:
+            await asyncio.sleep(self.timers.tick)
+            self.timers.advance()
+            if self.leaderboard is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.leaderboard.flush)
+            if self.metrics_path is not None:
+                self.write_metrics()
+
+    def write_metrics(self) -> None:
+        """Reemplazar metrics_path de una vez, para que nadie lea un archivo a medias"""
+        temporary = f"{self.metrics_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.metrics.prometheus())
+        os.replace(temporary, self.metrics_path)
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8023) -> None:
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def send(self, writer: asyncio.StreamWriter, io: ConnectionIO) -> None:
+        """Enviar la salida del turno respetando la contrapresión del cliente"""
+        writer.write(io.flush())
+        # Si el cliente no lee, el búfer se llena y drain() espera; pasado el
+        # tiempo de inactividad se da la conexión por perdida
+        await asyncio.wait_for(writer.drain(), self.idle_timeout)
+
+    async def ask_name(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       io: ConnectionIO) -> Optional[str]:
+        """Preguntar el nombre del jugador hasta que sea válido; None si se va antes"""
+        while True:
+            io.write(NAME_PROMPT, end="")
+            await self.send(writer, io)
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            except (asyncio.LimitOverrunError, ValueError):
+                return None
+            if not line:
+                return None
+            name = line.decode("utf-8", errors="replace").strip()
+            if PLAYER_NAME.fullmatch(name):
+                return name
+            io.write("El nombre lleva de 1 a 40 letras, números, '-' o '_'.")
+
+    def player_saves(self, player: str) -> SaveStore:
+        """Las ranuras de un jugador, compartidas por todas sus conexiones abiertas"""
+        key = player.casefold()  # 'Ana' y 'ana' son el mismo directorio en algunos discos
+        saves = self._saves.get(key)
+        if saves is None:
+            saves = self._saves[key] = SaveStore(os.path.join(self.saves_dir, key))
+        return saves
+
+    @staticmethod
+    def feed(run: game_engine.MachineRun, io: ConnectionIO, line: str) -> None:
+        with game_engine.use_io(io):
+            game_engine.feed_line(run, line)
+
+    def record(self, game_state: GameState, player: str, io: ConnectionIO) -> None:
+        """Apuntar la partida en la clasificación (SQLite: se llama desde un hilo)"""
+        with game_engine.use_io(io):
+            game_engine.record_run(game_state, self.leaderboard, player)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Jugar una partida completa con un cliente"""
+        if self.sessions >= self.max_sessions:
+            writer.write("Servidor lleno, inténtalo más tarde.\r\n".encode("utf-8"))
+            writer.close()
+            return
+        self.sessions += 1
+        io = ConnectionIO()
+        loop = asyncio.get_running_loop()
+        alarm = loop.create_future()
+        timers = []
+        read_task: Optional[asyncio.Future] = None
+        journal: Optional[Journal] = None
+        metrics = Metrics() if self.metrics is not None else None
+        try:
+            player = await self.ask_name(reader, writer, io)
+            if player is None:
+                return
+            saves = self.player_saves(player)
+            with game_engine.use_io(io):
+                game_state = self.initial.copy()
+                game_state.start_time = time.time()
+                game_state.now = game_state.start_time
+                if self.journal_dir is not None:
+                    journal = Journal.create(game_state, self.journal_dir)
+                game_engine.print_intro()
+                run = game_engine.start_session(game_state, self.world, journal=journal, saves=saves,
+                                                 metrics=metrics)
+            deadline = game_state.start_time + game_state.time_limit
+            
+            def ring() -> None:
+                if not alarm.done():
+                    alarm.set_result(None)
+            
+            for before in WARNINGS + (0,):
+                if before < game_state.time_limit:
+                    timers.append(self.timers.schedule(deadline - before, ring))
+            
+            while not run.done:
+                io.write(run.prompt, end="")
+                await self.send(writer, io)
+                if read_task is None:
+                    read_task = asyncio.ensure_future(reader.readline())
+                done, _ = await asyncio.wait((read_task, alarm), timeout=self.idle_timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                if alarm.done():
+                    alarm = loop.create_future()
+                    remaining = deadline - time.time()
+                    with game_engine.use_io(io):
+                        if remaining <= 0:
+                            io.write("")
+                            game_engine.feed_line(run, None)
+                        else:
+                            io.write(f"\n{game_engine.GameColors.ERROR}⏳ Tiempo restante: "
+                                     f"{format_remaining(remaining)}{game_engine.GameColors.RESET}")
+                    continue
+                if not done:
+                    io.write("\nSesión cerrada por inactividad.")
+                    await self.send(writer, io)
+                    return
+                
+                try:
+                    line = read_task.result()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # Línea más larga que max_line: no es un comando del juego
+                    return
+                read_task = None
+                if not line:
+                    return  # el cliente cerró la conexión
+                line = line.decode("utf-8", errors="replace").strip()
+                if uses_storage(line):
+                    await loop.run_in_executor(None, self.feed, run, io, line)
+                else:
+                    self.feed(run, io, line)
+            if run.state == "escaped" and self.leaderboard is not None:
+                await loop.run_in_executor(None, self.record, game_state, player, io)
+            await self.send(writer, io)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.sessions -= 1
+            for timer in timers:
+                timer.cancel()
+            if read_task is not None:
+                read_task.cancel()
+            if journal is not None:
+                journal.close()
+            if metrics is not None:
+                self.metrics.merge(metrics)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def run_server(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+               host: str = "127.0.0.1", port: int = 8023, **options: Any) -> None:
+    """Arrancar el servidor y bloquear hasta que se interrumpa (Ctrl+C)"""
+    server = GameServer(game_state, object_relations, **options)
+    print(f"Servidor del Escape Room escuchando en {host}:{port}")
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,146 @@
+"""
+Simulación sin interfaz
+-----------------------
+Ejecuta partidas guionizadas sobre el motor V2 sin terminal, pausas ni
+subprocesos, para pruebas de regresión y de balance.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import funcionesfinal_v2 as game_engine
+from estado import GameState, iter_bits
+from metricas import Metrics
+from mundo import World, compile_world
+from pantalla import Renderer
+
+CommandSource = Union[str, "os.PathLike[str]", Iterable[str]]
+
+
+class EndOfScript(Exception):
+    """El guion se quedó sin comandos antes de terminar la partida"""
+
+
+class HeadlessIO(game_engine.GameIO):
+    """Canal de entrada/salida que lee de un guion y guarda la salida en memoria"""
+    renderer = Renderer()
+
+    def __init__(self, commands: Iterator[str], capture: bool = True):
+        self.commands = commands
+        self.capture = capture
+        self.renders = capture
+        self.lines: List[str] = []
+        self.reads = 0
+
+    def write(self, text: str = "", end: str = "\n") -> None:
+        if self.capture:
+            self.lines.append(text + end)
+
+    def read(self, prompt: str) -> str:
+        try:
+            line = next(self.commands)
+        except StopIteration:
+            raise EndOfScript() from None
+        self.reads += 1
+        if self.capture:
+            self.lines.append(prompt + line + "\n")
+        return line
+
+    def read_before(self, prompt: str, deadline: float) -> str:
+        # El guion responde al instante; el tiempo límite se comprueba en cada turno
+        return self.read(prompt)
+
+    def clear(self) -> None:
+        pass
+
+    def bell(self, pauses) -> None:
+        pass
+
+
+@dataclass
+class SimulationResult:
+    """Resultado estructurado de una partida simulada"""
+    outcome: str  # 'escaped', 'timeout', 'quit' o 'incomplete'
+    inputs: int
+    final_room: str
+    score: int
+    keys: List[str]
+    treasures: List[str]
+    examined: List[str]
+    hints_used: int
+    achievements: List[str]
+    elapsed: float
+    output: List[str] = field(default_factory=list)
+
+    @property
+    def escaped(self) -> bool:
+        return self.outcome == "escaped"
+
+
+def iter_commands(commands: CommandSource) -> Iterator[str]:
+    """Normalizar una lista, un archivo (ruta u objeto) o un generador de comandos"""
+    if isinstance(commands, (str, os.PathLike)):
+        with open(commands, encoding="utf-8") as f:
+            yield from iter_commands(f)
+        return
+    for line in commands:
+        line = line.rstrip("\n")
+        # Las líneas que empiezan por '#' son comentarios del guion
+        if line.lstrip().startswith("#"):
+            continue
+        yield line
+
+
+def _as_world(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World]) -> World:
+    if isinstance(object_relations, World):
+        return object_relations
+    return compile_world(object_relations, game_state.get("achievements"))
+
+
+def simulate_game(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+                  commands: CommandSource, capture_output: bool = True) -> SimulationResult:
+    """Jugar una partida completa a partir de un guion de comandos, sin E/S de terminal"""
+    world = _as_world(game_state, object_relations)
+    return run_session(GameState.from_dict(world, game_state), commands, capture_output)
+
+
+def run_session(state: GameState, commands: CommandSource, capture_output: bool = True,
+                metrics: Optional[Metrics] = None) -> SimulationResult:
+    """Jugar una partida sobre un GameState nuevo a partir de un guion de comandos; metrics mide sus turnos"""
+    world = state.world
+    state.start_time = time.time()
+    hints_start = state.hints_remaining
+
+    io = HeadlessIO(iter_commands(commands), capture_output)
+    with game_engine.use_io(io):
+        try:
+            outcome = game_engine.play_room(state, state.room, world, metrics=metrics)
+        except EndOfScript:
+            outcome = "incomplete"
+        score = game_engine.calculate_score(state)
+
+    names = world.names
+    return SimulationResult(
+        outcome=outcome,
+        inputs=io.reads,
+        final_room=names[state.room],
+        score=score,
+        keys=[names[i] for i in iter_bits(state.keys)],
+        treasures=[names[i] for i in iter_bits(state.treasures)],
+        examined=[names[i] for i in iter_bits(state.examined)],
+        hints_used=hints_start - state.hints_remaining,
+        achievements=[a["name"] for key, a in world.achievements.items() if state.is_unlocked(key)],
+        elapsed=time.time() - state.start_time,
+        output=io.lines,
+    )
+
+
+def simulate_many(game_state: Dict[str, Any], object_relations: Union[Dict[str, List], World],
+                  scripts: Iterable[CommandSource], capture_output: bool = False) -> Iterator[SimulationResult]:
+    """Simular varias partidas independientes, una por guion, sobre el mismo mundo"""
+    world = _as_world(game_state, object_relations)
+    initial = GameState.from_dict(world, game_state)
+    for script in scripts:
+        yield run_session(initial.copy(), script, capture_output)
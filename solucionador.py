@@ -0,0 +1,586 @@
+"""
+Solucionador
+------------
+Busca la ruta más corta para escapar de un mundo compilado (y, si se pide,
+para escapar con todos los tesoros) y la devuelve como la lista de comandos
+que habría que escribir en el motor V2.
+
+Un estado de la búsqueda es la habitación actual y el conjunto de bits de
+lo ya sacado de los muebles (GameState.removed). Lo que queda dentro de cada
+mueble se deduce de ese conjunto, igual que en GameState.next_content, así
+que el estado cabe en un solo entero. La búsqueda es A* sobre el número de
+comandos: examinar un mueble cuesta 1 y cruzar una puerta 2 ('examine door'
+y 'si'). La heurística cuenta lo que cualquier ruta tiene que hacer todavía:
+las puertas que son puente en todos los caminos hasta la salida obligan a
+recoger su llave (y lo que tenga encima), igual que cada tesoro que se pide;
+cada uno de esos objetos es un comando, y la ruta tiene que pasar por la
+habitación de cada uno antes de salir. Examinar un tesoro que no se pide y
+que no tapa ninguna llave no sirve de nada y no se intenta.
+
+Además, si en la habitación hay a mano uno de esos objetos, solo se prueba
+cogerlo. Así la mayoría de las mansiones del generador de cientos de
+habitaciones se resuelven de forma exacta para escapar, pero no todas: en
+bloques grandes de habitaciones con varios caminos y llaves opcionales el
+número de estados sigue creciendo de forma exponencial. Con all_treasures el
+problema es como el del viajante (visitar todos los tesoros en el mejor
+orden) y en mundos de más de unas decenas de habitaciones llega al límite.
+
+Pasados max_states estados se abandona la búsqueda exacta (en mundos de
+miles de objetos ni se empieza) y se construye una ruta
+por dependencias: el camino hasta la salida, las llaves de sus puertas, los
+caminos hasta esas llaves, etc., recogidas en orden topológico. Como recoger
+nunca cierra caminos, esa ruta encuentra la salida siempre que exista, en
+tiempo casi lineal; solo que puede no ser la más corta (Solution.optimal es
+False).
+"""
+
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from estado import GameState, iter_bits
+from mundo import World
+
+# Con más objetos que estos solo se busca la ruta por dependencias (salvo max_states=None)
+EXACT_OBJECTS = 4096
+
+# Acciones: examinar un mueble o cruzar una puerta
+_EXAMINE = 0
+_DOOR = 1
+
+# Paso de una ruta: (acción, mueble o puerta, habitación después del paso, objeto recogido o -1)
+Step = Tuple[int, int, int, int]
+
+
+@dataclass
+class Solution:
+    """Ruta encontrada por el solucionador"""
+    commands: List[str]
+    rooms: List[str]  # habitaciones por las que pasa, empezando por la inicial
+    collected: List[str]  # objetos en el orden en que se sacan de los muebles
+    explored: int  # estados expandidos durante la búsqueda
+    optimal: bool = True  # False si la ruta es la de dependencias
+
+    @property
+    def length(self) -> int:
+        return len(self.commands)
+
+
+@dataclass
+class _RoomMoves:
+    furniture: Tuple[Tuple[int, Tuple[int, ...]], ...]  # (mueble, contenido del último al primero)
+    doors: Tuple[Tuple[int, int, int], ...]  # (puerta, llave que la abre o -1, habitación siguiente)
+
+
+_NO_MOVES = _RoomMoves((), ())
+
+
+@dataclass
+class _Graph:
+    moves: Dict[int, _RoomMoves]
+    treasures: int  # conjunto de bits de los tesoros guardados en algún mueble
+    holders: Dict[int, Tuple[int, int, Tuple[int, ...]]]  # objeto -> (habitación, mueble, contenido)
+    # habitación -> puertas en los dos sentidos (puerta, llave o -1, habitación del otro lado); la
+    # salida suele no tener puertas propias, y para ver la forma del grafo da igual desde qué lado se mira
+    links: Dict[int, Tuple[Tuple[int, int, int], ...]] = field(default_factory=dict)
+    distances: Dict[int, Dict[int, int]] = field(default_factory=dict)  # salida -> habitación -> puertas
+    required: Dict[int, Dict[int, int]] = field(default_factory=dict)  # salida -> habitación -> objetos
+    bridges: Optional[Set[int]] = None  # puertas que son puente en el grafo de habitaciones
+    blocks: Optional[Dict[int, int]] = None  # habitación -> bloque sin puentes al que pertenece
+
+
+_graphs: "WeakKeyDictionary[World, _Graph]" = WeakKeyDictionary()
+
+
+def _graph(world: World) -> _Graph:
+    """Movimientos posibles desde cada habitación (se calculan una vez por mundo)"""
+    graph = _graphs.get(world)
+    if graph is not None:
+        return graph
+    moves = {}
+    treasures = 0
+    holders = {}
+    for room_id, items in world.room_items.items():
+        furniture = []
+        doors = []
+        for item_id in items.values():
+            if world.types[item_id] == "door":
+                next_room = world.next_room(room_id, item_id)
+                if next_room is not None:
+                    doors.append((item_id, world.door_key.get(item_id, -1), next_room))
+            elif world.contents.get(item_id):
+                contents = tuple(reversed(world.contents[item_id]))
+                furniture.append((item_id, contents))
+                for obj_id in contents:
+                    holders[obj_id] = (room_id, item_id, contents)
+                    if world.types[obj_id] == "treasure":
+                        treasures |= 1 << obj_id
+        moves[room_id] = _RoomMoves(tuple(furniture), tuple(doors))
+    links: Dict[int, Dict[int, Tuple[int, int, int]]] = {}
+    for room_id, room_moves in moves.items():
+        for door_id, key_id, next_room in room_moves.doors:
+            links.setdefault(room_id, {})[door_id] = (door_id, key_id, next_room)
+            links.setdefault(next_room, {})[door_id] = (door_id, key_id, room_id)
+    graph = _graphs[world] = _Graph(moves, treasures, holders,
+                                    links={room_id: tuple(doors.values()) for room_id, doors in links.items()})
+    return graph
+
+
+def _stack(graph: _Graph, obj_id: int) -> int:
+    """El objeto y lo que tiene encima en su mueble: hay que sacarlo todo para llevárselo"""
+    holder = graph.holders.get(obj_id)
+    if holder is None:
+        return 1 << obj_id
+    contents = holder[2]
+    mask = 0
+    for other in contents[:contents.index(obj_id) + 1]:
+        mask |= 1 << other
+    return mask
+
+
+def _bridges(graph: _Graph) -> Set[int]:
+    """Puertas que son puente: quitarlas separa el grafo de habitaciones (Tarjan, sin recursión)"""
+    if graph.bridges is not None:
+        return graph.bridges
+    order: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    bridges: Set[int] = set()
+    for root in graph.links:
+        if root in order:
+            continue
+        order[root] = low[root] = len(order)
+        stack = [(root, -1, iter(graph.links[root]))]
+        while stack:
+            room_id, via, doors = stack[-1]
+            door = next(doors, None)
+            if door is None:
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[room_id])
+                    if low[room_id] > order[parent]:
+                        bridges.add(via)
+                continue
+            door_id, key_id, next_room = door
+            if key_id < 0 or door_id == via:
+                continue  # sin llave no se cruza nunca; por la misma puerta no se vuelve
+            if next_room in order:
+                low[room_id] = min(low[room_id], order[next_room])
+            else:
+                order[next_room] = low[next_room] = len(order)
+                stack.append((next_room, door_id, iter(graph.links[next_room])))
+    graph.bridges = bridges
+    return bridges
+
+
+def _blocks(graph: _Graph) -> Dict[int, int]:
+    """Bloque de cada habitación: las que se unen sin cruzar ninguna puerta puente"""
+    if graph.blocks is not None:
+        return graph.blocks
+    bridges = _bridges(graph)
+    blocks: Dict[int, int] = {}
+    for first in graph.links:
+        if first in blocks:
+            continue
+        blocks[first] = first
+        pending = [first]
+        while pending:
+            room_id = pending.pop()
+            for door_id, key_id, next_room in graph.links[room_id]:
+                if key_id >= 0 and door_id not in bridges and next_room not in blocks:
+                    blocks[next_room] = first
+                    pending.append(next_room)
+    graph.blocks = blocks
+    return blocks
+
+
+def _relevant(world: World, graph: _Graph, room: int, target: int, taken: int,
+              wanted: int) -> Tuple[Set[int], int]:
+    """Habitaciones por las que puede pasar una ruta más corta y objetos que puede recoger.
+
+    Los bloques sin puentes forman un árbol unido por las puertas puente. Una
+    ruta solo necesita el subárbol que une la salida, la habitación inicial y
+    las habitaciones de lo que hay que recoger: lo que se pide, las llaves de
+    las puertas de ese subárbol y lo que las tapa (que a su vez puede ampliar el
+    subárbol). Entrar en un bloque de fuera obliga a volver por el mismo puente
+    y allí solo hay objetos que no abren nada necesario, así que quitar esa
+    excursión acorta la ruta: podarlo no cambia la ruta más corta.
+    """
+    blocks = _blocks(graph)
+    bridges = _bridges(graph)
+    # Árbol de bloques con la raíz en el de la salida: bloque -> (bloque padre, puente)
+    root = blocks.setdefault(target, target)  # una salida sin puertas es un bloque ella sola
+    up: Dict[int, Tuple[int, int]] = {root: (-1, -1)}
+    members: Dict[int, List[int]] = {}
+    for room_id, block in blocks.items():
+        members.setdefault(block, []).append(room_id)
+    pending_blocks = [root]
+    while pending_blocks:
+        block = pending_blocks.pop()
+        for room_id in members[block]:
+            for door_id, key_id, next_room in graph.links.get(room_id, ()):
+                if door_id in bridges and key_id >= 0 and blocks[next_room] not in up:
+                    up[blocks[next_room]] = (block, door_id)
+                    pending_blocks.append(blocks[next_room])
+
+    inside: Set[int] = set()  # bloques del subárbol
+    relevant = 0
+    seen = 0  # objetos cuya pila y habitación ya se añadieron
+    objects = wanted & ~taken
+    rooms = [room, target]
+    while objects or rooms:
+        for obj_id in iter_bits(objects):
+            relevant |= _stack(graph, obj_id) & ~taken
+            holder = graph.holders.get(obj_id)
+            if holder is not None:
+                rooms.append(holder[0])
+        seen |= objects
+        doors: List[int] = []
+        for room_id in rooms:
+            # Subir por el árbol hasta la raíz o hasta un bloque que ya está dentro
+            block = blocks.get(room_id, -1)
+            while block in up and block not in inside:
+                inside.add(block)
+                for member in members[block]:
+                    doors.extend(door_id for door_id, _, _ in graph.links.get(member, ()) if door_id not in bridges)
+                block, bridge = up[block]
+                if bridge >= 0:
+                    doors.append(bridge)  # el puente hacia el padre
+        rooms = []
+        objects = 0
+        for door_id in doors:
+            key_id = world.door_key.get(door_id, -1)
+            if key_id >= 0 and not (taken | seen) >> key_id & 1:
+                objects |= 1 << key_id
+    allowed = {room_id for block in inside for room_id in members[block]}
+    return allowed, relevant
+
+
+def _required(world: World, graph: _Graph, target: int) -> Dict[int, int]:
+    """Objetos que hay que recoger desde cada habitación para llegar a target: las llaves
+    (con lo que tengan encima) de las puertas puente de todos sus caminos"""
+    cached = graph.required.get(target)
+    if cached is not None:
+        return cached
+    bridges = _bridges(graph)
+    required = {target: 0}
+    # Por las puertas que no son puente se llega sin nada más; cruzar un puente hacia
+    # fuera de la salida añade su llave a lo que pide la habitación de este lado
+    queue = deque([target])
+    while queue:
+        room_id = queue.popleft()
+        for door_id, key_id, next_room in graph.links.get(room_id, ()):
+            if key_id < 0 or next_room in required:
+                continue
+            extra = _stack(graph, key_id) if door_id in bridges else 0
+            required[next_room] = required[room_id] | extra
+            if extra:
+                queue.append(next_room)
+            else:
+                queue.appendleft(next_room)
+    graph.required[target] = required
+    return required
+
+
+def _distances(world: World, graph: _Graph, target: int) -> Dict[int, int]:
+    """Puertas que hay que cruzar desde cada habitación hasta target, sin mirar cerraduras"""
+    cached = graph.distances.get(target)
+    if cached is not None:
+        return cached
+    incoming: Dict[int, List[int]] = {}
+    for room_id, room_moves in graph.moves.items():
+        for _, _, next_room in room_moves.doors:
+            incoming.setdefault(next_room, []).append(room_id)
+    distances = {target: 0}
+    queue = deque([target])
+    while queue:
+        room_id = queue.popleft()
+        for previous in incoming.get(room_id, ()):
+            if previous not in distances:
+                distances[previous] = distances[room_id] + 1
+                queue.append(previous)
+    graph.distances[target] = distances
+    return distances
+
+
+def solve(world: World, room: int, target: int, taken: int = 0,
+          all_treasures: bool = False, max_states: Optional[int] = 50_000) -> Optional[Solution]:
+    """Ruta más corta (en comandos) de room a target con lo ya recogido en taken.
+
+    Con all_treasures la ruta tiene que recoger antes todos los tesoros que
+    hay en los muebles. Devuelve None si no hay solución. Si la búsqueda
+    exacta pasa de max_states estados (None: sin límite), o el mundo tiene más de
+    EXACT_OBJECTS objetos, se devuelve la ruta por dependencias.
+    """
+    graph = _graph(world)
+    distances = _distances(world, graph, target)
+    if room not in distances:
+        return None
+    wanted = graph.treasures if all_treasures else 0
+    explored = 0
+    # Cada estado lleva un bit por objeto: en mundos enormes ni se intenta la búsqueda exacta
+    if max_states is None or len(world.names) <= EXACT_OBJECTS:
+        steps, explored, complete = _search(world, graph, distances, room, target, taken, wanted, max_states)
+        if complete:
+            return None if steps is None else _solution(world, room, steps, explored)
+    steps = _dependency_route(world, graph, room, target, taken, wanted)
+    return None if steps is None else _solution(world, room, steps, explored, optimal=False)
+
+
+def _search(world: World, graph: _Graph, distances: Dict[int, int], room: int, target: int,
+            taken: int, wanted: int, max_states: Optional[int]) -> Tuple[Optional[List[Step]], int, bool]:
+    """A* exacta: (pasos o None si no hay salida, estados expandidos, si terminó antes del límite)"""
+    shift = len(world.names).bit_length()
+    room_mask = (1 << shift) - 1
+    required = _required(world, graph, target)
+    allowed, relevant = _relevant(world, graph, room, target, taken, wanted)
+    wanted_stacks = 0
+    for obj_id in iter_bits(wanted):
+        wanted_stacks |= _stack(graph, obj_id)
+    wanted_list = list(iter_bits(wanted_stacks))
+    # Objetos pendientes de cada habitación y, por objeto, las puertas desde cada
+    # habitación hasta la suya y de ahí a la salida; se calculan al necesitarlos
+    pending: Dict[int, Tuple[List[int], Set[int]]] = {}
+    through: Dict[int, Dict[int, int]] = {}
+    estimates: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+
+    def detours(obj_id: int) -> Dict[int, int]:
+        holder = graph.holders.get(obj_id)
+        if holder is None:
+            table = {}
+        else:
+            onward = distances.get(holder[0], 0)
+            table = {other: doors + onward for other, doors in _distances(world, graph, holder[0]).items()}
+        through[obj_id] = table
+        return table
+
+    def mandatory(state_room: int) -> Tuple[List[int], Set[int]]:
+        """Lo que cualquier ruta desde state_room tiene que recoger (sin mirar lo ya recogido)"""
+        objects = pending.get(state_room)
+        if objects is None:
+            members = set(iter_bits(required.get(state_room, 0))).union(wanted_list)
+            objects = pending[state_room] = (sorted(members), members)
+        return objects
+
+    def estimate(state_room: int, state_taken: int) -> int:
+        need = [obj_id for obj_id in mandatory(state_room)[0] if not state_taken >> obj_id & 1]
+        key = (state_room, tuple(need))
+        cached = estimates.get(key)
+        if cached is not None:
+            return cached
+        doors = distances[state_room]
+        for obj_id in need:
+            table = through.get(obj_id)
+            if table is None:
+                table = detours(obj_id)
+            doors = max(doors, table.get(state_room, 0))
+        value = estimates[key] = 2 * doors + len(need)
+        return value
+
+    start = taken << shift | room
+    cost = {start: 0}
+    # estado -> (estado anterior, tipo de acción, objeto)
+    parent: Dict[int, Tuple[int, int, int]] = {}
+    # A igualdad de estimación se expande antes el estado más avanzado
+    heap = [(estimate(room, taken), 0, start)]
+    explored = 0
+    while heap:
+        _, negative_cost, state = heapq.heappop(heap)
+        spent = -negative_cost
+        if spent > cost[state]:
+            continue  # entrada vieja: ya se llegó a este estado por un camino más corto
+        state_room = state & room_mask
+        state_taken = state >> shift
+        if state_room == target and not wanted & ~state_taken:
+            return _steps(start, state, parent, shift), explored, True
+        explored += 1
+        if max_states is not None and explored > max_states:
+            return None, explored, False
+
+        room_moves = graph.moves.get(state_room, _NO_MOVES)
+        examines = []
+        for furniture_id, contents in room_moves.furniture:
+            # Como en GameState.next_content: sale el último objeto que no se ha recogido
+            found = next((obj_id for obj_id in contents if not state_taken >> obj_id & 1), None)
+            if found is not None and relevant >> found & 1:
+                examines.append((furniture_id, found))
+        # Si hay a mano algo que hay que recoger sí o sí, cogerlo ya no empeora ninguna
+        # ruta (recoger no cierra nada): es el único paso que hace falta probar
+        required_here = mandatory(state_room)[1]
+        forced = next((examine for examine in examines if examine[1] in required_here), None)
+        for furniture_id, found in examines if forced is None else (forced,):
+            new_taken = state_taken | 1 << found
+            _push(heap, cost, parent, state, new_taken << shift | state_room, spent + 1,
+                  estimate(state_room, new_taken), _EXAMINE, furniture_id)
+        if forced is not None:
+            continue
+        for door_id, key_id, next_room in room_moves.doors:
+            if key_id < 0 or not state_taken >> key_id & 1 or next_room not in allowed:
+                continue
+            _push(heap, cost, parent, state, state_taken << shift | next_room, spent + 2,
+                  estimate(next_room, state_taken), _DOOR, door_id)
+    return None, explored, True
+
+
+def _push(heap: list, cost: Dict[int, int], parent: Dict[int, Tuple[int, int, int]], state: int,
+          new_state: int, new_cost: int, estimate: int, action: int, obj_id: int) -> None:
+    if new_cost < cost.get(new_state, new_cost + 1):
+        cost[new_state] = new_cost
+        parent[new_state] = (state, action, obj_id)
+        heapq.heappush(heap, (new_cost + estimate, -new_cost, new_state))
+
+
+def _steps(start: int, end: int, parent: Dict[int, Tuple[int, int, int]], shift: int) -> List[Step]:
+    room_mask = (1 << shift) - 1
+    steps = []
+    state = end
+    while state != start:
+        previous, action, obj_id = parent[state]
+        found = (state >> shift) & ~(previous >> shift)
+        steps.append((action, obj_id, state & room_mask, found.bit_length() - 1))
+        state = previous
+    steps.reverse()
+    return steps
+
+
+def _dependency_route(world: World, graph: _Graph, room: int, target: int, taken: int,
+                      wanted: int) -> Optional[List[Step]]:
+    """Ruta por dependencias para mundos grandes, en tiempo casi lineal.
+
+    Primero se explora como si se recogiera todo lo alcanzable: una habitación
+    se descubre al tener la llave de una puerta hacia ella, y su camino queda en
+    el árbol came_from. Cada puerta de ese camino necesita su llave, cada llave
+    el camino hasta su mueble y lo que tenga encima, y así hasta cerrar el
+    conjunto. Como esas llaves estaban en habitaciones descubiertas antes, las
+    dependencias no forman ciclos y se recogen en orden topológico andando por
+    el árbol. None si no hay salida (o algún tesoro que se pide no se alcanza).
+    """
+    came_from: Dict[int, Tuple[int, int]] = {room: (-1, -1)}
+    depth = {room: 0}
+    order = [room]
+    obtained = set()  # llaves que se tendrían al recorrer lo descubierto
+    waiting: Dict[int, List[Tuple[int, int, int]]] = {}  # llave -> puertas que espera abrir
+
+    def discover(current: int, door_id: int, next_room: int) -> None:
+        if next_room not in came_from:
+            came_from[next_room] = (current, door_id)
+            depth[next_room] = depth[current] + 1
+            order.append(next_room)
+
+    for current in order:
+        room_moves = graph.moves.get(current, _NO_MOVES)
+        for _, contents in room_moves.furniture:
+            for obj_id in contents:
+                obtained.add(obj_id)
+                for door in waiting.pop(obj_id, ()):
+                    discover(*door)
+        for door_id, key_id, next_room in room_moves.doors:
+            if next_room in came_from or key_id < 0:
+                continue
+            if taken >> key_id & 1 or key_id in obtained:
+                discover(current, door_id, next_room)
+            else:
+                waiting.setdefault(key_id, []).append((current, door_id, next_room))
+    if target not in came_from:
+        return None
+
+    # Nodos de dependencia: los objetos por su id y cada habitación por rooms_from + id
+    # (la habitación pide el camino hasta su padre y la llave de la puerta de entrada)
+    rooms_from = len(world.names)
+
+    def depends(node: int) -> List[int]:
+        if node >= rooms_from:
+            previous, door_id = came_from[node - rooms_from]
+            if previous < 0:
+                return []
+            key_id = world.door_key[door_id]
+            parent = [rooms_from + previous]
+            return parent if taken >> key_id & 1 else parent + [key_id]
+        holder = graph.holders.get(node)
+        if holder is None or holder[0] not in came_from:
+            return [-1]
+        above = [other for other in holder[2][:holder[2].index(node)] if not taken >> other & 1]
+        return above + [rooms_from + holder[0]]
+
+    # Los tesoros en preorden del árbol, para recorrerlo como una visita guiada
+    children: Dict[int, List[int]] = {}
+    for current in order[1:]:
+        children.setdefault(came_from[current][0], []).append(current)
+    preorder: Dict[int, int] = {}
+    pending_rooms = [room]
+    while pending_rooms:
+        current = pending_rooms.pop()
+        preorder[current] = len(preorder)
+        pending_rooms.extend(children.get(current, ()))
+    treasures = sorted(iter_bits(wanted & ~taken),
+                       key=lambda obj_id: preorder.get(graph.holders.get(obj_id, (room,))[0], -1))
+
+    # Orden topológico (postorden de una DFS sin recursión) desde lo que pide la salida
+    collect: List[int] = []
+    state: Dict[int, int] = {}  # nodo -> 1 en curso, 2 terminado
+    for goal in [rooms_from + target] + treasures:
+        if state.get(goal) == 2:
+            continue
+        stack = [(goal, iter(depends(goal)))]
+        state[goal] = 1
+        while stack:
+            node, pending = stack[-1]
+            following = next(pending, None)
+            if following is None:
+                stack.pop()
+                state[node] = 2
+                if node < rooms_from:
+                    collect.append(node)
+            elif following < 0 or state.get(following) == 1:
+                return None
+            elif following not in state:
+                state[following] = 1
+                stack.append((following, iter(depends(following))))
+
+    def walk(current: int, destination: int) -> None:
+        """Pasos por el árbol: subir hasta el antepasado común y bajar"""
+        down = []
+        while current != destination:
+            if depth[current] >= depth[destination]:
+                previous, door_id = came_from[current]
+                steps.append((_DOOR, door_id, previous, -1))
+                current = previous
+            else:
+                previous, door_id = came_from[destination]
+                down.append((_DOOR, door_id, destination, -1))
+                destination = previous
+        steps.extend(reversed(down))
+
+    steps: List[Step] = []
+    current = room
+    for obj_id in collect:
+        holder_room, furniture_id, _ = graph.holders[obj_id]
+        walk(current, holder_room)
+        steps.append((_EXAMINE, furniture_id, holder_room, obj_id))
+        current = holder_room
+    walk(current, target)
+    return steps
+
+
+def _solution(world: World, room: int, steps: List[Step], explored: int, optimal: bool = True) -> Solution:
+    names = world.names
+    commands: List[str] = []
+    rooms = [names[room]]
+    collected = []
+    for action, obj_id, room_after, found in steps:
+        commands.append(f"examine {names[obj_id]}")
+        if action == _DOOR:
+            commands.append("si")
+            rooms.append(names[room_after])
+        else:
+            collected.append(names[found])
+    return Solution(commands, rooms, collected, explored, optimal)
+
+
+def solve_state(state: GameState, all_treasures: bool = False,
+                max_states: Optional[int] = 50_000) -> Optional[Solution]:
+    """Ruta más corta desde una partida en curso hasta su habitación objetivo"""
+    return solve(state.world, state.room, state.target_room, state.removed,
+                 all_treasures, max_states)
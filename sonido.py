@@ -0,0 +1,77 @@
+"""
+Sonido
+------
+Cola de efectos de sonido que suenan fuera del bucle de juego.
+
+Los efectos (una campana con pausas) se encolan sin esperar y los toca un
+hilo aparte, así que las pausas entre toques no retrasan el turno. Los
+efectos que llegan juntos (un tesoro y un logro en el mismo turno, o varios
+mientras aún suena el anterior) se funden en uno solo: suena el más largo.
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+Pauses = Tuple[float, ...]
+
+
+def ring(pauses: Pauses) -> None:
+    """Hacer sonar la campana de la terminal una vez por pausa, esperando entre toques"""
+    for pause in pauses:
+        # Sin salto de línea: no mueve el cursor de la línea que se está escribiendo
+        sys.stdout.write("\a")
+        sys.stdout.flush()
+        if pause:
+            time.sleep(pause)
+
+
+def coalesce(cues: List[Pauses]) -> Pauses:
+    """Fundir una ráfaga de efectos en uno: el de más toques (y, a igualdad, el más largo)"""
+    return max(cues, key=lambda pauses: (len(pauses), sum(pauses)))
+
+
+class SoundQueue:
+    """Efectos pendientes y el hilo que los toca"""
+
+    def __init__(self, play: Callable[[Pauses], None] = ring, burst: float = 0.05):
+        self.play = play
+        self.burst = burst  # segundos que se espera a que llegue el resto de una ráfaga
+        self.pending: List[Pauses] = []
+        self.playing = False
+        self._ready = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def cue(self, pauses: Pauses) -> None:
+        """Encolar un efecto; vuelve enseguida"""
+        with self._ready:
+            self.pending.append(pauses)
+            if self._worker is None:
+                # El hilo se crea con el primer efecto; daemon para no retrasar la salida del programa
+                self._worker = threading.Thread(target=self._run, name="game-sounds", daemon=True)
+                self._worker.start()
+            self._ready.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._ready:
+                while not self.pending:
+                    self._ready.wait()
+                end = time.monotonic() + self.burst
+                while (left := end - time.monotonic()) > 0:
+                    self._ready.wait(left)
+                cues, self.pending = self.pending, []
+                self.playing = True
+            try:
+                self.play(coalesce(cues))
+            except Exception:
+                pass  # un fallo de sonido no debe afectar a la partida
+            with self._ready:
+                self.playing = False
+                self._ready.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que no quede nada por sonar (útil al salir del juego)"""
+        with self._ready:
+            return self._ready.wait_for(lambda: not self.pending and not self.playing, timeout)
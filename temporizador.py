@@ -0,0 +1,155 @@
+"""
+Temporizador
+------------
+Plazos por evento en lugar de hilos que escriben cada segundo.
+
+- TimerWheel: rueda de temporizadores con programar/cancelar en O(1), pensada
+  para un plazo por sesión entre miles de sesiones. Un solo tic periódico
+  dispara todo lo que ha vencido.
+- read_line: lee una línea de la terminal con un plazo. Espera con select()
+  hasta la línea o hasta el siguiente segundo, así que el plazo vence aunque
+  el jugador no pulse Enter.
+- Countdown: muestra el tiempo restante en la primera línea de la terminal
+  sin tocar la línea que se está escribiendo, y solo cuando el texto cambia
+  (es un pantalla.Panel de una línea).
+"""
+
+import os
+import select
+import sys
+import time
+from typing import Callable, List, Optional
+
+from pantalla import Frame, Panel, Renderer
+
+Clock = Callable[[], float]
+
+
+class Timer:
+    """Temporizador programado; cancel() lo desactiva sin sacarlo de la rueda"""
+    __slots__ = ("tick", "callback", "cancelled")
+
+    def __init__(self, tick: int, callback: Callable[[], None]):
+        self.tick = tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Rueda de temporizadores con resolución de un tic"""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512, clock: Clock = time.time):
+        self.tick = tick
+        self.clock = clock
+        self.slots: List[List[Timer]] = [[] for _ in range(slots)]
+        self.current = int(clock() // tick)
+        self.pending = 0
+
+    def schedule(self, deadline: float, callback: Callable[[], None]) -> Timer:
+        """Llamar a callback en el primer tic a partir de deadline (en unidades del reloj)"""
+        # Un plazo ya vencido se dispara en el siguiente advance()
+        tick = max(int(-(-deadline // self.tick)), self.current + 1)
+        timer = Timer(tick, callback)
+        self.slots[tick % len(self.slots)].append(timer)
+        self.pending += 1
+        return timer
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Avanzar hasta now disparando los temporizadores vencidos; devuelve cuántos"""
+        target = int((self.clock() if now is None else now) // self.tick)
+        fired = 0
+        slot_count = len(self.slots)
+        # Si el salto da más de una vuelta basta con recorrer cada casilla una vez
+        first = max(self.current + 1, target - slot_count + 1)
+        for tick in range(first, target + 1):
+            slot = self.slots[tick % slot_count]
+            if not slot:
+                continue
+            keep = []
+            for timer in slot:
+                if timer.cancelled:
+                    self.pending -= 1
+                elif timer.tick <= target:
+                    self.pending -= 1
+                    fired += 1
+                    timer.callback()
+                else:
+                    keep.append(timer)  # vence en una vuelta posterior
+            slot[:] = keep
+        self.current = max(self.current, target)
+        return fired
+
+
+def format_remaining(seconds: float) -> str:
+    """Tiempo restante como mm:ss"""
+    seconds = max(0, int(seconds))
+    return f"{seconds // 60:02}:{seconds % 60:02}"
+
+
+class Countdown:
+    """Cuenta atrás en la primera línea de la terminal, sin mover el cursor de la entrada"""
+
+    def __init__(self, label: Callable[[float], str], stream=None):
+        self.label = label
+        self.stream = stream or sys.stdout
+        self.panel = Panel(Renderer(), top=1)
+        self.enabled = self.stream.isatty()
+
+    def refresh(self, remaining: float) -> None:
+        if not self.enabled:
+            return
+        # El panel guarda el cursor, reescribe la línea 1 si cambió y lo devuelve a donde estaba
+        update = self.panel.update(Frame([self.label(remaining)]))
+        if update:
+            self.stream.write(update)
+            self.stream.flush()
+
+    def invalidate(self) -> None:
+        """Volver a dibujar en el siguiente refresh (p. ej. después de limpiar la pantalla)"""
+        self.panel.invalidate()
+
+
+def stdin_selectable() -> bool:
+    """select() solo sirve con la terminal real de un sistema POSIX (no en Jupyter ni Windows)"""
+    if os.name == "nt":
+        return False
+    try:
+        sys.stdin.fileno()
+    except (AttributeError, ValueError, OSError):
+        return False
+    return sys.stdin.isatty()
+
+
+def read_line(prompt: str, deadline: Optional[float], on_tick: Optional[Callable[[float], None]] = None,
+              clock: Clock = time.time) -> Optional[str]:
+    """Leer una línea antes de deadline. Devuelve None si el plazo vence antes.
+
+    Donde no se puede esperar con select() se usa input() y el plazo se
+    comprueba después de la respuesta.
+    """
+    if deadline is None or not stdin_selectable():
+        line = input(prompt)
+        return None if deadline is not None and clock() >= deadline else line
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    while True:
+        now = clock()
+        remaining = deadline - now
+        if remaining <= 0:
+            sys.stdout.write("\n")
+            return None
+        if on_tick is not None:
+            on_tick(remaining)
+        # Despertar con la entrada, con el siguiente cambio de segundo (si hay cuenta
+        # atrás que refrescar) o con el plazo, lo que llegue antes
+        wait = remaining if on_tick is None else min(remaining, 1 - now % 1 or 1)
+        ready, _, _ = select.select([sys.stdin], [], [], wait)
+        if ready:
+            line = sys.stdin.readline()
+            if not line:
+                raise EOFError
+            return line.rstrip("\n")
@@ -0,0 +1,32 @@
+"""
+Configuración de las pruebas
+----------------------------
+Los módulos del juego están en la raíz del repositorio, sin paquete: se
+añade al path. Cada prueba corre en su propio directorio temporal para que
+las partidas, los diarios y la clasificación no acaben en el repositorio.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from cargador import WorldFile, load_world  # noqa: E402
+
+MANSION = os.path.join(ROOT, "mundos", "mansion.json")
+MANSION_SCRIPT = os.path.join(ROOT, "guiones", "mansion_completa.txt")
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def mansion(tmp_path) -> WorldFile:
+    """La mansión del notebook, con la caché compilada en el directorio temporal"""
+    return load_world(MANSION, cache_dir=str(tmp_path / ".cache"))
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from cargador import WorldFileError, load_world
+from conftest import MANSION
+
+
+def _write(tmp_path, document) -> str:
+    path = tmp_path / "mundo.json"
+    path.write_text(json.dumps(document), encoding="utf-8")
+    return str(path)
+
+
+def test_all_errors_are_reported_together(tmp_path):
+    with open(MANSION, encoding="utf-8") as f:
+        document = json.load(f)
+    del document["rooms"]["bedroom2"]["description"]
+    document["relations"]["piano"].append("missing key")
+    document["target"] = "garden"
+
+    with pytest.raises(WorldFileError) as raised:
+        load_world(_write(tmp_path, document))
+
+    errors = raised.value.errors
+    assert any("description" in error for error in errors)
+    assert any("missing key" in error for error in errors)
+    assert any("garden" in error for error in errors)
+
+
+@pytest.mark.parametrize("document", [[1, 2], "mansion", None])
+def test_document_must_be_an_object(tmp_path, document):
+    with pytest.raises(WorldFileError):
+        load_world(_write(tmp_path, document))
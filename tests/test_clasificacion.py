@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+import funcionesfinal_v2 as game_engine
+from clasificacion import Leaderboard, Run
+from estado import GameState
+from guardado import world_fingerprint
+from simulacion import HeadlessIO
+
+WORLD = 1234
+
+
+def _run(player, score, elapsed=100.0, difficulty="normal", world=WORLD):
+    return Run(player, world, difficulty, score, elapsed, 0, 0, 0.0)
+
+
+def test_top_orders_by_score_then_time(tmp_path):
+    with Leaderboard(str(tmp_path / "c.db"), batch_size=100) as board:
+        for run in [_run("ana", 500, 90), _run("luis", 900), _run("eva", 500, 60), _run("otro", 999, world=1),
+                    _run("duro", 999, difficulty="hard")]:
+            board.add(run)
+
+        # top() escribe antes lo pendiente
+        assert [run.player for run in board.top(WORLD, "normal", k=2)] == ["luis", "eva"]
+        assert [run.player for run in board.top(WORLD, "normal")] == ["luis", "eva", "ana"]
+
+
+def test_standing_counts_pending_runs(tmp_path):
+    with Leaderboard(str(tmp_path / "c.db"), batch_size=3) as board:
+        for score in (100, 200, 300):
+            board.add(_run("a", score))  # el tercero llena el lote y se escribe
+        board.add(_run("b", 400))  # sigue pendiente
+
+        standing = board.standing(WORLD, "normal", 250)
+        assert (standing.rank, standing.total) == (3, 4)
+        assert standing.percentile == pytest.approx(50.0)
+        assert board.standing(WORLD, "hard", 250).total == 0
+
+
+def test_best_and_player_standing(tmp_path):
+    with Leaderboard(str(tmp_path / "c.db")) as board:
+        for player, score in [("ana", 100), ("ana", 700), ("luis", 400)]:
+            board.add(_run(player, score))
+
+        assert board.best("ana", WORLD, "normal") == 700
+        assert board.best("nadie", WORLD, "normal") is None
+        assert board.player_standing("luis", WORLD, "normal").rank == 2
+
+
+def test_runs_survive_reopening_and_concurrent_adds(tmp_path):
+    path = str(tmp_path / "c.db")
+    with Leaderboard(path, batch_size=16) as board:
+        threads = [threading.Thread(target=lambda n=n: [board.add(_run(f"p{n}", i)) for i in range(100)])
+                   for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with Leaderboard(path) as board:
+        assert board.standing(WORLD, "normal", -1).total == 400
+
+
+def test_record_run_shows_the_standing(mansion, tmp_path):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+    io = HeadlessIO(iter(()))
+    with Leaderboard(str(tmp_path / "c.db")) as board, game_engine.use_io(io):
+        game_engine.record_run(state, board, "ana")
+
+        assert board.best("ana", world_fingerprint(mansion.world), "normal") == game_engine.calculate_score(state)
+    assert "Clasificación (normal): puesto 1 de 1" in "".join(io.lines)
@@ -0,0 +1,71 @@
+import pytest
+
+import funcionesfinal_v2 as game_engine
+from comandos import NameIndex, edit_distance, room_index
+from simulacion import simulate_game
+
+NAMES = ["key for door a", "key for door b", "double bed", "dresser", "door b"]
+
+
+def _names(index, bits):
+    return sorted(index.names[bit] for bit in bits)
+
+
+@pytest.mark.parametrize("a, b, distance", [("piano", "piano", 0), ("pinao", "piano", 2),
+                                            ("pian", "piano", 1), ("xyzzy", "piano", 3)])
+def test_edit_distance_is_capped(a, b, distance):
+    assert edit_distance(a, b, limit=2) == distance
+
+
+def test_every_word_abbreviates_a_word_of_the_name():
+    index = NameIndex(NAMES)
+
+    assert _names(index, index.resolve("k f d a")[0]) == ["key for door a"]
+    assert _names(index, index.resolve("dou")[0]) == ["double bed"]
+    assert _names(index, index.resolve("do")[0]) == ["door b", "double bed", "key for door a", "key for door b"]
+    # Una palabra escrita entera gana a la que solo la abrevia
+    assert _names(index, index.resolve("door b")[0]) == ["door b"]
+    assert _names(index, index.resolve("dres")[0]) == ["dresser"]
+
+
+def test_typos_become_suggestions_not_matches():
+    index = NameIndex(NAMES)
+
+    matches, suggestions = index.resolve("dreser")
+    assert matches == []
+    assert _names(index, suggestions) == ["dresser"]
+    assert index.resolve("zzzz") == ([], [])
+
+
+def test_scope_limits_the_search_to_some_names():
+    index = NameIndex(NAMES)
+    only_beds = 1 << NAMES.index("double bed")
+
+    assert _names(index, index.resolve("d", only_beds)[0]) == ["double bed"]
+    assert index.resolve("dresser", only_beds)[0] == []
+
+
+def test_commands_resolve_by_prefix_and_argument():
+    def names(word, has_argument):
+        return [command.name for command in game_engine.COMMANDS.resolve(word, has_argument)[0]]
+
+    assert names("ex", True) == ["examine"]
+    assert names("ex", False) == ["explore"]
+    assert names("inv", False) == ["inventory"]
+    assert names("exmaine", True) == []
+    assert [c.name for c in game_engine.COMMANDS.resolve("exmaine", True)[1]] == ["examine"]
+
+
+def test_room_index_is_built_once_per_room(mansion):
+    room = mansion.world.ids["game room"]
+
+    index = room_index(mansion.world, room)
+    assert room_index(mansion.world, room) is index
+    assert _names(index, index.resolve("pia")[0]) == ["piano"]
+
+
+def test_abbreviations_play_like_full_names(mansion):
+    result = simulate_game(mansion.initial_state(), mansion.world, ["ex pia", "ex pia", "ex d a", "si"])
+
+    assert result.keys == ["key for door a"]
+    assert result.final_room == "bedroom1"
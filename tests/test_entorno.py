@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import funcionesfinal_v2 as game_engine  # noqa: E402
+from entorno import BatchEnv  # noqa: E402
+from estado import GameState  # noqa: E402
+from mundo import compile_world  # noqa: E402
+from simulacion import HeadlessIO  # noqa: E402
+
+
+def _room(name):
+    return {"name": name, "type": "room", "description": name}
+
+
+def _note(name):
+    return {"name": name, "type": "note", "description": name}
+
+
+DOOR = {"name": "door x", "type": "door", "description": "Una puerta", "mechanism": "Necesita su llave"}
+RELATIONS = {
+    "hall": [{"name": "box", "type": "furniture", "description": "Una caja"},
+             {"name": "chest", "type": "furniture", "description": "Un baúl"}, DOOR],
+    "outside": [DOOR],
+    # Se sacan del último al primero: cada nota tapa lo que hay debajo
+    "box": [{"name": "key for door x", "type": "key", "target": DOOR, "description": "Una llave",
+             "hint": "Abre la puerta", "story": "Estaba en la caja"}, _note("note")],
+    "chest": [{"name": "gem", "type": "treasure", "value": 50, "description": "Una gema", "power": "Brilla"},
+              _note("letter")],
+    "door x": [_room("hall"), _room("outside")],
+}
+INITIAL = {"current_room": _room("hall"), "target_room": _room("outside"),
+           "keys_collected": [], "treasure_collected": [], "examined_objects": set()}
+
+
+def _engine_game(world, initial, env, history, game):
+    """Repetir en el motor las acciones que tomó una partida del entorno"""
+    state = GameState.from_dict(world, initial)
+    state.start_time = 0.0
+    with game_engine.use_io(HeadlessIO(iter(()), capture=False)):
+        run = game_engine.start_session(state, world, seed=game, now=0.0)
+        now = 0.0
+        for actions, rooms in history:
+            if run.done:
+                break
+            now += env.seconds_per_step
+            names = env.action_names(rooms[game])
+            action = int(actions[game])
+            if action == env.hint_action:
+                game_engine.feed_line(run, "hint", now)
+            elif action < len(names):
+                game_engine.feed_line(run, f"examine {names[action]}", now)
+                if run.state == "confirm_door":
+                    game_engine.feed_line(run, "si", now)
+            else:
+                game_engine.feed_line(run, "", now)
+    return run, state
+
+
+@pytest.mark.parametrize("examined", [set(), {"chest"}])
+def test_batch_matches_the_engine_with_notes_on_top(examined):
+    world = compile_world(RELATIONS)
+    initial = dict(INITIAL, examined_objects=examined)
+    env = BatchEnv(world, initial)
+    env.reset(100)
+    rng = np.random.default_rng(1)
+    history = []
+    while not env.done.all():
+        actions = rng.integers(0, env.num_actions, env.n)
+        history.append((actions, env.room.copy()))
+        env.step(actions)
+
+    assert env.escaped.any()
+    for game in range(env.n):
+        run, state = _engine_game(world, initial, env, history, game)
+        treasures = sum(1 << int(t) for t, have in zip(env.treasure_ids, env.treasures[game]) if have)
+        assert (run.state == "escaped") == env.escaped[game]
+        assert game_engine.calculate_score(state) == env.score[game]
+        assert state.treasures == treasures
+        assert state.examined_count == env.examined_count[game]
+
+
+def test_autoreset_keeps_games_running(mansion):
+    env = BatchEnv(mansion.world, mansion.initial_state(), autoreset=True)
+    env.reset(100)
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        env.step(rng.integers(0, env.num_actions, env.n))
+
+    assert not env.done.any()
@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import MANSION
+from equilibrio import balance, play, state_overrides
+
+
+def _play(mansion, overrides, agent="heuristic", seed=0):
+    initial = mansion.initial_state()
+    initial.update(state_overrides(overrides))
+    return play(mansion.world, initial, agent, seed)
+
+
+def test_score_multiplier_reaches_the_score(mansion):
+    base = _play(mansion, {})
+    tripled = _play(mansion, {"score_multiplier": 3})
+    # La dificultad elige el factor de score_multiplier del mundo
+    hard = _play(mansion, {"difficulty": "hard"})
+
+    assert base.outcome == tripled.outcome == hard.outcome == "escaped"
+    assert tripled.score == 3 * base.score
+    assert hard.score == 2 * base.score
+
+
+def test_achievement_thresholds_can_be_tuned(mansion):
+    bits = mansion.world.achievement_bits
+    base = _play(mansion, {})
+    tuned = _play(mansion, {"hunter_treasures": 1, "explorer_examined": 1, "speed_run_seconds": 0})
+
+    assert base.treasures >= 1 and base.examined >= 1
+    assert tuned.unlocked >> bits["treasure_hunter"] & 1
+    assert tuned.unlocked >> bits["master_explorer"] & 1
+    assert not tuned.unlocked >> bits["speed_runner"] & 1
+
+
+def test_unknown_setting_is_an_error():
+    assert state_overrides({"hint_limit": 1}) == {"hints_remaining": 1}
+    with pytest.raises(ValueError):
+        state_overrides({"hint_limt": 1})
+
+
+def test_balance_is_deterministic():
+    first = balance(MANSION, 40, workers=2, batch_size=10, overrides={"time_limit": 600})
+    second = balance(MANSION, 40, workers=1, batch_size=15, overrides={"time_limit": 600})
+
+    assert set(first) == set(second) == {"random", "heuristic"}
+    for agent in first:
+        a, b = first[agent], second[agent]
+        assert a.runs == b.runs == 40
+        assert a.outcomes == b.outcomes and a.unlocked == b.unlocked
+        # Los lotes llegan en otro orden: las casillas coinciden, las medias salvo redondeo
+        for name in ("score", "escape_time", "hints_used", "commands", "treasures", "examined"):
+            assert getattr(a, name).counts == getattr(b, name).counts
+            assert getattr(a, name).mean == pytest.approx(getattr(b, name).mean, nan_ok=True)
@@ -0,0 +1,58 @@
+from estado import GameState
+from guardado import capture, restore
+from mundo import compile_world
+from simulacion import simulate_game
+
+
+def _room(name):
+    return {"name": name, "type": "room", "description": name}
+
+
+DOOR = {"name": "door x", "type": "door", "description": "Una puerta"}
+RELATIONS = {
+    "hall": [{"name": "box", "type": "furniture", "description": "Una caja"}, DOOR],
+    "outside": [DOOR],
+    # Se sacan del último al primero: la nota tapa la llave
+    "box": [{"name": "key for door x", "type": "key", "target": DOOR, "description": "Una llave",
+             "hint": "Abre la puerta", "story": "Estaba en la caja"},
+            {"name": "note", "type": "note", "description": "Una nota"}],
+    "door x": [_room("hall"), _room("outside")],
+}
+INITIAL = {"current_room": _room("hall"), "target_room": _room("outside"),
+           "keys_collected": [], "treasure_collected": []}
+
+
+def test_any_object_comes_out_of_its_furniture():
+    world = compile_world(RELATIONS)
+    state = GameState.from_dict(world, INITIAL)
+    box = world.ids["box"]
+
+    assert state.next_content(box) == world.ids["note"]
+    state.collect(world.ids["note"])
+    assert state.next_content(box) == world.ids["key for door x"]
+    assert state.inventory() == []
+
+
+def test_world_with_an_object_on_top_of_the_key_can_be_won():
+    result = simulate_game(INITIAL, compile_world(RELATIONS), ["examine box", "examine box", "examine door x", "si"])
+
+    assert result.escaped
+    assert result.keys == ["key for door x"]
+
+
+def test_removed_objects_survive_to_dict_and_old_progress():
+    world = compile_world(RELATIONS)
+    state = GameState.from_dict(world, INITIAL)
+    state.collect(world.ids["note"])
+
+    restored = GameState.from_dict(world, INITIAL)
+    restored.update_from_dict(state.to_dict())
+    assert capture(restored) == capture(state)
+
+    # Un progreso guardado antes de que existiera removed
+    old = capture(state)
+    del old["removed"]
+    state.collect(world.ids["key for door x"])
+    old["keys"] = state.keys
+    restore(restored, old)
+    assert restored.removed == state.keys
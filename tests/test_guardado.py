@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from estado import GameState
+from guardado import SaveError, SaveStore, capture
+from mundo import compile_world
+
+
+def _state(mansion) -> GameState:
+    return GameState.from_dict(mansion.world, mansion.initial_state())
+
+
+def _lines(store: SaveStore, slot: str):
+    with open(store.path(slot), "rb") as f:
+        return f.read().splitlines()
+
+
+def test_snapshot_then_deltas_round_trip(mansion, tmp_path):
+    store = SaveStore(str(tmp_path / "partidas"))
+    state = _state(mansion)
+    store.save("uno", state)
+    piano = mansion.world.ids["piano"]
+    state.collect(mansion.world.ids["ancient book"])
+    state.examine(piano)
+    store.save("uno", state)
+    state.hints_remaining -= 1
+    store.save("uno", state)
+
+    lines = _lines(store, "uno")
+    assert len(lines) == 3
+    assert "state" in json.loads(lines[0])
+    assert set(json.loads(lines[2])["delta"]) == {"hints_remaining"}
+
+    loaded = _state(mansion)
+    store.load("uno", loaded)
+    assert capture(loaded) == capture(state)
+
+
+def test_truncated_last_line_is_ignored(mansion, tmp_path):
+    store = SaveStore(str(tmp_path / "partidas"))
+    state = _state(mansion)
+    store.save("uno", state)
+    state.collect(mansion.world.ids["ancient book"])
+    store.save("uno", state)
+    saved = capture(state)
+    state.hints_remaining = 0
+    store.save("uno", state)
+
+    # El programa se cortó a mitad de escribir el último delta
+    path = store.path("uno")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-5])
+
+    loaded = _state(mansion)
+    SaveStore(store.directory).load("uno", loaded)
+    assert capture(loaded) == saved
+
+
+def test_save_from_another_world_is_rejected(mansion, tmp_path):
+    store = SaveStore(str(tmp_path / "partidas"))
+    store.save("uno", _state(mansion))
+    other = compile_world({"hall": [], "outside": []})
+    with pytest.raises(SaveError):
+        store.read("uno", other)
+    with pytest.raises(SaveError):
+        store.read("nada", mansion.world)
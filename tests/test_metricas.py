@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import funcionesfinal_v2 as game_engine
+from conftest import MANSION_SCRIPT
+from estado import GameState
+from metricas import BUCKETS, Histogram, Metrics
+from simulacion import HeadlessIO
+
+EXAMINE = (("command", "examine"),)
+
+
+def _play(mansion, lines, metrics):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+    with game_engine.use_io(HeadlessIO(iter(()), capture=False)):
+        run = game_engine.start_session(state, mansion.world, seed=0, now=state.now, metrics=metrics)
+        for line in lines:
+            if run.done:
+                break
+            game_engine.feed_line(run, line, state.now + 10)
+    return run
+
+
+def _script():
+    with open(MANSION_SCRIPT, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def test_histogram_buckets_quantiles_and_merge():
+    fast, slow = Histogram(), Histogram()
+    for _ in range(99):
+        fast.observe(1e-6)
+    slow.observe(1.0)
+    fast.merge(slow)
+
+    assert fast.count == 100
+    assert fast.quantile(0.5) == BUCKETS[0]
+    assert fast.quantile(1.0) == next(bound for bound in BUCKETS if bound >= 1.0)
+    assert fast.mean == pytest.approx((99e-6 + 1.0) / 100)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_a_measured_game_counts_what_happened(mansion):
+    metrics = Metrics()
+    run = _play(mansion, ["hint", "dance"] + _script(), metrics)
+
+    assert run.state == "escaped"
+    assert metrics.counter("sessions") == metrics.counter("escapes") == 1
+    assert metrics.counter("keys_found") == 4
+    assert metrics.counter("hints_used") == 1
+    assert metrics.counter("invalid_commands") == 1
+    examines = metrics.counter("commands", EXAMINE)
+    assert examines > 0
+    assert metrics.histogram("command", EXAMINE).count == examines
+    assert metrics.histogram("turn").count == len(_script()) + 2
+
+
+def test_without_metrics_nothing_is_measured(mansion, monkeypatch):
+    calls = []
+    monkeypatch.setattr(Metrics, "observe", lambda *args, **kwargs: calls.append(args))
+    _play(mansion, _script(), None)
+
+    assert calls == []
+
+
+def test_sessions_merge_and_export(mansion):
+    total = Metrics()
+    for _ in range(2):
+        session = Metrics()
+        _play(mansion, _script(), session)
+        total.merge(session)
+
+    assert total.counter("escapes") == 2
+    text = total.prometheus()
+    assert "# TYPE escape_room_escapes_total counter\nescape_room_escapes_total 2" in text
+    assert 'escape_room_command_seconds_bucket{command="examine",le="+Inf"}' in text
+    records = [json.loads(line) for line in total.json_lines(session="s1")]
+    assert {"metric": "escapes", "type": "counter", "labels": {}, "value": 2, "session": "s1"} in records
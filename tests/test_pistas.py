@@ -0,0 +1,74 @@
+import gc
+from weakref import ref
+
+import pistas
+from estado import GameState
+from generador import generate_mansion
+from mundo import compile_world
+from pistas import HintTracker, plan_for
+
+
+def _generated(rooms=20, seed=1):
+    generated = generate_mansion(rooms, seed)
+    world = compile_world(generated.object_relations)
+    return world, GameState.from_dict(world, generated.initial_state())
+
+
+def test_hints_follow_the_plan_to_the_exit(mansion):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+    tracker = HintTracker(state)
+    plan = tracker.plan
+
+    assert "piano" in tracker.hint(state)
+    for obj_id in plan.items:
+        state.collect(obj_id)
+        tracker.update(state)
+    assert tracker.hint(state) == plan.exit
+    assert "door d" in plan.exit
+
+
+def test_losing_progress_goes_back_in_the_plan(mansion):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+    start = state.copy()
+    tracker = HintTracker(state)
+    first = tracker.hint(state)
+    state.collect(tracker.plan.items[0])
+    tracker.update(state)
+    assert tracker.hint(state) != first
+
+    # Como un load de una partida anterior: el mismo plan, desde el principio
+    tracker.update(start)
+    assert tracker.hint(start) == first
+
+
+def test_plans_are_shared_between_games(mansion):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+
+    assert HintTracker(state).plan is HintTracker(state.copy()).plan
+    assert plan_for(mansion.world, state.room, state.target_room, 0) is HintTracker(state).plan
+
+
+def test_plan_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(pistas, "PLAN_CACHE_SIZE", 2)
+    world, state = _generated()
+    rooms = list(world.room_items)[:3]
+
+    first = plan_for(world, rooms[0], state.target_room, 0)
+    for room in rooms[1:]:
+        plan_for(world, room, state.target_room, 0)
+
+    info = pistas._planner(world).cache_info()
+    assert info.currsize == 2 and info.maxsize == 2
+    # El menos usado se descartó: se vuelve a calcular, igual pero otro objeto
+    again = plan_for(world, rooms[0], state.target_room, 0)
+    assert again == first and again is not first
+
+
+def test_cache_does_not_keep_the_world_alive():
+    world, state = _generated(seed=2)
+    HintTracker(state)
+    world_ref = ref(world)
+    del world, state
+    gc.collect()
+
+    assert world_ref() is None
@@ -0,0 +1,88 @@
+import pytest
+
+import funcionesfinal_v2 as game_engine
+from conftest import MANSION_SCRIPT
+from diario import Journal
+from estado import GameState
+from generador import generate_mansion
+from guardado import SaveStore, capture
+from mundo import compile_world
+from repeticion import Replay, replay
+from simulacion import HeadlessIO
+
+
+def _script():
+    with open(MANSION_SCRIPT, encoding="utf-8") as f:
+        commands = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Pistas (usan el rng de la partida), guardar, cargar y una carga que falla
+    return ["hint", "save uno", "hint", "load uno", "load nada"] + commands[:8] + ["hint"] + commands[8:]
+
+
+def _play(mansion, tmp_path, initial):
+    """Jugar el guion con diario; devuelve la ruta del diario y el progreso tras cada turno"""
+    state = GameState.from_dict(mansion.world, initial)
+    path = str(tmp_path / "partida.jsonl")
+    journal = Journal.begin(state, seed=7, path=path)
+    saves = SaveStore(str(tmp_path / "partidas"))
+    progress = []
+    with game_engine.use_io(HeadlessIO(iter(()), capture=False)):
+        run = game_engine.start_session(state, mansion.world, journal=journal, seed=7, now=state.now,
+                                        saves=saves)
+        for turn, line in enumerate(_script(), 1):
+            if run.done:
+                break
+            game_engine.feed_line(run, line, state.start_time + 20 * turn)
+            progress.append(capture(state))
+    journal.close()
+    return path, progress, run.state, game_engine.calculate_score(state)
+
+
+def test_replay_gives_the_same_game(mansion, tmp_path):
+    initial = mansion.initial_state()
+    path, progress, outcome, score = _play(mansion, tmp_path, initial)
+    journal = Journal.load(path)
+
+    result = replay(journal, mansion.world)
+    assert outcome == result.run.state == "escaped"
+    assert capture(result.state) == progress[-1]
+    assert game_engine.calculate_score(result.state) == score
+    assert [error is not None for _, error in journal.loads] == [False, True]
+
+
+def test_seek_back_and_forth_through_checkpoints(mansion, tmp_path):
+    path, progress, _, _ = _play(mansion, tmp_path, mansion.initial_state())
+    journal = Journal.load(path)
+    result = Replay(journal, mansion.world, checkpoint_every=4)
+
+    for turn in (10, 3, 17, len(progress), 0, 5):
+        state = result.seek(turn)
+        if turn:
+            assert capture(state) == progress[turn - 1]
+    assert [checkpoint.turn for checkpoint in result.checkpoints][:3] == [0, 4, 8]
+
+
+def test_replay_keeps_the_rules_of_the_game(mansion, tmp_path):
+    initial = dict(mansion.initial_state(), difficulty="hard", hunter_treasures=1)
+    path, _, _, score = _play(mansion, tmp_path, initial)
+
+    result = replay(Journal.load(path), mansion.world)
+    assert result.state.rules.score_multiplier == 2.0
+    assert result.state.rules.hunter_treasures == 1
+    assert game_engine.calculate_score(result.state) == score
+
+
+def test_journal_of_another_world_is_rejected(mansion, tmp_path):
+    path, _, _, _ = _play(mansion, tmp_path, mansion.initial_state())
+    other = compile_world(generate_mansion(10, 1).object_relations)
+
+    with pytest.raises(ValueError):
+        Replay(Journal.load(path), other)
+
+
+def test_truncated_last_line_is_ignored(mansion, tmp_path):
+    path, progress, _, _ = _play(mansion, tmp_path, mansion.initial_state())
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t": 1, "li')
+
+    journal = Journal.load(path)
+    assert len(journal.entries) == len(progress)
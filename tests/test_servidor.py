@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+import pytest
+
+from servidor import NAME_PROMPT, GameServer, uses_storage
+
+PROMPT = "¿Qué quieres hacer? ".encode("utf-8")
+
+
+async def _connect(port: int, name: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await asyncio.wait_for(reader.readuntil(NAME_PROMPT.encode("utf-8")), 5)
+    writer.write(name.encode("utf-8") + b"\n")
+    await asyncio.wait_for(reader.readuntil(PROMPT), 5)
+    return reader, writer
+
+
+async def _send(reader, writer, line: str) -> str:
+    writer.write(line.encode("utf-8") + b"\n")
+    await writer.drain()
+    return (await asyncio.wait_for(reader.readuntil(PROMPT), 5)).decode("utf-8")
+
+
+async def _close(writer) -> None:
+    writer.close()
+    await writer.wait_closed()
+
+
+def test_saves_belong_to_the_player_and_outlive_the_connection(mansion, tmp_path):
+    saves_dir = tmp_path / "partidas-servidor"
+    initial = mansion.initial_state()
+    initial["sound_enabled"] = False
+
+    async def play():
+        server = GameServer(initial, mansion.world, saves_dir=str(saves_dir))
+        listening = await server.start(port=0)
+        port = listening.sockets[0].getsockname()[1]
+        try:
+            ana = await _connect(port, "Ana")
+            await _send(*ana, "examine piano")
+            # El turno solo vuelve cuando la partida ya está en el disco
+            assert "guardada" in await _send(*ana, "save")
+            assert os.path.exists(saves_dir / "ana" / "default.sav")
+
+            # Otro jugador no ve la partida de Ana
+            luis = await _connect(port, "luis")
+            assert "No hay ninguna partida guardada" in await _send(*luis, "load")
+            await _close(luis[1])
+
+            # Y Ana la carga al volver a conectarse
+            await _close(ana[1])
+            ana = await _connect(port, "ana")
+            loaded = await _send(*ana, "load")
+            assert "cargada" in loaded
+            assert "ancient book" in await _send(*ana, "inventory")
+            await _close(ana[1])
+        finally:
+            listening.close()
+            await listening.wait_closed()
+
+    asyncio.run(play())
+    assert os.listdir(saves_dir) == ["ana"]
+
+
+@pytest.mark.parametrize("line, storage", [("save", True), ("load partida1", True), ("LOAD", True),
+                                           ("examine piano", False), ("", False)])
+def test_only_save_and_load_go_to_a_thread(line, storage):
+    assert uses_storage(line) == storage
@@ -0,0 +1,23 @@
+from conftest import MANSION_SCRIPT
+from simulacion import simulate_game
+
+
+def test_scripted_escape(mansion):
+    result = simulate_game(mansion.initial_state(), mansion.world, MANSION_SCRIPT)
+
+    assert result.escaped
+    assert result.final_room == "outside"
+    assert sorted(result.keys) == ["key for door a", "key for door b", "key for door c", "key for door d"]
+    assert sorted(result.treasures) == ["ancient book", "crystal orb", "mystic amulet"]
+    assert "Treasure Hunter" in result.achievements
+    assert result.score > 0
+
+
+def test_script_that_stops_early(mansion):
+    script = ["examine piano", "examine piano", "examine door a", "si"]
+    result = simulate_game(mansion.initial_state(), mansion.world, script)
+
+    assert result.outcome == "incomplete"
+    assert result.final_room == "bedroom1"
+    assert result.keys == ["key for door a"]
+    assert result.treasures == ["ancient book"]
@@ -0,0 +1,50 @@
+import pytest
+
+from estado import GameState
+from generador import generate_mansion
+from mundo import compile_world
+from simulacion import simulate_game
+from solucionador import solve_state
+
+
+def _replay(initial, world, solution):
+    assert solution is not None
+    return simulate_game(initial, world, solution.commands)
+
+
+@pytest.mark.parametrize("all_treasures, length", [(False, 16), (True, 17)])
+def test_mansion_route_escapes(mansion, all_treasures, length):
+    initial = mansion.initial_state()
+    solution = solve_state(GameState.from_dict(mansion.world, initial), all_treasures)
+
+    assert solution.optimal
+    assert solution.length == length
+    result = _replay(initial, mansion.world, solution)
+    assert result.escaped
+    assert result.inputs == solution.length
+    if all_treasures:
+        assert len(result.treasures) == 3
+
+
+@pytest.mark.parametrize("rooms, seed", [(20, 1), (20, 2), (100, 1)])
+def test_generated_route_escapes(rooms, seed):
+    generated = generate_mansion(rooms, seed)
+    world = compile_world(generated.object_relations)
+    initial = generated.initial_state()
+    solution = solve_state(GameState.from_dict(world, initial))
+
+    assert solution.optimal
+    assert _replay(initial, world, solution).escaped
+
+
+def test_dependency_route_escapes_but_is_not_optimal():
+    generated = generate_mansion(20, 3)
+    world = compile_world(generated.object_relations)
+    initial = generated.initial_state()
+    state = GameState.from_dict(world, initial)
+    exact = solve_state(state)
+    fallback = solve_state(state, max_states=1)
+
+    assert not fallback.optimal
+    assert fallback.length >= exact.length
+    assert _replay(initial, world, fallback).escaped
@@ -0,0 +1,88 @@
+import pytest
+
+import funcionesfinal_v2 as game_engine
+import temporizador
+from estado import GameState
+from simulacion import HeadlessIO
+from temporizador import TimerWheel, format_remaining, read_line
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_fire_once_on_their_tick():
+    wheel = TimerWheel(tick=1.0, slots=8, clock=FakeClock())
+    fired = []
+    wheel.schedule(3.5, lambda: fired.append("a"))
+    wheel.schedule(2.0, lambda: fired.append("b"))
+
+    assert wheel.advance(1.9) == 0
+    assert wheel.advance(2.0) == 1 and fired == ["b"]
+    assert wheel.advance(4.0) == 1 and fired == ["b", "a"]
+    assert wheel.advance(10.0) == 0
+    assert wheel.pending == 0
+
+
+def test_deadlines_further_than_one_turn_of_the_wheel():
+    wheel = TimerWheel(tick=1.0, slots=8, clock=FakeClock())
+    fired = []
+    wheel.schedule(20, lambda: fired.append(20))
+    wheel.schedule(4, lambda: fired.append(4))
+
+    wheel.advance(12)  # el tic 4 y el 20 comparten casilla: solo vence el 4
+    assert fired == [4]
+    # Un salto de varias vueltas recorre cada casilla una sola vez
+    wheel.advance(100)
+    assert fired == [4, 20]
+
+
+def test_cancelled_and_past_deadlines():
+    clock = FakeClock(50.0)
+    wheel = TimerWheel(tick=1.0, slots=8, clock=clock)
+    fired = []
+    wheel.schedule(52, lambda: fired.append("cancelled")).cancel()
+    wheel.schedule(10, lambda: fired.append("late"))
+
+    clock.now = 51.0
+    assert wheel.advance() == 1
+    assert fired == ["late"]
+    wheel.advance(60)
+    assert fired == ["late"] and wheel.pending == 0
+
+
+@pytest.mark.parametrize("seconds, text", [(0, "00:00"), (59.9, "00:59"), (61, "01:01"), (-5, "00:00")])
+def test_format_remaining(seconds, text):
+    assert format_remaining(seconds) == text
+
+
+def test_read_line_without_a_terminal_checks_the_deadline_after_input(monkeypatch):
+    clock = FakeClock(0.0)
+    monkeypatch.setattr(temporizador, "stdin_selectable", lambda: False)
+
+    def answer_at(moment):
+        def fake_input(prompt):
+            clock.now = moment
+            return "examine piano"
+        return fake_input
+
+    monkeypatch.setattr("builtins.input", answer_at(5.0))
+    assert read_line("> ", deadline=10.0, clock=clock) == "examine piano"
+    monkeypatch.setattr("builtins.input", answer_at(15.0))
+    assert read_line("> ", deadline=10.0, clock=clock) is None
+    assert read_line("> ", deadline=None, clock=clock) == "examine piano"
+
+
+def test_deadline_ends_the_game_in_the_middle_of_a_prompt(mansion):
+    state = GameState.from_dict(mansion.world, mansion.initial_state())
+    with game_engine.use_io(HeadlessIO(iter(()), capture=False)):
+        run = game_engine.start_session(state, mansion.world, seed=0, now=state.start_time)
+        game_engine.feed_line(run, "examine door a", state.start_time + 1)
+        # La partida espera la siguiente línea cuando vence el plazo
+        game_engine.feed_line(run, None, state.start_time + state.time_limit)
+
+    assert run.done and run.state == "timeout"